@@ -0,0 +1,499 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+import cluster_spec
+import experiment_grid
+import replication_cache
+import results_store
+import simulation
+import streams
+from compare_policies import parse_policy
+
+# Αναλυτικές εκτιμήσεις (μέση αναμονή, χρησιμοποίηση ανά worker, throughput) χωρίς
+# προσομοίωση, vectorized πάνω σε πολλά σημεία παραμέτρων (ρυθμός αφίξεων, αλγόριθμος, d):
+#
+#   αλγόριθμος 3: ακριβές στη steady state. Η τυχαία διάσπαση Poisson δίνει ανεξάρτητες
+#                 M/M/1 με λ_k = λ μ_k / Σμ, άρα W_k = ρ_k / (μ_k - λ_k).
+#   αλγόριθμος 4: ακριβές στη steady state. Με round robin κάθε worker βλέπει Erlang(N, λ) ενδιάμεσους
+#                 χρόνους (E_N/M/1): W_k = σ / (μ_k (1 - σ)), όπου σ η ρίζα του
+#                 σ = (λ / (λ + μ_k (1 - σ)))^N στο (0, 1).
+#   αλγόριθμοι 1, 2, fill-path (ρευστή προσέγγιση σε επίπεδο συνόλου, ~10^4 σημεία/sec):
+#                 η κατάσταση είναι μόνο το πλήθος n των εργασιών στο σύστημα. Η διάταξή
+#                 τους στους workers είναι αυτή που χτίζει η πολιτική όταν οι εργασίες
+#                 έρχονται μία-μία (ίδιο tie-breaking με το load_index). Οι αναχωρήσεις
+#                 γυρίζουν τη διάταξη ένα βήμα πίσω. Έτσι προκύπτει birth-death αλυσίδα με
+#                 ρυθμό θανάτου D(n) = Σ μ_k [q_k(n) > 0]. Μια άφιξη στο επίπεδο n περιμένει
+#                 q_k(n) / μ_k στον worker k που διαλέγει η πολιτική (έλλειψη μνήμης).
+#   αλγόριθμος 2 με κατώφλι > 0, mean-field (cavity, --model mean-field, πιο αργό):
+#                 κάθε worker είναι birth-death ουρά και οι υπόλοιποι θεωρούνται ανεξάρτητοι.
+#                 Για τον JSQ και το d = 0 η ανεξαρτησία δεν ισχύει (ισορροπημένες, έντονα
+#                 συσχετισμένες ουρές), οπότε εκεί μένει το fill-path.
+#
+# Τα "ακριβή" είναι τιμές steady state, ενώ η προσομοίωση μετράει πεπερασμένο ορίζοντα
+# μετά από warm-up, με bias που μικραίνει όσο μεγαλώνει ο ορίζοντας: στο default cluster
+# ο αλγόριθμος 3 δίνει 13.17 έναντι 12.54 ± 0.62 στα 3000 s (εκτός CI), 13.35 ± 0.38 στα
+# 20000 s και 13.15 ± 0.24 στα 86400 s. Το validate το σημειώνει στην αναφορά του και
+# προειδοποιεί για ορίζοντα κάτω από VALIDATION_TIME.
+#
+# Στο default cluster (fast, εκτός CI αλλά με σωστή την καλύτερη διαμόρφωση, rank correlation ~0.93):
+#   fill-path  για d >= 1: ~10% στο λ = 0.7, -36% έως -53% στο λ = 1.0, έως -32% στο λ = 1.3·
+#              για JSQ και d = 0 υπερεκτιμά (+20% έως +85%)
+#   mean-field για d >= 1: ~8% στο λ = 1.0, αλλά έως -35% σε άλλα φορτία
+# Οπότε είναι ταξινομητές για το τι αξίζει προσομοίωση, όχι αντικατάστασή της (βλ. validate).
+#
+# Ο screener δίνει σε κάθε διαμόρφωση ένα διάστημα για την πραγματική αναμονή: ένα σημείο
+# για τις ακριβείς, [W / (1 + υπερεκτίμηση), W / (1 - υποεκτίμηση)] για τις προσεγγίσεις, με
+# τα χειρότερα σφάλματα του APPROXIMATION_ERRORS. Απορρίπτει μόνο όσες έχουν κάτω όριο πάνω
+# από το μικρότερο άνω όριο, δηλαδή όσες δεν μπορούν να είναι οι καλύτερες ακόμα κι αν η
+# καλύτερη πρόβλεψη υπερεκτιμά κατά +85% και η δική τους υποεκτιμά κατά -53% (λόγος ~3.9x).
+#
+# Throughput: όπως στον προσομοιωτή (online_stats.ReplicationObserver), διελεύσεις από τον
+# dispatcher (λ) συν ολοκληρώσεις (λ όταν είναι ευσταθές, αλλιώς όσο προλαβαίνουν οι workers).
+#
+# Χρήση: python analytic.py rank [<algo:d> ...] [--arrival-rate L] [--model fill-path|mean-field] [--cluster spec.json]
+#        python analytic.py validate <sim_time> [<algo:d> ...] [--workers N] [--engine ciw|fast]
+
+MODELS = ('fill-path', 'mean-field')
+MODEL = 'fill-path'
+TAIL = 1e-12           # Πιθανότητα που αφήνει η αποκοπή των επιπέδων της birth-death αλυσίδας
+MAX_LEVELS = 100000    # Ανώτατο πλήθος επιπέδων (ρ πολύ κοντά στο 1)
+SIGMA_ITERATIONS = 500  # Επαναλήψεις σταθερού σημείου για τη ρίζα σ του E_N/M/1
+MEAN_FIELD_LEVELS = 128  # Επίπεδα ουράς ανά worker στο mean-field
+MEAN_FIELD_ITERATIONS = 500
+MEAN_FIELD_DAMPING = 0.5
+MEAN_FIELD_TOLERANCE = 1e-8
+NEGLIGIBLE = 1e-150    # Πιθανότητες κάτω από αυτό μετράνε ως 0 στο mean-field (αλλιώς subnormals)
+APPROXIMATION_ERRORS = (-0.53, 0.85)  # Χειρότερα σχετικά σφάλματα (πρόβλεψη - προσομοίωση) / προσομοίωση
+VALIDATION_TIME = 86400  # Ορίζοντας του validate χωρίς ορατό bias στα ακριβή (όσο το run_experiments)
+VALIDATION_GRID = [(1, 0), (2, 0), (2, 1), (2, 2), (2, 3), (2, 4), (2, 5), (3, 0), (4, 0)]
+
+
+def thresholds_array(ds, n_classes):
+    """ d ανά σημείο (αριθμός ή tuple ανά κλάση) -> πίνακας (P, κλάσεις - 1), -inf όπου δεν υπάρχει κατώφλι """
+    out = np.full((len(ds), max(n_classes - 1, 1)), -np.inf)
+    for i, d in enumerate(ds):
+        values = d if isinstance(d, tuple) else (d,)
+        out[i, :len(values)] = values
+    return out
+
+
+# --- ΑΚΡΙΒΗ ΑΠΟΤΕΛΕΣΜΑΤΑ ---
+def random_split(arrival_rates, service_rates):
+    """ Αλγόριθμος 3 (M/M/1 ανά worker): (μέση αναμονή, χρησιμοποιήσεις) ανά σημείο """
+    lam = np.asarray(arrival_rates, dtype=float)[:, None]
+    mu = np.asarray(service_rates, dtype=float)[None, :]
+    lam_k = lam * mu / mu.sum()
+    rho = lam_k / mu
+    with np.errstate(divide='ignore', invalid='ignore'):
+        waits = np.where(rho < 1, rho / (mu - lam_k), np.inf)
+    return (lam_k / lam * waits).sum(axis=1), np.minimum(rho, 1.0)
+
+
+def round_robin(arrival_rates, service_rates):
+    """ Αλγόριθμος 4 (E_N/M/1 ανά worker): (μέση αναμονή, χρησιμοποιήσεις) ανά σημείο """
+    lam = np.asarray(arrival_rates, dtype=float)[:, None]
+    mu = np.asarray(service_rates, dtype=float)[None, :]
+    n = mu.shape[1]
+    rho = lam / (n * mu)
+    stable = rho < 1
+    # Η επανάληψη από σ = 0 συγκλίνει μονότονα στη ρίζα του (0, 1) όταν ρ < 1
+    sigma = np.zeros(np.broadcast(lam, mu).shape)
+    for _ in range(SIGMA_ITERATIONS):
+        sigma = (lam / (lam + mu * (1 - sigma))) ** n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        waits = np.where(stable, sigma / (mu * (1 - sigma)), np.inf)
+    return waits.mean(axis=1), np.minimum(rho, 1.0)
+
+
+# --- FILL-PATH (ΑΛΓΟΡΙΘΜΟΙ 1, 2) ---
+def _route(loads, algorithm, thresholds, class_masks):
+    """ Ο worker της επόμενης άφιξης ανά γραμμή (tie-breaking στον μικρότερο δείκτη, όπως το load_index) """
+    best = np.argmin(loads, axis=1)
+    if algorithm == 1:
+        return best
+    rows = np.arange(len(loads))
+    limit = loads[rows, best]
+    chosen = best.copy()
+    decided = np.zeros(len(loads), dtype=bool)
+    for c, mask in enumerate(class_masks[:thresholds.shape[1]]):
+        candidate = np.argmin(np.where(mask, loads, np.inf), axis=1)
+        take = ~decided & (loads[rows, candidate] <= limit + thresholds[:, c])
+        chosen[take] = candidate[take]
+        decided |= take
+    return chosen
+
+
+def fill_path(arrival_rates, service_rates, algorithm, thresholds=None):
+    """ Αλγόριθμοι 1, 2 με την προσέγγιση fill-path: (μέση αναμονή, χρησιμοποιήσεις) ανά σημείο
+
+    Τα αθροίσματα πάνω στα επίπεδα κρατιούνται σε log-κλίμακα με κοινή μετατόπιση ανά
+    γραμμή, αφού η π_n μπορεί πρώτα να ανεβαίνει (όταν λ > D(n)) και μετά να πέφτει.
+    """
+    lam = np.asarray(arrival_rates, dtype=float)
+    mu = np.asarray(service_rates, dtype=float)
+    p, n = len(lam), len(mu)
+    total = mu.sum()
+    rho = lam / total
+    stable = rho < 1
+    # Κλάση 0 = οι ταχύτεροι workers (όπως το load_index.WorkerLoadIndex)
+    rates = cluster_spec.speed_rates(mu.tolist())
+    class_masks = [mu == rate for rate in rates]
+    if thresholds is None:
+        thresholds = np.zeros((p, 1))
+    # Μετά από όλους τους workers απασχολημένους η π_n φθίνει γεωμετρικά με λόγο ρ
+    rho_max = max(rho[stable].max(), 1e-9) if stable.any() else 0.5
+    finite = thresholds[np.isfinite(thresholds)]
+    fill = n * (int(finite.max()) + 2 if finite.size else 2)
+    levels = min(fill + int(math.ceil(math.log(TAIL) / math.log(rho_max))), MAX_LEVELS)
+
+    loads = np.zeros((p, n))
+    log_pi = np.zeros(p)
+    shift = np.zeros(p)
+    norm = np.zeros(p)
+    wait_sum = np.zeros(p)
+    busy_sum = np.zeros((p, n))
+    rows = np.arange(p)
+    for _ in range(levels):
+        weight = np.exp(log_pi - shift)
+        k = _route(loads, algorithm, thresholds, class_masks)
+        norm += weight
+        wait_sum += weight * loads[rows, k] / mu[k]
+        busy_sum += weight[:, None] * (loads > 0)
+        loads[rows, k] += 1
+        departures = ((loads > 0) * mu).sum(axis=1)
+        log_pi = log_pi + np.log(lam / departures)
+        # Νέα μετατόπιση όταν η π_n ξεπερνάει τη μέγιστη μέχρι τώρα (αποφυγή overflow)
+        grow = log_pi > shift + 50
+        if grow.any():
+            scale = np.exp(shift[grow] - log_pi[grow])
+            norm[grow] *= scale
+            wait_sum[grow] *= scale
+            busy_sum[grow] *= scale[:, None]
+            shift[grow] = log_pi[grow]
+    waits = np.where(stable, wait_sum / norm, np.inf)
+    return waits, np.where(stable[:, None], busy_sum / norm[:, None], 1.0)
+
+
+# --- MEAN-FIELD (ΑΛΓΟΡΙΘΜΟΣ 2 ΜΕ ΚΑΤΩΦΛΙ > 0) ---
+def _survival(pi):
+    """ S[..., x] = P(q >= x) για x = 0..Q+1 """
+    tail = np.cumsum(pi[..., ::-1], axis=-1)[..., ::-1]
+    return np.concatenate([tail, np.zeros(pi.shape[:-1] + (2,))], axis=-1)
+
+
+def mean_field(arrival_rates, service_rates, thresholds):
+    """ Αλγόριθμος 2 με την προσέγγιση mean-field (cavity): (μέση αναμονή, χρησιμοποιήσεις) ανά σημείο
+
+    Κάθε worker είναι birth-death ουρά με ρυθμό αφίξεων λ r_c(q). Το r_c(q) είναι η
+    πιθανότητα η πολιτική να διαλέξει έναν συγκεκριμένο worker της κλάσης c όταν έχει q
+    εργασίες, με τους άλλους workers ανεξάρτητους και με τις δικές τους (ίδιες ανά κλάση)
+    κατανομές. Επανάληψη σταθερού σημείου με απόσβεση ως τη σύγκλιση.
+    thresholds: (P, κλάσεις - 1) από την ταχύτερη κλάση, -inf όπου δεν υπάρχει κατώφλι.
+    """
+    lam = np.asarray(arrival_rates, dtype=float)
+    mu_workers = np.asarray(service_rates, dtype=float)
+    rates = cluster_spec.speed_rates(mu_workers.tolist())  # Κλάση c = ο c-οστός ταχύτερος ρυθμός
+    mu = np.array(rates)
+    sizes = np.array([np.sum(mu_workers == rate) for rate in rates])
+    # Σειρά των κλάσεων στο tie-breaking του load_index (μικρότερος δείκτης worker)
+    first_index = [int(np.flatnonzero(mu_workers == rate)[0]) for rate in rates]
+    p, c_count, q_count = len(lam), len(rates), MEAN_FIELD_LEVELS
+    thr = np.full((p, c_count), -np.inf)
+    thr[:, :min(thresholds.shape[1], c_count)] = thresholds[:, :c_count]
+    finite = np.isfinite(thr)
+    thr_int = np.where(finite, thr, 0).astype(int)
+    q = np.arange(q_count)
+    rows = np.arange(p)[:, None]
+
+    def class_min_at_least(minimum, o, x):
+        """ P(ελάχιστο φορτίο της κλάσης o >= x) ανά σημείο, x: (P, Q) """
+        return minimum[rows, o, np.clip(x, 0, q_count + 1)]
+
+    rho = lam / (sizes * mu).sum()
+    stable = rho < 1
+    start = np.where(stable, rho, 0.5)[:, None, None]
+    pi = (1 - start) * start ** q  # Αρχή από ίσες χρησιμοποιήσεις (γεωμετρικές κατανομές)
+    pi = np.broadcast_to(pi, (p, c_count, q_count)).copy()
+    r = np.zeros_like(pi)
+    for _ in range(MEAN_FIELD_ITERATIONS):
+        pi /= pi.sum(axis=2, keepdims=True)
+        survival = _survival(pi)
+        # P(min της κλάσης >= x), χωρίς τις αμελητέες ουρές
+        minimum = survival ** sizes[None, :, None]
+        minimum[minimum < NEGLIGIBLE] = 0.0
+        for c in range(c_count):
+            others = [o for o in range(c_count) if o != c]
+            # Ο worker κερδίζει μέσα στην κλάση του (ισοπαλίες μοιρασμένες ομοιόμορφα)
+            win = np.where(pi[:, c] > NEGLIGIBLE,
+                           (minimum[:, c, :q_count] - minimum[:, c, 1:q_count + 1])
+                           / (sizes[c] * np.maximum(pi[:, c], NEGLIGIBLE)), 0.0)
+
+            def lower(o, m):
+                # Μια ταχύτερη κλάση με κατώφλι δεν πρέπει να έχει "πιάσει" την εργασία: min > m + d
+                if o < c:
+                    return np.where(finite[:, o, None], m + thr_int[:, o, None] + 1, m)
+                return m
+
+            # Κλάδος κατωφλιού: ελάχιστο m των υπολοίπων στο [q - d_c, q]
+            chosen = np.ones((p, q_count))
+            for o in others:
+                chosen *= class_min_at_least(minimum, o, np.maximum(q, lower(o, q)))
+            for j in range(1, int(thr_int[:, c].max()) + 1 if finite[:, c].any() else 1):
+                m = q - j
+                at_least, above = np.ones((p, q_count)), np.ones((p, q_count))
+                for o in others:
+                    lo = lower(o, m)
+                    at_least *= class_min_at_least(minimum, o, np.maximum(m, lo))
+                    above *= class_min_at_least(minimum, o, np.maximum(m + 1, lo))
+                chosen += np.where((m >= 0) & (j <= thr_int[:, c, None]), at_least - above, 0.0)
+            # Χωρίς κατώφλι: ο λιγότερο φορτωμένος συνολικά, αν καμία κλάση με κατώφλι δεν τον πήρε
+            fallback = np.ones((p, q_count))
+            for o in others:
+                lo = q + 1 if first_index[o] < first_index[c] else q
+                lo = np.broadcast_to(lo, (p, q_count))
+                fallback *= class_min_at_least(minimum, o, np.where(finite[:, o, None],
+                                                                      np.maximum(lo, q + thr_int[:, o, None] + 1), lo))
+            r[:, c] = win * np.where(finite[:, c, None], chosen, fallback)
+        births = lam[:, None, None] * r[:, :, :-1] / mu[None, :, None]
+        new = np.concatenate([np.ones((p, c_count, 1)), np.cumprod(births, axis=2)], axis=2)
+        new /= new.sum(axis=2, keepdims=True)
+        new[new < NEGLIGIBLE] = 0.0
+        change = np.abs(new - pi).max()
+        pi = MEAN_FIELD_DAMPING * pi + (1 - MEAN_FIELD_DAMPING) * new
+        if change < MEAN_FIELD_TOLERANCE:
+            break
+    weights = sizes[None, :, None] * pi * r
+    waits = (weights * q / mu[None, :, None]).sum(axis=(1, 2)) / weights.sum(axis=(1, 2))
+    # Μάζα στο τελευταίο επίπεδο: η αποκοπή δεν χωράει την ουρά (ρ πολύ κοντά στο 1)
+    stable &= pi[:, :, -1].max(axis=1) < TAIL ** 0.5
+    busy = 1 - pi[:, :, 0]
+    utilizations = busy[:, [rates.index(rate) for rate in mu_workers.tolist()]]
+    return np.where(stable, waits, np.inf), np.where(stable[:, None], utilizations, 1.0)
+
+
+# --- ΠΡΟΒΛΕΨΗ ---
+def predict(configs, arrival_rates=None, cluster=None, model=None):
+    """ Εκτιμήσεις για λίστα (algo, d)· arrival_rates ανά σημείο (προεπιλογή: του cluster)
+
+    model: 'fill-path' ή 'mean-field' για τον αλγόριθμο 2 με κάποιο κατώφλι > 0 (προεπιλογή:
+    MODEL). Οι υπόλοιπες διαμορφώσεις έχουν πάντα το ίδιο μοντέλο.
+    Επιστρέφει dict με πίνακες: mean_wait (P,), utilizations (P, N), throughput (P,), exact (P,).
+    """
+    cluster = cluster or simulation.CLUSTER
+    model = model or MODEL
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model}")
+    configs = [tuple(config) for config in configs]
+    p = len(configs)
+    lam = np.full(p, cluster.arrival_rate) if arrival_rates is None else np.asarray(arrival_rates, dtype=float)
+    mu = np.asarray(cluster.service_rates, dtype=float)
+    n_classes = len(set(cluster.service_rates))
+    algorithms = np.array([algo for algo, _ in configs])
+    waits = np.empty(p)
+    utilizations = np.empty((p, len(mu)))
+    for algo in np.unique(algorithms):
+        idx = np.flatnonzero(algorithms == algo)
+        if algo == 3:
+            waits[idx], utilizations[idx] = random_split(lam[idx], mu)
+        elif algo == 4:
+            waits[idx], utilizations[idx] = round_robin(lam[idx], mu)
+        elif algo == 1:
+            waits[idx], utilizations[idx] = fill_path(lam[idx], mu, algo)
+        elif algo == 2:
+            thresholds = thresholds_array([configs[i][1] for i in idx], n_classes)
+            spread = (thresholds > 0).any(axis=1) if model == 'mean-field' else np.zeros(len(idx), dtype=bool)
+            if (~spread).any():
+                waits[idx[~spread]], utilizations[idx[~spread]] = fill_path(lam[idx[~spread]], mu, algo,
+                                                                            thresholds[~spread])
+            if spread.any():
+                waits[idx[spread]], utilizations[idx[spread]] = mean_field(lam[idx[spread]], mu, thresholds[spread])
+        else:
+            raise ValueError(f"Unknown algorithm: {algo}")
+    # Διελεύσεις από τον dispatcher + ολοκληρώσεις (λ όταν όλοι οι workers είναι ευσταθείς,
+    # αλλιώς όσο προλαβαίνουν), ο ορισμός του throughput στον προσομοιωτή
+    throughput = lam + np.minimum(lam, (utilizations * mu).sum(axis=1))
+    return {'mean_wait': waits, 'utilizations': utilizations, 'throughput': throughput,
+            'exact': np.isin(algorithms, (3, 4))}
+
+
+def mean_field_applies(config):
+    """ Το mean-field ορίζεται για τον αλγόριθμο 2 με κάποιο κατώφλι > 0 """
+    algo, d = config
+    return algo == 2 and max(d if isinstance(d, tuple) else (d,)) > 0
+
+
+def rank(configs, arrival_rate=None, cluster=None, model=None):
+    """ [(διαμόρφωση, προβλεπόμενη μέση αναμονή)] από την καλύτερη """
+    configs = [tuple(config) for config in configs]
+    rates = None if arrival_rate is None else [arrival_rate] * len(configs)
+    waits = predict(configs, rates, cluster, model)['mean_wait']
+    return [(configs[i], float(waits[i])) for i in np.argsort(waits, kind='stable')]
+
+
+def screen(configs, errors=APPROXIMATION_ERRORS, cluster=None, model=None):
+    """ Οι διαμορφώσεις (με τη σειρά τους) που μπορεί να είναι οι καλύτερες με σφάλματα έως errors
+
+    errors = (χειρότερη υποεκτίμηση < 0, χειρότερη υπερεκτίμηση > 0) των προσεγγίσεων· οι
+    ακριβείς διαμορφώσεις (αλγόριθμοι 3, 4) έχουν διάστημα ένα σημείο.
+    """
+    configs = [tuple(config) for config in configs]
+    predicted = predict(configs, cluster=cluster, model=model)
+    waits, exact = predicted['mean_wait'], predicted['exact']
+    under, over = errors
+    lower = np.where(exact, waits, waits / (1 + over))
+    upper = np.where(exact, waits, waits / (1 + under))
+    keep = lower <= upper.min()
+    return [config for config, kept in zip(configs, keep) if kept]
+
+
+# --- ΕΠΙΚΥΡΩΣΗ ---
+def rank_correlation(a, b):
+    """ Spearman (χωρίς διόρθωση ισοπαλιών) ανάμεσα σε δύο λίστες τιμών """
+    if len(a) < 2:
+        return math.nan
+    ra = np.argsort(np.argsort(a, kind='stable'), kind='stable')
+    rb = np.argsort(np.argsort(b, kind='stable'), kind='stable')
+    return float(np.corrcoef(ra, rb)[0, 1])
+
+
+def validate(configs, sim_duration, workers=1, master_seed=streams.MASTER_SEED, engine=None, cluster=None,
+             cache=None, warmup='auto'):
+    """ Προβλέψεις (και των δύο μοντέλων) δίπλα στο CI της προσομοίωσης (run_grid, κανόνας 5%) """
+    cluster = cluster or simulation.CLUSTER
+    configs = [tuple(config) for config in configs]
+    started = time.perf_counter()
+    predicted = predict(configs, cluster=cluster, model='fill-path')
+    predict_seconds = time.perf_counter() - started
+    field = [i for i, config in enumerate(configs) if mean_field_applies(config)]
+    field_waits = dict(zip(field, predict([configs[i] for i in field], cluster=cluster,
+                                          model='mean-field')['mean_wait'])) if field else {}
+    simulated = experiment_grid.run_grid(configs, sim_duration, workers=workers, master_seed=master_seed,
+                                         engine=engine, cluster=cluster, cache=cache, warmup=warmup)
+    rows = []
+    for i, (config, res) in enumerate(zip(configs, simulated)):
+        row = {'algo': config[0], 'd': config[1], 'exact': bool(predicted['exact'][i]),
+               'predicted_wait': float(predicted['mean_wait'][i]),
+               'mean_field_wait': float(field_waits[i]) if i in field_waits else None,
+               'predicted_throughput': float(predicted['throughput'][i])}
+        if res.error is not None:
+            rows.append({**row, 'error': res.error})
+            continue
+        summary = res.summary
+        wait, hw = summary['mean_wait'], summary['half_width']
+        util_error = np.abs(predicted['utilizations'][i] - np.asarray(summary['utilizations']))
+        rows.append({**row, 'replications': summary['replications'], 'simulated_wait': wait, 'half_width': hw,
+                     'relative_error': (row['predicted_wait'] - wait) / wait if wait else math.nan,
+                     'within_ci': abs(row['predicted_wait'] - wait) <= hw,
+                     'simulated_throughput': summary['throughput'],
+                     'max_utilization_error': float(util_error.max())})
+    done = [row for row in rows if 'simulated_wait' in row]
+    return {
+        'sim_time': sim_duration,
+        'engine': engine or simulation.ENGINE,
+        'master_seed': master_seed,
+        'cluster': cluster.to_dict(),
+        'predict_seconds': predict_seconds,
+        'same_best': bool(done) and min(done, key=lambda r: r['predicted_wait']) is min(done, key=lambda r: r['simulated_wait']),
+        'rank_correlation': rank_correlation([r['predicted_wait'] for r in done], [r['simulated_wait'] for r in done]),
+        'note': ("exact rows are steady-state values; the simulated CI covers a finite horizon after the "
+                 "warm-up and keeps its initialization bias, so short horizons can put them outside the CI"),
+        'configs': rows,
+    }
+
+
+def throughput_benchmark(points=10000, cluster=None, model=None):
+    """ Σημεία / sec της predict πάνω σε τυχαίο grid (ρυθμός αφίξεων, αλγόριθμος, d) """
+    cluster = cluster or simulation.CLUSTER
+    rng = np.random.default_rng(streams.MASTER_SEED)
+    capacity = sum(cluster.service_rates)
+    configs = [(int(a), int(d) if a == 2 else 0) for a, d in zip(rng.integers(1, 5, points), rng.integers(0, 6, points))]
+    rates = rng.uniform(0.1, 0.95, points) * capacity
+    started = time.perf_counter()
+    predict(configs, rates, cluster, model)
+    return points / (time.perf_counter() - started)
+
+
+def print_validation(report):
+    print(f"\n{'Algo':<6} | {'d':<3} | {'Predicted':<10} | {'Mean-field':<10} | {'Simulated (95% CI)':<22} | "
+          f"{'Rel. Err':<9} | {'In CI':<5} | {'Max ΔU':<7}")
+    print("-" * 93)
+    for row in report['configs']:
+        predicted = ('' if row['exact'] else '~') + format(row['predicted_wait'], '.4f')
+        field = '-' if row['mean_field_wait'] is None else format(row['mean_field_wait'], '.4f')
+        if 'error' in row:
+            print(f"{row['algo']:<6} | {row['d']:<3} | {predicted:<10} | {field:<10} | error: {row['error']}")
+            continue
+        simulated = f"{row['simulated_wait']:.4f} ± {row['half_width']:.4f}"
+        unstable = math.isinf(row['predicted_wait'])
+        error = 'unstable' if unstable else format(row['relative_error'], '+.1%')
+        within = '-' if unstable else 'yes' if row['within_ci'] else 'no'
+        print(f"{row['algo']:<6} | {row['d']:<3} | {predicted:<10} | {field:<10} | {simulated:<22} | "
+              f"{error:<9} | {within:<5} | "
+              f"{row['max_utilization_error']:<7.4f}")
+    print(f"\n~ = fill-path approximation (algorithms 1, 2), otherwise exact in steady state "
+          f"(the simulated CI includes finite-horizon bias). "
+          f"Same best configuration: {'yes' if report['same_best'] else 'no'}, "
+          f"rank correlation {report['rank_correlation']:.2f}. "
+          f"Prediction time {report['predict_seconds'] * 1e3:.1f} ms.")
+
+
+def write_validation(results_dir, report):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, 'analytic_validation.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+# --- MAIN ---
+def main(argv):
+    parser = argparse.ArgumentParser(usage="python analytic.py rank [<algo:d> ...] [--arrival-rate L] [--model fill-path|mean-field] [--cluster spec.json] | python analytic.py validate <sim_time> [<algo:d> ...] [--workers N] [--engine ciw|fast] [--warmup auto|SECONDS] [--no-cache]")
+    commands = parser.add_subparsers(dest='command', required=True)
+    ranking = commands.add_parser('rank', help="κατάταξη των διαμορφώσεων με τις αναλυτικές εκτιμήσεις")
+    ranking.add_argument('policies', nargs='*', type=parse_policy)
+    ranking.add_argument('--arrival-rate', type=float)
+    ranking.add_argument('--model', choices=MODELS, default=MODEL)
+    ranking.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    checking = commands.add_parser('validate', help="σύγκριση των εκτιμήσεων με τα CIs της προσομοίωσης")
+    checking.add_argument('sim_time', type=float)
+    checking.add_argument('policies', nargs='*', type=parse_policy)
+    checking.add_argument('--workers', type=int, default=1)
+    checking.add_argument('--engine', choices=['ciw', 'fast'], default=simulation.ENGINE)
+    checking.add_argument('--seed', type=int, default=streams.MASTER_SEED)
+    checking.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    checking.add_argument('--warmup', type=simulation.warmup_arg, default='auto')
+    checking.add_argument('--no-cache', action='store_true')
+    checking.add_argument('--results-dir', default=results_store.RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    cluster = cluster_spec.load_cluster_spec(args.cluster) if args.cluster else simulation.CLUSTER
+    configs = args.policies or VALIDATION_GRID
+    if args.command == 'rank':
+        print(f"--- Analytic ranking ({cluster}, model: {args.model}) ---")
+        for (algo, d), wait in rank(configs, args.arrival_rate, cluster, args.model):
+            print(f"Algo {algo}, d={d}: predicted mean wait {wait:.4f} s")
+        if args.model == 'fill-path':
+            print(f"({throughput_benchmark(cluster=cluster):,.0f} parameter points/s)")
+        return
+    print(f"--- Analytic validation over {len(configs)} configurations (Time: {args.sim_time}, Engine: {args.engine}) ---")
+    cache = None if args.no_cache else replication_cache.ReplicationCache()
+    try:
+        report = validate(configs, args.sim_time, args.workers, args.seed, args.engine, cluster, cache, args.warmup)
+    finally:
+        if cache is not None:
+            cache.close()
+    print_validation(report)
+    if args.sim_time < VALIDATION_TIME:
+        print(f"Note: at {args.sim_time:g} s the warm-up bias can put exact rows outside the CI "
+              f"(use {VALIDATION_TIME} s or more to check them).")
+    print(f"Results written to {write_validation(args.results_dir, report)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
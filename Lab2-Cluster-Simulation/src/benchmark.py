@@ -0,0 +1,288 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import ciw
+import numpy as np
+
+import cluster_spec
+import results_store
+import simulation
+import streams
+
+# Benchmarks του simulator με JSON αποτελέσματα και έλεγχο regressions:
+#   replication: run_single_replication (χωρίς warm-up, ώστε ο ορίζοντας να είναι όλο το run)
+#                σε ένα πλέγμα μεγεθών cluster, φορτίων, οριζόντων, αλγορίθμων και μηχανών.
+#                Τα γεγονότα (αφίξεις + ολοκληρώσεις) μετριούνται από τον μετρητή του
+#                instrumentation.py σε ένα επιπλέον run, εκτός χρονομέτρησης.
+#   routing:     κόστος μίας απόφασης RoutingDecision*.route() ανά αλγόριθμο και μέγεθος
+#   statistics:  η επεξεργασία των αποτελεσμάτων (summarize_results, check_precision,
+#                results_store.write_config), χωριστά από το event loop
+# Κάθε περίπτωση τρέχει σε δικό της process (spawn), οπότε το peak RSS είναι δικό της.
+#
+# Χρήση: python benchmark.py run [--sizes 1,4] [--loads 0.5,0.9] [--horizons 3600,14400]
+#                                [--algos 1,2,3,4] [--engines ciw,fast] [--output FILE] [--baseline FILE]
+#        python benchmark.py compare <baseline.json> <current.json> [--tolerance 0.1]
+
+BENCHMARK_DIR = 'benchmarks'
+BENCHMARK_VERSION = 1
+SIZES = [1, 4]            # Πολλαπλασιαστής του πλήθους workers κάθε κλάσης του cluster
+LOADS = [0.5, 0.9]        # Μέση χρησιμοποίηση λ / Σμ
+HORIZONS = [3600, 14400]  # Προσομοιωμένα δευτερόλεπτα
+ALGORITHMS = [1, 2, 3, 4]
+ENGINES = ['ciw', 'fast']
+D = 2                     # d του αλγορίθμου 2
+REPEAT = 3                # Επαναλήψεις ανά περίπτωση (κρατιέται ο ελάχιστος χρόνος)
+ROUTING_DECISIONS = 100_000
+STATISTICS_REPLICATIONS = 50
+TOLERANCE = 0.10          # Σχετική χειροτέρευση πάνω από την οποία μια μέτρηση είναι regression
+SEED = 12345
+
+# Μετρήσεις που συγκρίνονται: όνομα -> +1 αν μεγαλύτερο είναι καλύτερο, -1 αν μικρότερο
+METRICS = {
+    'replication': {'events_per_sec': +1, 'wall_per_sim_hour': -1, 'peak_rss_mb': -1},
+    'routing': {'ns_per_decision': -1, 'peak_rss_mb': -1},
+    'statistics': {'ms_per_call': -1, 'peak_rss_mb': -1},
+}
+
+
+def scaled_cluster(size, load):
+    """ Το default cluster με size φορές τους workers κάθε κλάσης και λ = load * Σμ """
+    base = cluster_spec.default_cluster()
+    classes = [dict(wc, count=wc['count'] * size) for wc in base.worker_classes]
+    total_rate = sum(wc['count'] * wc['service_rate'] for wc in classes)
+    return cluster_spec.ClusterSpec(load * total_rate, classes)
+
+
+def peak_rss_mb():
+    """ Peak RSS του process σε MB (το ru_maxrss είναι σε KB στο Linux, σε bytes στο macOS) """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+# --- ΠΕΡΙΠΤΩΣΕΙΣ (τρέχουν στο process του ProcessPoolExecutor) ---
+def bench_replication(case, repeat):
+    """ Ελάχιστος χρόνος run_single_replication πάνω σε repeat επαναλήψεις (ίδιο seed) """
+    simulation.CLUSTER = scaled_cluster(case['size'], case['load'])
+    simulation.WARMUP_TIME = 0
+    d = D if case['algo'] == 2 else 0
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        simulation.run_single_replication(case['horizon'], case['algo'], SEED, d, case['engine'])
+        seconds.append(time.perf_counter() - start)
+    wall = min(seconds)
+    peak = peak_rss_mb()  # Πριν από το run με tracemalloc
+    events = count_events(case, d)
+    return {'wall_seconds': wall, 'events': events, 'events_per_sec': events / wall,
+            'wall_per_sim_hour': wall * 3600 / case['horizon'], 'peak_rss_mb': peak}
+
+
+def count_events(case, d):
+    """ Γεγονότα της replication από το instrumentation (το Lindley path μετριέται στη native μηχανή) """
+    simulation.INSTRUMENT = {'profile_dir': None}
+    try:
+        result = simulation.run_replication(case['horizon'], case['algo'], SEED, d, case['engine'])
+    finally:
+        simulation.INSTRUMENT = None
+    return result['instrumentation']['events']
+
+
+def bench_routing(case, repeat):
+    """ ns ανά route() του arrival node της ciw, με τυχαία φορτία στους workers """
+    simulation.CLUSTER = scaled_cluster(case['size'], LOADS[-1])
+    Q = simulation.build_simulation(0, case['algo'], SEED, D if case['algo'] == 2 else 0, warmup_time=0)
+    rng = np.random.default_rng(SEED)
+    for k, load in enumerate(rng.integers(0, 8, simulation.CLUSTER.n_workers).tolist()):
+        Q.load_index.set_load(k, load)
+    route = Q.nodes[0].route
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(ROUTING_DECISIONS):
+            route(None)
+        seconds.append(time.perf_counter() - start)
+    return {'ns_per_decision': min(seconds) / ROUTING_DECISIONS * 1e9, 'peak_rss_mb': peak_rss_mb()}
+
+
+def bench_statistics(case, repeat):
+    """ ms ανά κλήση της επεξεργασίας αποτελεσμάτων, πάνω σε STATISTICS_REPLICATIONS replications """
+    simulation.CLUSTER = scaled_cluster(case['size'], LOADS[-1])
+    results = [simulation.run_fast_replication(3600, 2, streams.replication_seed(SEED, rep), D, warmup_time=0)
+               for rep in range(1, STATISTICS_REPLICATIONS + 1)]
+    metadata = simulation.results_metadata(3600, 2, 'plain', SEED, 'fast')
+    with tempfile.TemporaryDirectory() as results_dir:
+        calls = {
+            'summarize_results': lambda: simulation.summarize_results(results),
+            # Ο κανόνας διακοπής όπως στο main: ένας έλεγχος μετά από κάθε replication
+            'check_precision': lambda: [simulation.check_precision(results[:n]) for n in range(1, len(results) + 1)],
+            'write_config': lambda: results_store.write_config(results_dir, 2, D, results,
+                                                               simulation.summarize_results(results), metadata),
+        }
+        call = calls[case['function']]
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            call()
+            seconds.append(time.perf_counter() - start)
+    return {'ms_per_call': min(seconds) * 1e3, 'peak_rss_mb': peak_rss_mb()}
+
+
+BENCHMARKS = {'replication': bench_replication, 'routing': bench_routing, 'statistics': bench_statistics}
+
+
+def run_case(case, repeat):
+    return {**case, **BENCHMARKS[case['kind']](case, repeat)}
+
+
+def case_key(case):
+    """ Ταυτότητα μιας περίπτωσης (για το ταίριασμα με το baseline) """
+    return tuple(sorted((k, v) for k, v in case.items() if k not in METRICS[case['kind']] and
+                        k not in ('wall_seconds', 'events')))
+
+
+def build_cases(sizes, loads, horizons, algorithms, engines):
+    cases = [{'kind': 'replication', 'engine': engine, 'size': size, 'load': load, 'horizon': horizon, 'algo': algo}
+             for engine, size, load, horizon, algo in itertools.product(engines, sizes, loads, horizons, algorithms)]
+    cases += [{'kind': 'routing', 'size': size, 'algo': algo} for size, algo in itertools.product(sizes, algorithms)]
+    cases += [{'kind': 'statistics', 'size': size, 'function': function}
+              for size, function in itertools.product(sizes, ['summarize_results', 'check_precision', 'write_config'])]
+    return cases
+
+
+def environment():
+    """ Εκδόσεις και μηχάνημα (ένα regression μπορεί να είναι αλλαγή περιβάλλοντος) """
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'python': platform.python_version(), 'ciw': ciw.__version__, 'numpy': np.__version__,
+            'platform': platform.platform(), 'processor': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count(), 'commit': commit, 'date': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def run_suite(cases, repeat=REPEAT):
+    """ Τρέχει κάθε περίπτωση σε καινούργιο process, μία τη φορά (οι χρόνοι δεν επηρεάζονται από άλλες) """
+    measured = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context, max_tasks_per_child=1) as pool:
+        for i, case in enumerate(cases, 1):
+            result = pool.submit(run_case, case, repeat).result()
+            measured.append(result)
+            print(f"[{i}/{len(cases)}] {format_case(result)}")
+    return {'version': BENCHMARK_VERSION, 'environment': environment(), 'repeat': repeat, 'cases': measured}
+
+
+def format_case(case):
+    if case['kind'] == 'replication':
+        return (f"{case['engine']:<4} x{case['size']:<2} rho={case['load']:<4} T={case['horizon']:<6} "
+                f"algo {case['algo']}: {case['events_per_sec']:>12,.0f} events/s, "
+                f"{case['wall_per_sim_hour']:.3f} s/sim-hour, {case['peak_rss_mb']:.0f} MB")
+    if case['kind'] == 'routing':
+        return f"route x{case['size']:<2} algo {case['algo']}: {case['ns_per_decision']:.0f} ns/decision"
+    return f"stats x{case['size']:<2} {case['function']}: {case['ms_per_call']:.2f} ms/call"
+
+
+# --- ΣΥΓΚΡΙΣΗ ---
+def compare(baseline, current, tolerance=TOLERANCE):
+    """ Λίστα (περίπτωση, μέτρηση, baseline, τρέχουσα, σχετική χειροτέρευση) με χειροτέρευση > tolerance """
+    reference = {case_key(case): case for case in baseline['cases']}
+    regressions = []
+    for case in current['cases']:
+        base = reference.get(case_key(case))
+        if base is None:
+            continue
+        for metric, direction in METRICS[case['kind']].items():
+            old, new = base[metric], case[metric]
+            if old <= 0:
+                continue
+            worse = (old - new) / old if direction > 0 else (new - old) / old
+            if worse > tolerance:
+                regressions.append((case, metric, old, new, worse))
+    return regressions
+
+
+def report(baseline, current, tolerance=TOLERANCE):
+    """ Τυπώνει τις regressions· επιστρέφει το exit code (1 αν υπάρχουν) """
+    matched = len({case_key(c) for c in baseline['cases']} & {case_key(c) for c in current['cases']})
+    regressions = compare(baseline, current, tolerance)
+    print(f"Compared {matched} cases against baseline "
+          f"({baseline['environment'].get('commit')}, {baseline['environment'].get('date')}), tolerance {tolerance:.0%}")
+    if baseline['environment'].get('ciw') != current['environment'].get('ciw'):
+        print(f"Note: ciw {baseline['environment'].get('ciw')} -> {current['environment'].get('ciw')}")
+    for case, metric, old, new, worse in regressions:
+        print(f"REGRESSION {format_case(case)}\n    {metric}: {old:.4g} -> {new:.4g} ({worse:+.1%} worse)")
+    if not regressions:
+        print("No regressions.")
+    return 1 if regressions else 0
+
+
+def load(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != BENCHMARK_VERSION:
+        raise ValueError(f"Unsupported benchmark version in {path}: {data.get('version')}")
+    return data
+
+
+def write(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    return path
+
+
+# --- MAIN ---
+def int_list(text):
+    return [int(x) for x in text.split(',')]
+
+
+def float_list(text):
+    return [float(x) for x in text.split(',')]
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(usage="python benchmark.py run [--sizes 1,4] [--loads 0.5,0.9] [--horizons 3600,14400] [--algos 1,2,3,4] [--engines ciw,fast] [--repeat N] [--output FILE] [--baseline FILE] | python benchmark.py compare <baseline.json> <current.json> [--tolerance 0.1]")
+    commands = parser.add_subparsers(dest='command', required=True)
+    run = commands.add_parser('run', help="τρέχει το πλέγμα και γράφει JSON")
+    run.add_argument('--sizes', type=int_list, default=SIZES, help="πολλαπλασιαστές του πλήθους workers")
+    run.add_argument('--loads', type=float_list, default=LOADS, help="χρησιμοποίηση λ / Σμ")
+    run.add_argument('--horizons', type=float_list, default=HORIZONS, help="προσομοιωμένα δευτερόλεπτα")
+    run.add_argument('--algos', type=int_list, default=ALGORITHMS)
+    run.add_argument('--engines', type=lambda text: text.split(','), default=ENGINES)
+    run.add_argument('--repeat', type=int, default=REPEAT)
+    run.add_argument('--output', help=f"JSON αρχείο (προεπιλογή: {BENCHMARK_DIR}/benchmark-<ημερομηνία>.json)")
+    run.add_argument('--baseline', help="σύγκριση με αυτό το JSON μετά το run")
+    run.add_argument('--tolerance', type=float, default=TOLERANCE)
+    cmp = commands.add_parser('compare', help="regressions του current ως προς το baseline")
+    cmp.add_argument('baseline')
+    cmp.add_argument('current')
+    cmp.add_argument('--tolerance', type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        return report(load(args.baseline), load(args.current), args.tolerance)
+
+    cases = build_cases(args.sizes, args.loads, args.horizons, args.algos, args.engines)
+    print(f"--- Benchmark: {len(cases)} cases, best of {args.repeat} ---")
+    data = run_suite(cases, args.repeat)
+    path = write(args.output or os.path.join(BENCHMARK_DIR, f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}.json"),
+                 data)
+    print(f"Results written to {path}")
+    if args.baseline:
+        return report(load(args.baseline), data, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,250 +1,346 @@
-import ciw
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor
+
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
+
+import cluster_spec
+import fast_engine
+import streams
+import trace_sink
+import warmup
 
 # --- ΡΥΘΜΙΣΕΙΣ ---
 SIM_REPLICATIONS = 30     # Πλήθος επαναλήψεων
 CUSTOMERS_TO_SIMULATE = 15000  # Πόσους πελάτες θα προσομοιώσουμε (όχι χρόνο, αλλά πλήθος)
 MOVING_AVG_WINDOW = 500   # Παράθυρο εξομάλυνσης (για το γράφημα)
+ALGORITHM = 2
 D_PARAMETER = 0           # Θα χρησιμοποιήσουμε το βέλτιστο σενάριο (Algo 2, d=0)
-
-# --- ΟΡΙΣΜΟΣ ΔΙΚΤΥΟΥ (Όπως πριν) ---
-def get_network_params():
-    params = {
-        'arrival_distributions': {
-            'Class 0': [
-                ciw.dists.Exponential(rate=1.0),      # Node 1: Dispatcher
-                None, None, None, None, None, None, None, None, None, None, None
-            ]
-        },
-        'service_distributions': {
-            'Class 0': [
-                ciw.dists.Deterministic(value=0.0),     
-                ciw.dists.Exponential(rate=0.08333333), # Nodes 2-6 (Slow)
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.125),      # Nodes 7-9 (Medium)
-                ciw.dists.Exponential(rate=0.125),
-                ciw.dists.Exponential(rate=0.125),
-                ciw.dists.Exponential(rate=0.25),       # Nodes 10-12 (Fast)
-                ciw.dists.Exponential(rate=0.25),
-                ciw.dists.Exponential(rate=0.25)
-            ]
-        },
-        'routing': {'Class 0': [[0.0]*12 for _ in range(12)]},
-        'number_of_servers': [1] * 12,
-        'queue_capacities': [float('inf')] * 12
-    }
-    return params
-
-class RoutingDecision2(ciw.Node):
-    def next_node(self, ind):
-        workers = [self.simulation.nodes[i] for i in range(2, 13)]
-        sorted_workers = sorted(workers, key=lambda x: x.number_of_individuals)
-        best_node = sorted_workers[0]
-        
-        best_node_idx = self.simulation.nodes.index(best_node)
-        
-        if best_node_idx >= 10: 
-            return best_node
+WORKERS = os.cpu_count() or 1
+ROW_CHUNK = 64            # Γραμμές (replications) ανά βήμα των ensemble μέσων
+# Οι πίνακες (replications x πελάτες) είναι memmaps σε αρχεία .npy, οπότε η μνήμη μένει
+# φραγμένη και για 1000 replications x 10^6 πελάτες (οι αναμονές σε float32). Κάθε
+# εκτέλεση τα γράφει σε δικό της προσωρινό κατάλογο κάτω από το ARRAY_ROOT (στον δίσκο,
+# όχι σε tmpfs), που διαγράφεται στο τέλος, ώστε ταυτόχρονες εκτελέσεις να μη συγκρούονται.
+ARRAY_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache')
+
+# --- ΟΡΙΣΜΟΣ ΔΙΚΤΥΟΥ (από το cluster spec) ---
+CLUSTER = cluster_spec.default_cluster()
+N_WORKERS = CLUSTER.n_workers
+
+# Για τα steady-state στατιστικά μετά το cutoff (που είναι πάντα πολλαπλάσιο του
+# warmup.BATCH_SIZE) κάθε replication κρατάει, στην άφιξη κάθε BATCH_SIZE-οστού πελάτη:
+#   checkpoint_time : τον χρόνο άφιξης
+#   busy_time       : τον συνολικό χρόνο απασχόλησης όλων των workers στο [0, t]
+#   completions     : τις ολοκληρωμένες εξυπηρετήσεις στο [0, t]
+
+
+class TransientObserver:
+    """ Observer της native μηχανής: αναμονή ανά πελάτη 1..customers και checkpoints
+
+    Ο πελάτης μιας εξυπηρέτησης βρίσκεται από τον χρόνο άφιξής του (οι αφίξεις είναι
+    αύξουσες). Τα checkpoints συσσωρεύονται σε πίνακες ενός στοιχείου ανά checkpoint:
+    στην άφιξη του checkpoint γράφονται οι ολοκληρωμένες εξυπηρετήσεις και ο χρόνος
+    τους, και όταν ολοκληρωθεί μια εξυπηρέτηση που ήταν σε εξέλιξη σε checkpoints,
+    προστίθεται σε αυτά το κομμάτι της πριν από το καθένα.
+    """
+
+    def __init__(self, customers):
+        self.customers = customers
+        n_checkpoints = customers // warmup.BATCH_SIZE
+        self.waits = np.zeros(customers)
+        self.arrivals = array('d', bytes(8 * customers))
+        self.checkpoint_time = array('d', bytes(8 * n_checkpoints))
+        self.busy_time = np.zeros(n_checkpoints)
+        self.completions = np.zeros(n_checkpoints)
+        self.arrived = 0
+        self.done = 0
+        self._busy = 0.0
+        self._completed = 0
+
+    def dispatch(self, date):
+        if self.arrived < self.customers:
+            self.arrivals[self.arrived] = date
+            if (self.arrived + 1) % warmup.BATCH_SIZE == 0:
+                j = self.arrived // warmup.BATCH_SIZE
+                self.checkpoint_time[j] = date
+                self.busy_time[j] = self._busy
+                self.completions[j] = self._completed
+        self.arrived += 1
+
+    def service(self, worker, arrival_date, service_start_date, service_end_date):
+        self._busy += service_end_date - service_start_date
+        self._completed += 1
+        recorded = min(self.arrived, self.customers) // warmup.BATCH_SIZE
+        t = self.checkpoint_time
+        for j in range(bisect_right(t, service_start_date, 0, recorded), bisect_left(t, service_end_date, 0, recorded)):
+            self.busy_time[j] += t[j] - service_start_date
+        i = bisect_left(self.arrivals, arrival_date, 0, min(self.arrived, self.customers))
+        if i < self.customers and self.arrivals[i] == arrival_date:
+            self.waits[i] = service_start_date - arrival_date
+            self.done += 1
+
+    def checkpoints(self):
+        return np.frombuffer(self.checkpoint_time), self.busy_time, self.completions
+
+
+def checkpoints(arrivals, starts, ends):
+    """ (checkpoint_time, busy_time, completions) στις αφίξεις των πελατών BATCH_SIZE, 2*BATCH_SIZE, ...
+
+    arrivals: αφίξεις των πελατών με τη σειρά, starts / ends: αρχές / τέλη εξυπηρετήσεων
+    (όχι απαραίτητα ίδιου πλήθους). busy(t) = Σ_{s<t} (t - s) - Σ_{e<t} (t - e).
+    """
+    t = arrivals[warmup.BATCH_SIZE - 1::warmup.BATCH_SIZE]
+    busy = np.zeros_like(t)
+    completions = np.zeros(len(t))
+    for values, sign in ((np.sort(starts), 1.0), (np.sort(ends), -1.0)):
+        before = np.searchsorted(values, t)
+        prefix = np.concatenate([[0.0], np.cumsum(values)])
+        busy += sign * (before * t - prefix[before])
+        if sign < 0:
+            completions = before.astype(float)
+    return t, busy, completions
+
+
+def run_transient_replication(rep, seed, customers, paths):
+    """ Μία replication από άδειο σύστημα· γράφει τη γραμμή rep στα memmaps του paths """
+    observer = TransientObserver(customers)
+    engine = fast_engine.ClusterEngine(CLUSTER.arrival_rate, CLUSTER.service_rates, ALGORITHM, D_PARAMETER,
+                                       seed, observer)
+    # Μέχρι να εξυπηρετηθούν όλοι οι πρώτοι `customers` πελάτες
+    while observer.done < customers:
+        engine.run_until(engine.now + max(customers - observer.arrived, 1000) / CLUSTER.arrival_rate)
+    write_row(paths, rep, observer.waits, observer.checkpoints())
+    return rep
+
+
+def write_row(paths, rep, waits, checkpoint_columns):
+    for name, row in zip(('waits', 'checkpoint_time', 'busy_time', 'completions'), (waits,) + checkpoint_columns):
+        out = np.load(paths[name], mmap_mode='r+')
+        out[rep] = row
+        out.flush()
+        del out
+
+
+# --- ΑΠΟ TRACES (simulation.py --trace DIR, βλ. trace_sink.py) ---
+def trace_customers(trace_dir):
+    """ Πόσοι πρώτοι πελάτες (1..k) του trace έχουν ξεκινήσει εξυπηρέτηση """
+    trace, _ = trace_sink.open_trace(trace_dir)
+    ids = np.sort(trace['id'][~np.isnan(trace['service_start'])])
+    gaps = np.flatnonzero(ids != np.arange(1, len(ids) + 1))
+    return int(gaps[0]) if len(gaps) else len(ids)
+
+
+def load_trace_replication(rep, trace_dir, customers, paths):
+    """ Γραμμή rep των memmaps από το trace (memmap, χωρίς ξανά προσομοίωση) """
+    trace, _ = trace_sink.open_trace(trace_dir)
+    ids = trace['id']
+    first = ids <= customers
+    order = np.argsort(ids[first])
+    waits = trace['wait'][first][order]
+    arrivals = trace['arrival'][first][order]
+    starts, ends = trace['service_start'], trace['service_end']
+    write_row(paths, rep, waits, checkpoints(arrivals, starts[~np.isnan(starts)], ends[~np.isnan(ends)]))
+    return rep
+
+
+def allocate_arrays(directory, replications, customers):
+    """ Προδεσμευμένα .npy memmaps (replications x πελάτες και replications x checkpoints) στο directory """
+    shapes = {'waits': ((replications, customers), np.float32)}
+    for name in ('checkpoint_time', 'busy_time', 'completions'):
+        shapes[name] = ((replications, customers // warmup.BATCH_SIZE), np.float64)
+    paths = {}
+    for name, (shape, dtype) in shapes.items():
+        paths[name] = os.path.join(directory, name + '.npy')
+        np.lib.format.open_memmap(paths[name], mode='w+', dtype=dtype, shape=shape).flush()
+    return paths
+
+
+def ensemble_mean(path):
+    """ Μέσος όρος ανά στήλη ενός memmap (ROW_CHUNK γραμμές τη φορά, σε float64) """
+    data = np.load(path, mmap_mode='r')
+    total = np.zeros(data.shape[1])
+    for lo in range(0, data.shape[0], ROW_CHUNK):
+        total += data[lo:lo + ROW_CHUNK].sum(axis=0, dtype=np.float64)
+    return total / data.shape[0]
+
+
+def moving_average(values, window):
+    """ Κυλιόμενος μέσος με min_periods=1 (όπως το pandas rolling), με cumsum """
+    cs = np.concatenate([[0.0], np.cumsum(values)])
+    idx = np.arange(1, len(values) + 1)
+    lo = np.maximum(idx - window, 0)
+    return (cs[idx] - cs[lo]) / (idx - lo)
+
+
+def steady_state_stats(paths, cutoff_customer, customers):
+    """ Αναμονή, throughput και χρησιμοποίηση μετά τον cutoff_customer (διαγραφή αρχικών) """
+    waits = np.load(paths['waits'], mmap_mode='r')
+    wait_sum = 0.0
+    for lo in range(0, waits.shape[0], ROW_CHUNK):
+        wait_sum += waits[lo:lo + ROW_CHUNK, cutoff_customer:].sum(dtype=np.float64)
+    final_wait = wait_sum / (waits.shape[0] * (customers - cutoff_customer))
+
+    t = np.load(paths['checkpoint_time'], mmap_mode='r')
+    busy = np.load(paths['busy_time'], mmap_mode='r')
+    completions = np.load(paths['completions'], mmap_mode='r')
+    # Παράθυρο: από την άφιξη του cutoff_customer ως την άφιξη του τελευταίου πελάτη
+    j = cutoff_customer // warmup.BATCH_SIZE - 1
+    start = t[:, j] if j >= 0 else 0.0
+    busy_start = busy[:, j] if j >= 0 else 0.0
+    done_start = completions[:, j] if j >= 0 else 0.0
+    duration = np.sum(t[:, -1] - start)
+    # Διελεύσεις από τον dispatcher + ολοκληρωμένες εξυπηρετήσεις (όπως στο simulation.py)
+    dispatched = waits.shape[0] * (customers - cutoff_customer)
+    final_throughput = (dispatched + np.sum(completions[:, -1] - done_start)) / duration
+    total_util = np.sum(busy[:, -1] - busy_start) / duration / N_WORKERS
+    return final_wait, final_throughput, total_util
+
+
+def plot_transient(ids, mean_waits, smooth_waits, cutoff_customer):
+    plt.rcParams.update({
+        'font.family': 'sans-serif',
+        'font.size': 11,
+        'axes.labelsize': 12,
+        'axes.titlesize': 14,
+        'axes.titleweight': 'bold',
+        'axes.grid': True,
+        'grid.alpha': 0.3,
+        'grid.linestyle': '--',
+        'axes.spines.top': False,
+        'axes.spines.right': False,
+    })
+
+    # Χρώματα
+    COLOR_RAW = '#95A5A6'
+    COLOR_SMOOTH = '#2980B9'
+    COLOR_CUTOFF = '#E74C3C'
+    COLOR_TRANSIENT = '#E74C3C'
+    COLOR_STEADY = '#27AE60'
+
+    fig, ax = plt.subplots(figsize=(12, 7), dpi=300)
+
+    # 1. Raw Data
+    ax.plot(ids, mean_waits, color=COLOR_RAW, alpha=0.3, linewidth=0.8, label='Raw Data (Ensemble)', zorder=1)
+
+    # 2. Moving Average
+    ax.plot(ids, smooth_waits, color=COLOR_SMOOTH, linewidth=2.5, label=f'Moving Average (w={MOVING_AVG_WINDOW})', zorder=5)
+
+    # 3. Cutoff Line
+    ax.axvline(x=cutoff_customer, color=COLOR_CUTOFF, linestyle='--', linewidth=2, zorder=6)
+
+    # 4. Ζώνες (Shaded Regions)
+    raw_max_98 = np.percentile(mean_waits, 98)
+    smooth_max = smooth_waits.max()
+    y_limit = max(raw_max_98, smooth_max) * 1.2
+
+    ax.axvspan(0, cutoff_customer, color=COLOR_TRANSIENT, alpha=0.08, zorder=0)
+    ax.axvspan(cutoff_customer, ids[-1], color=COLOR_STEADY, alpha=0.08, zorder=0)
+
+    # 5. Annotations
+    # Cutoff Label
+    ax.annotate(f'Cutoff Point\n(n={cutoff_customer})',
+                xy=(cutoff_customer, smooth_waits[cutoff_customer]),
+                xytext=(cutoff_customer + 2000, smooth_waits[cutoff_customer] + (y_limit * 0.1)),
+                arrowprops=dict(facecolor='black', arrowstyle='->', shrinkB=5),
+                fontweight='bold', ha='left', zorder=10)
+
+    # Zone Labels
+    ax.text(cutoff_customer/2, y_limit * 1.95, 'TRANSIENT PHASE\n(Unstable)',
+            ha='center', va='top', color=COLOR_CUTOFF, fontweight='bold', fontsize=10, alpha=0.7)
+
+    center_steady = cutoff_customer + (ids[-1] - cutoff_customer)/2
+    ax.text(center_steady, y_limit * 1.95, 'STEADY STATE\n(Balanced)',
+            ha='center', va='top', color=COLOR_STEADY, fontweight='bold', fontsize=10, alpha=0.7)
+
+    # Τίτλοι και Όρια
+    ax.set_title('Bonus Analysis: Determination of Warm-up Period')
+    ax.set_xlabel('Customer ID (Arrival Sequence)')
+    ax.set_ylabel('Mean Waiting Time (sec)')
+    ax.set_xlim(0, ids[-1])
+
+    ax.legend(loc='upper right', frameon=True, framealpha=0.9)
+
+    plt.tight_layout()
+    plt.savefig('bonus_analysis_plot.png')
+    print("Γράφημα αποθηκεύτηκε: bonus_analysis_plot.png")
+
+
+def main():
+    # python bonus_analysis.py [replications customers]  ή  python bonus_analysis.py --traces DIR
+    replications, customers = SIM_REPLICATIONS, CUSTOMERS_TO_SIMULATE
+    trace_dirs = None
+    if len(sys.argv) > 2 and sys.argv[1] == '--traces':
+        trace_dirs = sorted(os.path.join(sys.argv[2], name) for name in os.listdir(sys.argv[2])
+                            if os.path.exists(os.path.join(sys.argv[2], name, 'meta.json')))
+        replications = len(trace_dirs)
+        customers = min(trace_customers(path) for path in trace_dirs)
+    elif len(sys.argv) > 2:
+        replications, customers = int(sys.argv[1]), int(sys.argv[2])
+    customers -= customers % warmup.BATCH_SIZE  # Ολόκληρα batches για το MSER-5
+
+    # --- ΕΚΤΕΛΕΣΗ ΠΕΙΡΑΜΑΤΟΣ ---
+    print(f"--- Running Transient Analysis (Bonus) ---")
+    print(f"Algorithm {ALGORITHM} (d={D_PARAMETER}), Replications: {replications}, Customers: {customers}, "
+          f"Workers: {WORKERS}")
+
+    # Κάθε worker γράφει τη γραμμή της replication του στα κοινά memmaps (ενός καταλόγου ανά εκτέλεση)
+    os.makedirs(ARRAY_ROOT, exist_ok=True)
+    array_dir = tempfile.mkdtemp(prefix='transient-', dir=ARRAY_ROOT)
+    try:
+        paths = allocate_arrays(array_dir, replications, customers)
+        if trace_dirs is None:
+            task = run_transient_replication
+            sources = [streams.replication_seed(streams.MASTER_SEED, rep + 1) for rep in range(replications)]
+        else:
+            task = load_trace_replication
+            sources = trace_dirs
+        args = ([rep for rep in range(replications)], sources, [customers] * replications, [paths] * replications)
+        if WORKERS > 1:
+            with ProcessPoolExecutor(max_workers=WORKERS) as pool:
+                for done, _ in enumerate(pool.map(task, *args), start=1):
+                    print(f"Running replication {done}/{replications}...", end='\r')
         else:
-            for node in sorted_workers:
-                idx = self.simulation.nodes.index(node)
-                if idx >= 10: 
-                    if node.number_of_individuals <= best_node.number_of_individuals + D_PARAMETER:
-                        return node
-                    else:
-                        break 
-            return best_node
-
-# --- ΕΚΤΕΛΕΣΗ ΠΕΙΡΑΜΑΤΟΣ ---
-print(f"--- Running Transient Analysis (Bonus) ---")
-print(f"Algorithm 2 (d=0), Replications: {SIM_REPLICATIONS}, Customers: {CUSTOMERS_TO_SIMULATE}")
-
-# Λεξικό για να μαζέψουμε τους χρόνους αναμονής ανά Customer ID
-# customer_waits[1] = [wait_rep1, wait_rep2, ...]
-customer_waits = {i: [] for i in range(1, CUSTOMERS_TO_SIMULATE + 1)}
-
-# Λίστα για να κρατήσουμε όλα τα records για τον τελικό υπολογισμό
-all_records_combined = []
-
-for rep in range(SIM_REPLICATIONS):
-    print(f"Running replication {rep+1}/{SIM_REPLICATIONS}...", end='\r')
-    ciw.seed(rep)
-    
-    N = ciw.create_network(**get_network_params())
-    Q = ciw.Simulation(N, node_class=[RoutingDecision2] + [ciw.Node]*11)
-    
-    # Τρέχουμε μέχρι να εξυπηρετηθεί ο συγκεκριμένος αριθμός πελατών
-    # Χρησιμοποιούμε simulate_until_max_customers (είναι πιο κατάλληλο εδώ)
-    Q.simulate_until_max_customers(CUSTOMERS_TO_SIMULATE, method='Finish')
-    
-    recs = Q.get_all_records()
-    all_records_combined.append(recs)
-    
-    for r in recs:
-        if r.node > 1 and r.id_number <= CUSTOMERS_TO_SIMULATE:
-            customer_waits[r.id_number].append(r.waiting_time)
-
-print("\nProcessing data...")
-
-# Υπολογισμός Μέσου Όρου ανά ID
-ids = sorted(customer_waits.keys())
-mean_waits = [np.mean(customer_waits[i]) if customer_waits[i] else 0 for i in ids]
-
-# Εφαρμογή Κυλιόμενου Μέσου για εξομάλυνση
-series = pd.Series(mean_waits)
-smooth_waits = series.rolling(window=MOVING_AVG_WINDOW, min_periods=1).mean()
-
-# --- ΕΥΡΕΣΗ ΣΗΜΕΙΟΥ ΤΟΜΗΣ  ---
-# Θεωρούμε ότι σταθεροποιείται όταν η αλλαγή στον κυλιόμενο μέσο είναι πολύ μικρή
-# Θα χρησιμοποιήσουμε μια ασφαλή τιμή βάσει της καμπύλης ή έναν αλγόριθμο.
-# Αλγόριθμος: Όταν το σχετικό σφάλμα του moving average σε σχέση με τον τελικό μέσο είναι < 10%
-final_avg = smooth_waits.iloc[-1]
-cutoff_customer = 0
-
-for i in range(MOVING_AVG_WINDOW, len(smooth_waits)):
-    val = smooth_waits.iloc[i]
-    if abs(val - final_avg) / final_avg < 0.05: # 5% tolerance
-        cutoff_customer = i
-        break
-
-if cutoff_customer == 0: cutoff_customer = 2000 # Fallback
-
-print(f"\n--- ΑΠΟΤΕΛΕΣΜΑΤΑ BONUS ---")
-print(f"Εντοπίστηκε σταθεροποίηση μετά τον πελάτη: {cutoff_customer}")
-print(f"(Αυτό είναι το μήκος της μεταβατικής κατάστασης σε πλήθος πελατών)")
-
-# --- ΓΡΑΦΗΜΑ ---
-plt.rcParams.update({
-    'font.family': 'sans-serif',
-    'font.size': 11,
-    'axes.labelsize': 12,
-    'axes.titlesize': 14,
-    'axes.titleweight': 'bold',
-    'axes.grid': True,
-    'grid.alpha': 0.3,
-    'grid.linestyle': '--',
-    'axes.spines.top': False,
-    'axes.spines.right': False,
-})
-
-# Χρώματα
-COLOR_RAW = '#95A5A6'     
-COLOR_SMOOTH = '#2980B9'  
-COLOR_CUTOFF = '#E74C3C'  
-COLOR_TRANSIENT = '#E74C3C' 
-COLOR_STEADY = '#27AE60'    
-
-fig, ax = plt.subplots(figsize=(12, 7), dpi=300)
-
-# 1. Raw Data 
-ax.plot(ids, mean_waits, color=COLOR_RAW, alpha=0.3, linewidth=0.8, label='Raw Data (Ensemble)', zorder=1)
-
-# 2. Moving Average
-ax.plot(ids, smooth_waits, color=COLOR_SMOOTH, linewidth=2.5, label=f'Moving Average (w={MOVING_AVG_WINDOW})', zorder=5)
-
-# 3. Cutoff Line
-ax.axvline(x=cutoff_customer, color=COLOR_CUTOFF, linestyle='--', linewidth=2, zorder=6)
-
-# 4. Ζώνες (Shaded Regions)
-raw_max_98 = np.percentile(mean_waits, 98)
-smooth_max = max(smooth_waits)
-y_limit = max(raw_max_98, smooth_max) * 1.2
-
-ax.axvspan(0, cutoff_customer, color=COLOR_TRANSIENT, alpha=0.08, zorder=0)
-ax.axvspan(cutoff_customer, max(ids), color=COLOR_STEADY, alpha=0.08, zorder=0)
-
-# 5. Annotations
-# Cutoff Label
-ax.annotate(f'Cutoff Point\n(n={cutoff_customer})', 
-            xy=(cutoff_customer, smooth_waits.iloc[cutoff_customer]), 
-            xytext=(cutoff_customer + 2000, smooth_waits.iloc[cutoff_customer] + (y_limit * 0.1)),
-            arrowprops=dict(facecolor='black', arrowstyle='->', shrinkB=5),
-            fontweight='bold', ha='left', zorder=10)
-
-# Zone Labels
-ax.text(cutoff_customer/2, y_limit * 1.95, 'TRANSIENT PHASE\n(Unstable)', 
-        ha='center', va='top', color=COLOR_CUTOFF, fontweight='bold', fontsize=10, alpha=0.7)
-
-center_steady = cutoff_customer + (max(ids) - cutoff_customer)/2
-ax.text(center_steady, y_limit * 1.95, 'STEADY STATE\n(Balanced)', 
-        ha='center', va='top', color=COLOR_STEADY, fontweight='bold', fontsize=10, alpha=0.7)
-
-# Τίτλοι και Όρια
-ax.set_title('Bonus Analysis: Determination of Warm-up Period')
-ax.set_xlabel('Customer ID (Arrival Sequence)')
-ax.set_ylabel('Mean Waiting Time (sec)')
-ax.set_xlim(0, max(ids))
-
-ax.legend(loc='upper right', frameon=True, framealpha=0.9)
-
-plt.tight_layout()
-plt.savefig('bonus_analysis_plot.png')
-print("Γράφημα αποθηκεύτηκε: bonus_analysis_plot.png")
-
-# --- ΥΠΟΛΟΓΙΣΜΟΣ ΤΕΛΙΚΩΝ ΣΤΑΤΙΣΤΙΚΩΝ ΜΕ ΔΙΑΓΡΑΦΗ ---
-# Τώρα υπολογίζουμε τα metrics χρησιμοποιώντας τα δεδομένα ΜΕΤΑ το cutoff
-print("\nRecalculating statistics excluding initial data...")
-
-valid_waits = []
-node_busy_time = {i: 0.0 for i in range(2, 13)}
-total_sim_time_sum = 0
-completed_jobs_sum = 0
-
-for recs in all_records_combined:
-    # Βρίσκουμε τον χρόνο άφιξης του πελάτη 'cutoff_customer' για να κόψουμε βάσει χρόνου σε κάθε run
-    # ή απλά κόβουμε βάσει ID. Η εκφώνηση λέει "διαγραφή αρχικών αποτελεσμάτων".
-    # Συνήθως κόβουμε τα records με id <= cutoff
-    
-    filtered_recs = [r for r in recs if r.id_number > cutoff_customer]
-    
-    if not filtered_recs: continue
-    
-    # Wait Time
-    for r in filtered_recs:
-        if r.node > 1:
-            valid_waits.append(r.waiting_time)
-            
-    # Throughput & Utilization
-    # Πρέπει να βρούμε το χρονικό παράθυρο.
-    # Start: Άφιξη του cutoff_customer. End: Τέλος προσομοίωσης.
-    
-    # Βρες το record του cutoff customer για να δεις πότε μπήκε
-    cutoff_rec = next((r for r in recs if r.id_number == cutoff_customer), None)
-    if cutoff_rec:
-        start_time = cutoff_rec.arrival_date
-    else:
-        start_time = 0
-        
-    end_time = max(r.service_end_date for r in recs)
-    duration = end_time - start_time
-    
-    if duration <= 0: continue
-    
-    total_sim_time_sum += duration
-    completed_jobs_sum += len([r for r in filtered_recs if r.service_end_date > start_time])
-    
-    # Util per node
-    for r in filtered_recs:
-        if r.node == 1: continue
-        # Επικάλυψη με το παράθυρο [start_time, end_time]
-        eff_start = max(r.service_start_date, start_time)
-        eff_end = min(r.service_end_date, end_time)
-        if eff_end > eff_start:
-            node_busy_time[r.node] += (eff_end - eff_start)
-
-# Final Stats
-final_wait = sum(valid_waits) / len(valid_waits)
-final_throughput = completed_jobs_sum / total_sim_time_sum
-node_utils = {i: (node_busy_time[i] / total_sim_time_sum) for i in range(2, 13)}
-total_util = sum(node_utils.values()) / 11
-
-print(f"\n--- ΤΕΛΙΚΑ ΣΤΑΤΙΣΤΙΚΑ (STEADY STATE) ---")
-print(f"Μέσος Χρόνος Αναμονής: {final_wait:.6f} sec")
-print(f"Throughput: {final_throughput:.6f} jobs/sec")
-print(f"Μέση Συνολική Χρησιμοποίηση: {total_util:.4f}")
-print("Done.")
\ No newline at end of file
+            for done, _ in enumerate(map(task, *args), start=1):
+                print(f"Running replication {done}/{replications}...", end='\r')
+
+        print("\nProcessing data...")
+
+        # Μέσος όρος ανά πελάτη (ensemble) και κυλιόμενος μέσος για εξομάλυνση
+        mean_waits = ensemble_mean(paths['waits'])
+        smooth_waits = moving_average(mean_waits, MOVING_AVG_WINDOW)
+        ids = np.arange(1, customers + 1)
+
+        # --- ΕΥΡΕΣΗ ΣΗΜΕΙΟΥ ΤΟΜΗΣ (MSER-5) ---
+        # Ίδιος κανόνας με το simulation.py (--warmup auto): MSER πάνω στα batch means των 5
+        # πελατών της μέσης (ensemble) καμπύλης αναμονής.
+        batch_means = mean_waits.reshape(-1, warmup.BATCH_SIZE).mean(axis=1)
+        cutoff_customer = warmup.mser(batch_means) * warmup.BATCH_SIZE
+
+        print(f"\n--- ΑΠΟΤΕΛΕΣΜΑΤΑ BONUS ---")
+        print(f"Εντοπίστηκε σταθεροποίηση μετά τον πελάτη: {cutoff_customer}")
+        print(f"(Αυτό είναι το μήκος της μεταβατικής κατάστασης σε πλήθος πελατών)")
+
+        plot_transient(ids, mean_waits, smooth_waits, cutoff_customer)
+
+        # --- ΥΠΟΛΟΓΙΣΜΟΣ ΤΕΛΙΚΩΝ ΣΤΑΤΙΣΤΙΚΩΝ ΜΕ ΔΙΑΓΡΑΦΗ ---
+        # Τώρα υπολογίζουμε τα metrics χρησιμοποιώντας τα δεδομένα ΜΕΤΑ το cutoff
+        print("\nRecalculating statistics excluding initial data...")
+        final_wait, final_throughput, total_util = steady_state_stats(paths, cutoff_customer, customers)
+
+        print(f"\n--- ΤΕΛΙΚΑ ΣΤΑΤΙΣΤΙΚΑ (STEADY STATE) ---")
+        print(f"Μέσος Χρόνος Αναμονής: {final_wait:.6f} sec")
+        print(f"Throughput: {final_throughput:.6f} jobs/sec")
+        print(f"Μέση Συνολική Χρησιμοποίηση: {total_util:.4f}")
+        print("Done.")
+    finally:
+        shutil.rmtree(array_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import json
+
+# Περιγραφή του cluster: ρυθμός αφίξεων + κλάσεις workers (πλήθος, ρυθμός εξυπηρέτησης).
+# Από αυτήν παράγονται το δίκτυο της ciw, η native μηχανή, η δρομολόγηση και τα στατιστικά.
+# Μορφή αρχείου (JSON):
+#   {"arrival_rate": 1.0,
+#    "worker_classes": [{"name": "Slow", "count": 5, "service_rate": 0.08333333}, ...]}
+
+DEFAULT_CLUSTER = {
+    'arrival_rate': 1.0,
+    'worker_classes': [
+        {'name': 'Slow', 'count': 5, 'service_rate': 0.08333333},    # Nodes 2-6 (1/12)
+        {'name': 'Medium', 'count': 3, 'service_rate': 0.125},       # Nodes 7-9 (1/8)
+        {'name': 'Fast', 'count': 3, 'service_rate': 0.25},          # Nodes 10-12 (1/4)
+    ],
+}
+
+
+class ClusterSpec:
+    """ Ρυθμός αφίξεων και κλάσεις workers, με τους workers στη σειρά των κλάσεων """
+
+    def __init__(self, arrival_rate, worker_classes):
+        if arrival_rate <= 0:
+            raise ValueError("arrival_rate must be positive")
+        if not worker_classes:
+            raise ValueError("At least one worker class is required")
+        self.arrival_rate = float(arrival_rate)
+        self.worker_classes = []
+        for wc in worker_classes:
+            if wc['count'] < 1 or wc['service_rate'] <= 0:
+                raise ValueError(f"Invalid worker class: {wc}")
+            self.worker_classes.append({'name': wc['name'], 'count': int(wc['count']),
+                                        'service_rate': float(wc['service_rate'])})
+
+        self.service_rates = []
+        self.worker_class = []
+        for c, wc in enumerate(self.worker_classes):
+            self.service_rates += [wc['service_rate']] * wc['count']
+            self.worker_class += [c] * wc['count']
+        self.n_workers = len(self.service_rates)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['arrival_rate'], data['worker_classes'])
+
+    def to_dict(self):
+        return {'arrival_rate': self.arrival_rate,
+                'worker_classes': [dict(wc) for wc in self.worker_classes]}
+
+    def class_name(self, worker):
+        return self.worker_classes[self.worker_class[worker]]['name']
+
+    @property
+    def offered_load(self):
+        """ λ / Σμ (μέση χρησιμοποίηση του cluster) """
+        return self.arrival_rate / sum(self.service_rates)
+
+    def __repr__(self):
+        classes = ", ".join(f"{wc['count']}x{wc['name']}@{wc['service_rate']:g}"
+                            for wc in self.worker_classes)
+        return f"ClusterSpec(arrival_rate={self.arrival_rate:g}, {classes})"
+
+
+def speed_rates(service_rates):
+    """ Διακριτοί ρυθμοί εξυπηρέτησης κατά φθίνουσα σειρά: κλάση ταχύτητας c = ο c-οστός ταχύτερος """
+    return sorted(set(service_rates), reverse=True)
+
+
+def speed_classes(service_rates):
+    """ Κλάση ταχύτητας κάθε worker (0 = οι ταχύτεροι), ίδια σε δρομολόγηση, μοντέλα και στατιστικά """
+    rates = speed_rates(service_rates)
+    return [rates.index(rate) for rate in service_rates]
+
+
+def default_cluster():
+    """ Το cluster των 11 workers της εκφώνησης """
+    return ClusterSpec.from_dict(DEFAULT_CLUSTER)
+
+
+def load_cluster_spec(path):
+    """ Φόρτωση ClusterSpec από αρχείο JSON """
+    with open(path, 'r', encoding='utf-8') as f:
+        return ClusterSpec.from_dict(json.load(f))
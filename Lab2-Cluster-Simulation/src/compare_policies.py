@@ -0,0 +1,143 @@
+import os
+import sys
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import cluster_spec
+import confidence
+import lindley
+import replay
+import simulation
+import streams
+
+# Σύγκριση πολιτικών με common random numbers: κάθε replication τρέχει όλες τις
+# πολιτικές με το ίδιο seed (ίδιες αφίξεις, ίδιοι χρόνοι εξυπηρέτησης ανά worker),
+# και το CI υπολογίζεται πάνω στις διαφορές ανά replication ως προς την πρώτη
+# πολιτική (paired-difference). Η θετική συσχέτιση των ζευγών στενεύει το CI της
+# διαφοράς σε σχέση με δύο ανεξάρτητες εκτιμήσεις.
+#
+# Με --replay DIR όλες οι πολιτικές βλέπουν την ίδια παραλλαγή του καταγεγραμμένου trace
+# ανά replication (βλ. replay.py), οπότε η σύγκριση γίνεται πάνω σε πραγματική κίνηση.
+#
+# Χρήση: python compare_policies.py <sim_time> <algo:d> <algo:d> ... [--engine ciw|fast|lindley]
+
+def parse_policy(text):
+    """ "2:3" -> (2, 3), "1" -> (1, 0) """
+    algo, _, d = text.partition(':')
+    return int(algo), int(d or 0)
+
+def run_policy(sim_duration, policy, seed, engine):
+    """ Μία replication της πολιτικής (algo, d) με τη δοσμένη μηχανή γεγονότων """
+    algo, d = policy
+    if engine == 'lindley':
+        return simulation.run_lindley_replications(sim_duration, algo, [seed])[0]
+    if engine == 'fast':
+        # Χωρίς μετάβαση στο Lindley path: όλες οι πολιτικές πρέπει να τραβάνε από
+        # τα ίδια streams με τον ίδιο τρόπο για να ισχύουν τα CRN
+        return simulation.run_fast_replication(sim_duration, algo, seed, d)
+    return simulation.run_replication(sim_duration, algo, seed, d, engine='ciw')
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(usage="python compare_policies.py <sim_time> <algo:d> <algo:d> ... [--engine ciw|fast|lindley] [--workers N] [--seed S] [--cluster spec.json] [--replay DIR] [--replay-mode shift|bootstrap|exact]")
+    parser.add_argument('sim_time', type=float)
+    parser.add_argument('policies', nargs='+', type=parse_policy, help="algo:d (η πρώτη είναι η πολιτική αναφοράς)")
+    parser.add_argument('--engine', choices=['ciw', 'fast', 'lindley'], default='fast')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=streams.MASTER_SEED)
+    parser.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    parser.add_argument('--replay', metavar='DIR', help="replay trace αντί για εκθετικές αφίξεις (βλ. replay.py)")
+    parser.add_argument('--replay-mode', choices=replay.MODES, default='shift')
+    args = parser.parse_args(argv)
+    if len(args.policies) < 2:
+        parser.error("at least two policies are required")
+    if args.engine == 'lindley' and any(algo not in lindley.STATE_INDEPENDENT for algo, _ in args.policies):
+        parser.error("--engine lindley only supports algorithms 3 and 4")
+    if args.replay and args.engine == 'lindley':
+        parser.error("--replay runs on the native engine (--engine fast)")
+    return args
+
+def main():
+    args = parse_args(sys.argv[1:])
+    policies = args.policies
+    if args.cluster:
+        simulation.CLUSTER = cluster_spec.load_cluster_spec(args.cluster)
+    if args.replay:
+        simulation.REPLAY = {'path': os.path.abspath(args.replay), 'mode': args.replay_mode}
+    cluster = simulation.CLUSTER
+
+    print(f"--- Comparing {len(policies)} policies with CRN (Time: {args.sim_time}, Engine: {args.engine}) ---")
+    print(f"Cluster: {cluster}")
+
+    waits = {policy: [] for policy in policies}
+    min_reps = 10
+    max_reps = 50
+    exact = simulation.exact_replay()
+    if exact:
+        # Χωρίς τυχαιότητα όλες οι replications είναι ίδιες: μία, και οι διαφορές χωρίς CI
+        min_reps = max_reps = 1
+        print("Exact replay: a single replication, differences without CI")
+
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=simulation.init_worker,
+                                   initargs=(args.engine, cluster.to_dict(), simulation.REPLAY))
+
+    reference = policies[0]
+    replications = 0
+    precision_met = False
+    while replications < max_reps and not precision_met:
+        first = replications + 1
+        last = min(replications + max(args.workers, 1), max_reps)
+        seeds = [streams.replication_seed(args.seed, rep) for rep in range(first, last + 1)]
+        tasks = [(policy, seed) for seed in seeds for policy in policies]
+        if pool is None:
+            results = [run_policy(args.sim_time, policy, seed, args.engine) for policy, seed in tasks]
+        else:
+            n = len(tasks)
+            results = list(pool.map(run_policy, [args.sim_time] * n, [p for p, _ in tasks],
+                                    [s for _, s in tasks], [args.engine] * n))
+
+        # Ο κανόνας διακοπής ελέγχεται ανά replication με τη σειρά (όπως στο simulation.py)
+        for i in range(len(seeds)):
+            replications += 1
+            for j, policy in enumerate(policies):
+                waits[policy].append(results[i * len(policies) + j]['mean_wait'])
+            if replications < min_reps:
+                continue
+            # Ακρίβεια: half-width κάθε διαφοράς σε σχέση με τη μεγαλύτερη από τις δύο
+            # μέσες αναμονές (η διαφορά μπορεί να είναι ~0, οπότε όχι ως προς την ίδια)
+            ref_mean, _ = confidence.mean_ci(waits[reference])
+            rel_error = 0.0
+            for policy in policies[1:]:
+                _, hw = confidence.paired_difference_ci(waits[policy], waits[reference])
+                scale = max(ref_mean, confidence.mean_ci(waits[policy])[0])
+                rel_error = max(rel_error, confidence.relative_error(scale, hw))
+            print(f"Rep {replications}: Max Rel Error of differences = {rel_error:.4f}")
+            if rel_error <= simulation.DESIRED_REL_ERROR:
+                print("--> Precision Met!")
+                precision_met = True
+                break
+
+    if pool is not None:
+        pool.shutdown()
+
+    print(f"\nReplications: {replications} (reference: algo {reference[0]}, d={reference[1]})")
+    print(f"{'Policy':<12} | {'Mean Wait':<10} | {'Diff vs ref':<12} | {'CRN HW':<10} | {'Indep. HW':<10}")
+    print("-" * 66)
+    for policy in policies:
+        mean, _ = confidence.mean_ci(waits[policy])
+        label = f"algo {policy[0]}, d={policy[1]}"
+        if policy == reference:
+            print(f"{label:<12} | {mean:<10.4f} | {'-':<12} | {'-':<10} | {'-':<10}")
+            continue
+        diff, hw = confidence.paired_difference_ci(waits[policy], waits[reference])
+        if exact:
+            print(f"{label:<12} | {mean:<10.4f} | {diff:<+12.4f} | {'n/a':<10} | {'n/a':<10}")
+            continue
+        # Half-width που θα έδιναν δύο ανεξάρτητες σειρές replications (για σύγκριση)
+        _, hw_a = confidence.mean_ci(waits[policy])
+        _, hw_b = confidence.mean_ci(waits[reference])
+        print(f"{label:<12} | {mean:<10.4f} | {diff:<+12.4f} | {hw:<10.4f} | {(hw_a**2 + hw_b**2) ** 0.5:<10.4f}")
+
+if __name__ == "__main__":
+    main()
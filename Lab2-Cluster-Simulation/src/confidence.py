@@ -0,0 +1,94 @@
+import math
+
+import numpy as np
+
+# Διαστήματα εμπιστοσύνης 95% πάνω στα αποτελέσματα των replications.
+# Κάθε εκτιμητής επιστρέφει (εκτίμηση, half-width).
+
+# Πίνακας t-distribution (από Παράρτημα 1 εκφώνησης, στήλη two-tails 0.05)
+T_TABLE = {
+    1: 12.71, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571,
+    6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
+    16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
+    21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
+    26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
+    40: 2.021, 60: 2.000, 80: 1.990, 100: 1.984, 1000: 1.962
+}
+
+def get_t_value(df):
+    if df in T_TABLE: return T_TABLE[df]
+    keys = sorted(T_TABLE.keys())
+    for k in reversed(keys):
+        if df >= k: return T_TABLE[k]
+    return 1.96
+
+def relative_error(mean, hw):
+    return (hw / abs(mean)) if mean != 0 else 1.0
+
+def mean_ci(values):
+    """ Κλασικό CI: x̄ ± t_{n-1} S / sqrt(n) """
+    n = len(values)
+    mean = sum(values) / n
+    if n < 2:
+        return mean, 0.0
+    variance = sum((x - mean)**2 for x in values) / (n - 1)
+    return mean, get_t_value(n - 1) * math.sqrt(variance / n)
+
+def antithetic_ci(values):
+    """ Antithetic variates: οι replications 2i, 2i+1 είναι ζεύγος (U, 1-U), CI πάνω στους μέσους των ζευγών """
+    pairs = [(values[i] + values[i + 1]) / 2 for i in range(0, len(values) - 1, 2)]
+    return mean_ci(pairs)
+
+def control_variate_ci(values, controls, expected=1.0):
+    """ Control variates με γνωστή μέση τιμή `expected` (εκτίμηση β με ελάχιστα τετράγωνα)
+
+    Y_cv = Ȳ - β·(C̄ - expected), με half-width από το υπόλοιπο της παλινδρόμησης
+    (df = n - q - 1 για q controls).
+    """
+    y = np.asarray(values, dtype=float)
+    c = np.asarray(controls, dtype=float).reshape(len(y), -1)
+    n, q = c.shape
+    if n <= q + 1:
+        return mean_ci(values)
+    c_bar = c.mean(axis=0)
+    xc = c - c_bar
+    sxx = xc.T @ xc
+    if np.linalg.matrix_rank(sxx) < q:
+        return mean_ci(values)
+    beta = np.linalg.solve(sxx, xc.T @ (y - y.mean()))
+    mean = y.mean() - (c_bar - expected) @ beta
+    residuals = (y - y.mean()) - xc @ beta
+    s2 = residuals @ residuals / (n - q - 1)
+    shift = c_bar - expected
+    variance = s2 * (1.0 / n + shift @ np.linalg.solve(sxx, shift))
+    return float(mean), get_t_value(n - q - 1) * math.sqrt(max(variance, 0.0))
+
+def paired_difference_ci(a, b):
+    """ CI της διαφοράς a - b όταν a[i], b[i] μοιράζονται τους ίδιους τυχαίους αριθμούς (CRN) """
+    return mean_ci([x - y for x, y in zip(a, b)])
+
+# Εκτιμητές του μέσου χρόνου αναμονής πάνω σε λίστα αποτελεσμάτων (dicts του run_replication)
+def estimate(estimator, results):
+    waits = [r['mean_wait'] for r in results]
+    if estimator == 'antithetic':
+        return antithetic_ci(waits)
+    if estimator == 'control':
+        return control_variate_ci(waits, [r['controls'] for r in results])
+    return mean_ci(waits)
+
+ESTIMATORS = ('plain', 'antithetic', 'control')
+
+def ratio_ci(n, sum_y, sum_t, sum_yy, sum_tt, sum_yt):
+    """ Regenerative εκτιμητής r = ΣY / Στ από n κύκλους, με CI μέσω delta method
+
+    s^2 = S_YY - 2 r S_Yτ + r^2 S_ττ (δειγματικές (συν)διασπορές), hw = t_{n-1} s / (τ̄ sqrt(n)).
+    """
+    r = sum_y / sum_t
+    if n < 2:
+        return r, 0.0
+    s_yy = (sum_yy - sum_y * sum_y / n) / (n - 1)
+    s_tt = (sum_tt - sum_t * sum_t / n) / (n - 1)
+    s_yt = (sum_yt - sum_y * sum_t / n) / (n - 1)
+    s2 = max(s_yy - 2 * r * s_yt + r * r * s_tt, 0.0)
+    return r, get_t_value(n - 1) * math.sqrt(s2 / n) / (sum_t / n)
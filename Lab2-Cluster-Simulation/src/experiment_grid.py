@@ -0,0 +1,195 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+
+import simulation
+import streams
+
+# Scheduler πειραμάτων: όλες οι replications όλων των σημείων (algo, d) ενός grid
+# μοιράζονται ένα process pool. Κάθε φορά που ελευθερώνεται θέση, υποβάλλεται η
+# επόμενη replication του πειράματος με τις λιγότερες υποβολές, οπότε ένα πείραμα
+# που αργεί να συγκλίνει δεν αφήνει τους υπόλοιπους πυρήνες να περιμένουν.
+#
+# Με warmup='auto' η πρώτη εργασία κάθε πειράματος είναι ο εντοπισμός του warm-up
+# (MSER-5, simulation.detect_warmup) και οι replications του ξεκινούν όταν τελειώσει.
+# Τα pilots τρέχουν στο pool όπως οι replications· η cache διαβάζεται και γράφεται
+# μόνο από το parent.
+#
+# Ο κανόνας διακοπής εφαρμόζεται ανά πείραμα στις replications 1, 2, 3, ... με τη
+# σειρά (όπως στο simulation.py)· όσες έχουν ήδη τρέξει μετά το σημείο διακοπής
+# απορρίπτονται, άρα τα αποτελέσματα δεν εξαρτώνται από το πλήθος των workers.
+
+
+class ExperimentResult:
+    """ Αποτέλεσμα ενός σημείου του grid (summary όπως το simulation.summarize_results) """
+
+    def __init__(self, algo, d, results, summary=None, error=None, warmup=None):
+        self.algo = algo
+        self.d = d
+        self.results = results
+        self.summary = summary
+        self.error = error
+        self.warmup = warmup  # {'warmup_time', 'warmup_customers', 'warmup_method'}
+
+    def __repr__(self):
+        if self.error is not None:
+            return f"ExperimentResult(algo={self.algo}, d={self.d}, error={self.error!r})"
+        return (f"ExperimentResult(algo={self.algo}, d={self.d}, replications={self.summary['replications']}, "
+                f"mean_wait={self.summary['mean_wait']:.4f})")
+
+
+class _Experiment:
+    """ Κατάσταση ενός πειράματος μέσα στον scheduler """
+
+    def __init__(self, algo, d, warmup=None):
+        self.algo = algo
+        self.d = d
+        self.warmup = warmup  # None μέχρι να ολοκληρωθεί ο εντοπισμός του warm-up
+        self.detecting = False
+        self.submitted = 0
+        self.pending = {}   # replication (1-based) -> αποτέλεσμα που ήρθε εκτός σειράς
+        self.results = []
+        self.finished = False
+        self.error = None
+
+    def accept(self, rep, result, estimator):
+        """ Προσθέτει ό,τι έχει γίνει συνεχές πρόθεμα και ελέγχει τον κανόνα διακοπής """
+        self.pending[rep] = result
+        while not self.finished and len(self.results) + 1 in self.pending:
+            self.results.append(self.pending.pop(len(self.results) + 1))
+            check = simulation.check_precision(self.results, estimator)
+            if (check is not None and check[1] <= simulation.DESIRED_REL_ERROR) \
+                    or len(self.results) >= simulation.MAX_REPLICATIONS:
+                self.finished = True
+
+    def fail(self, error):
+        self.error = error
+        self.finished = True
+
+    def result(self, estimator):
+        if self.error is not None:
+            return ExperimentResult(self.algo, self.d, self.results, error=self.error, warmup=self.warmup)
+        return ExperimentResult(self.algo, self.d, self.results,
+                                simulation.summarize_results(self.results, estimator), warmup=self.warmup)
+
+
+def _next_experiment(experiments):
+    """ Το ενεργό πείραμα με τις λιγότερες υποβεβλημένες replications (σε ισοπαλία, η σειρά του grid) """
+    candidates = [exp for exp in experiments
+                  if not exp.finished and not exp.detecting and exp.submitted < simulation.MAX_REPLICATIONS]
+    return min(candidates, key=lambda exp: exp.submitted, default=None)
+
+
+def _run_inline(fn, *args):
+    """ Εκτέλεση στο ίδιο process με το interface ενός Future (workers=1) """
+    future = Future()
+    try:
+        future.set_result(fn(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+
+def _cached(result):
+    """ Ολοκληρωμένο Future για αποτέλεσμα που βρέθηκε στην cache """
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def run_grid(grid, sim_duration, workers=1, master_seed=streams.MASTER_SEED, engine=None,
+             estimator='plain', cluster=None, on_result=None, cache=None, warmup='auto', on_progress=None):
+    """ Τρέχει όλα τα (algo, d) του grid και επιστρέφει λίστα ExperimentResult με τη σειρά του grid
+
+    on_result(ExperimentResult) καλείται μόλις ολοκληρωθεί κάθε πείραμα και
+    on_progress(algo, d, results, finished, warmup_time) μετά από κάθε αποτέλεσμα
+    replication (π.χ. telemetry.Telemetry.update). Με cache
+    (ReplicationCache) οι replications που έχουν ήδη τρέξει δεν ξανατρέχουν. warmup:
+    'auto' (MSER-5 ανά πείραμα) ή σταθερό warm-up σε sec.
+    """
+    engine = engine or simulation.ENGINE
+    cluster = cluster or simulation.CLUSTER
+    fixed = None if warmup == 'auto' else simulation.fixed_warmup(warmup)
+    experiments = [_Experiment(algo, d, fixed) for algo, d in grid]
+
+    # Το parent χρειάζεται τις ίδιες ρυθμίσεις με τους workers (κλειδιά cache, εντοπισμός warm-up,
+    # inline εκτέλεση), οπότε εφαρμόζονται και εδώ και επαναφέρονται στο τέλος. Το REPLAY και
+    # το INSTRUMENT του καλούντα περνάνε όπως είναι, ώστε workers=1 και workers=N να συμφωνούν.
+    saved = (simulation.ENGINE, simulation.CLUSTER, simulation.REPLAY, simulation.INSTRUMENT)
+    worker_args = (engine, cluster.to_dict(), simulation.REPLAY, simulation.INSTRUMENT)
+    simulation.init_worker(*worker_args)
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=simulation.init_worker,
+                                       initargs=worker_args)
+        submit = executor.submit
+    else:
+        executor = None
+        submit = _run_inline
+
+    # Δύο replications ανά worker στην ουρά, ώστε να μη μένει πυρήνας άδειος
+    # όσο ο scheduler επεξεργάζεται ένα αποτέλεσμα
+    capacity = 2 * workers
+    in_flight = {}
+    try:
+        while True:
+            while len(in_flight) < capacity:
+                exp = _next_experiment(experiments)
+                if exp is None:
+                    break
+                if exp.warmup is None:
+                    exp.detecting = True
+                    key = None
+                    if cache is not None:
+                        key = simulation.warmup_key(sim_duration, exp.algo, exp.d, master_seed)
+                        info = cache.get(key)
+                        if info is not None:
+                            in_flight[_cached(info)] = (exp, 0, None)
+                            continue
+                    future = submit(simulation.detect_warmup, sim_duration, exp.algo, exp.d, master_seed)
+                    in_flight[future] = (exp, 0, key)
+                    continue
+                warmup_time = exp.warmup['warmup_time']
+                exp.submitted += 1
+                seed, antithetic = simulation.replication_plan(master_seed, exp.submitted, exp.submitted, estimator)[0]
+                key = None
+                if cache is not None:
+                    key = simulation.cache_key(sim_duration, exp.algo, seed, exp.d, engine, antithetic, warmup_time)
+                    result = cache.get(key)
+                    if result is not None:
+                        in_flight[_cached(result)] = (exp, exp.submitted, None)
+                        continue
+                future = submit(simulation.run_replication, sim_duration, exp.algo, seed, exp.d, engine, antithetic,
+                                warmup_time)
+                in_flight[future] = (exp, exp.submitted, key)
+            if not in_flight:
+                break
+
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                exp, rep, key = in_flight.pop(future)
+                if future.exception() is None and key is not None:
+                    cache.put(key, future.result())
+                if rep == 0:
+                    # Αποτέλεσμα του εντοπισμού warm-up (replication 0)
+                    exp.detecting = False
+                    if future.exception() is not None:
+                        exp.fail(future.exception())
+                        if on_result is not None:
+                            on_result(exp.result(estimator))
+                    else:
+                        exp.warmup = future.result()
+                    continue
+                if exp.finished:
+                    continue
+                try:
+                    exp.accept(rep, future.result(), estimator)
+                except Exception as e:
+                    exp.fail(e)
+                if on_progress is not None and exp.error is None:
+                    on_progress(exp.algo, exp.d, exp.results, exp.finished, exp.warmup['warmup_time'])
+                if exp.finished and on_result is not None:
+                    on_result(exp.result(estimator))
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        simulation.ENGINE, simulation.CLUSTER, simulation.REPLAY, simulation.INSTRUMENT = saved
+
+    return [exp.result(estimator) for exp in experiments]
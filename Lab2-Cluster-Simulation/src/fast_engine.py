@@ -0,0 +1,259 @@
+import bisect
+import heapq
+import itertools
+import math
+from collections import deque
+
+import load_index
+import streams
+from online_stats import ReplicationObserver
+
+# Native μηχανή γεγονότων για την τοπολογία του simulation.py:
+# ένας dispatcher μηδενικού χρόνου και N workers (1 server, FIFO, εκθετική εξυπηρέτηση).
+# Δεν υπάρχει κόμβος dispatcher: η δρομολόγηση γίνεται τη στιγμή της άφιξης.
+
+ARRIVAL = -1  # "Κόμβος" του γεγονότος άφιξης μέσα στο heap
+
+
+class Job:
+    """ Συμπαγής εργασία (μόνο τα πεδία που χρειάζονται τα στατιστικά) """
+    __slots__ = ('id_number', 'arrival_date', 'service_start_date', 'service_end_date',
+                 'queue_size_at_arrival')
+
+    def __init__(self, id_number, arrival_date, queue_size_at_arrival):
+        self.id_number = id_number
+        self.arrival_date = arrival_date
+        self.service_start_date = None
+        self.service_end_date = None
+        self.queue_size_at_arrival = queue_size_at_arrival
+
+
+# --- ΔΡΟΜΟΛΟΓΗΣΗ ---
+# Ίδια λογική (και ίδιο tie-breaking στον μικρότερο δείκτη) με RoutingDecision1/2.
+def make_router(algorithm, d, service_rates, routing_stream, dispatched=0):
+    """ Επιστρέφει συνάρτηση WorkerLoadIndex -> δείκτης worker για τον αλγόριθμο
+
+    dispatched: πόσες αφίξεις έχουν ήδη δρομολογηθεί (θέση του round robin μετά από restore).
+    """
+    if algorithm == 1:
+        return load_index.shortest_queue
+    if algorithm == 2:
+        if isinstance(d, tuple):
+            # Ένα κατώφλι ανά κλάση ταχύτητας (βλ. optimize.py)
+            return lambda index: load_index.class_thresholds(index, d)
+        route = lambda index: load_index.fast_threshold(index, d)
+        route.threshold = d  # Το run_until παίρνει την ίδια απόφαση inline (βλ. ClusterEngine.run_until)
+        return route
+    n = len(service_rates)
+    if algorithm == 3:
+        # Τυχαία επιλογή με πιθανότητα ανάλογη του ρυθμού εξυπηρέτησης
+        total = sum(service_rates)
+        cum_probs = list(itertools.accumulate(rate / total for rate in service_rates))
+        rnd = routing_stream.random
+        return lambda index: min(bisect.bisect_right(cum_probs, rnd()), n - 1)
+    if algorithm == 4:
+        # Round robin
+        counter = itertools.count(dispatched)
+        return lambda index: next(counter) % n
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+
+# --- ΜΗΧΑΝΗ ---
+class ClusterEngine:
+    """ Binary-heap λίστα γεγονότων με πίνακες κατάστασης ανά κόμβο """
+
+    def __init__(self, arrival_rate, service_rates, algorithm, d, seed, observer, antithetic=False, trace=None,
+                 workload=None):
+        self.arrival_rate = arrival_rate
+        self.service_rates = list(service_rates)
+        # Ξεχωριστά substreams για αφίξεις, δρομολόγηση και κάθε worker (common random numbers)
+        self.arrival_stream = streams.VariateStream(streams.arrival_stream(seed), antithetic)
+        self.service_streams = [streams.VariateStream(streams.service_stream(seed, k), antithetic)
+                                for k in range(len(self.service_rates))]
+        self.algorithm = algorithm
+        self.d = d
+        self.routing_stream = streams.VariateStream(streams.routing_stream(seed), antithetic)
+        self.router = make_router(algorithm, d, self.service_rates, self.routing_stream)
+        self.observer = observer
+        self.trace = trace  # trace_sink.TraceWriter (προαιρετικό)
+        self.workload = workload  # replay.ReplayWorkload: αφίξεις και μεγέθη από trace αντί για εκθετικά
+
+        n = len(self.service_rates)
+        self.now = 0.0
+        self.index = load_index.WorkerLoadIndex(self.service_rates)
+        self.queues = [deque() for _ in range(n)]
+        self.in_service = [None] * n
+        self.jobs_arrived = 0
+        self.events_processed = 0
+
+        first_arrival = (workload.interarrival() if workload is not None
+                         else self.arrival_stream.exponential(self.arrival_rate))
+        self.events = [(first_arrival, ARRIVAL)]
+
+    def run_until(self, max_time):
+        """ Εκτελεί όσα γεγονότα έχουν χρόνο < max_time """
+        events = self.events
+        heappop, heappush = heapq.heappop, heapq.heappush
+        next_arrival = self.arrival_stream.exponential
+        service_draws = [stream.exponential for stream in self.service_streams]
+        index = self.index
+        loads = index.loads
+        # increment / decrement του index inline: ενημέρωση του συνολικού και του tree της κλάσης
+        update_all = index.all.update
+        update_class = [index.by_class[c].update for c in index.speed_class]
+        position = index.position
+        queues = self.queues
+        in_service = self.in_service
+        rates = self.service_rates
+        router = self.router
+        dispatch = self.observer.dispatch
+        service = self.observer.service
+        arrival_rate = self.arrival_rate
+        trace = self.trace
+        if self.workload is not None:
+            next_arrival, router, service_draws = self.workload.bind(router, len(rates))
+        # Αλγόριθμος 2 με ένα κατώφλι: load_index.fast_threshold χωρίς κλήσεις συναρτήσεων
+        # (όχι όταν ο router είναι τυλιγμένος, π.χ. από το instrumentation ή το replay)
+        threshold = getattr(router, 'threshold', None)
+        all_tree = index.all.tree
+        fast_tree = index.by_class[0].tree
+        fast_members = index.class_members[0]
+        processed = 0
+
+        while events and events[0][0] < max_time:
+            date, node = heappop(events)
+            processed += 1
+
+            if node == ARRIVAL:
+                self.jobs_arrived += 1
+                dispatch(date)
+                if threshold is None:
+                    k = router(index)
+                else:
+                    best = all_tree[1]
+                    k = fast_members[fast_tree[1]]
+                    if loads[k] > loads[best] + threshold:
+                        k = best
+                load = loads[k]
+                job = Job(self.jobs_arrived, date, load)
+                update_all(k, load + 1)
+                update_class[k](position[k], load + 1)
+                if in_service[k] is None:
+                    job.service_start_date = date
+                    job.service_end_date = date + service_draws[k](rates[k])
+                    in_service[k] = job
+                    heappush(events, (job.service_end_date, k))
+                else:
+                    queues[k].append(job)
+                heappush(events, (date + next_arrival(arrival_rate), ARRIVAL))
+                continue
+
+            job = in_service[node]
+            service(node, job.arrival_date, job.service_start_date, date)
+            if trace is not None:
+                trace.append(job.id_number, node + 2, job.arrival_date, job.service_start_date, date,
+                             job.queue_size_at_arrival)
+            load = loads[node] - 1
+            update_all(node, load)
+            update_class[node](position[node], load)
+            queue = queues[node]
+            if queue:
+                job = queue.popleft()
+                job.service_start_date = date
+                job.service_end_date = date + service_draws[node](rates[node])
+                in_service[node] = job
+                heappush(events, (job.service_end_date, node))
+            else:
+                in_service[node] = None
+
+        self.events_processed += processed
+        self.now = max_time
+
+    def trace_unfinished(self):
+        """ Γράφει στο trace τις εργασίες που είναι ακόμα στο σύστημα (NaN οι χρόνοι που λείπουν) """
+        for k, (queue, current) in enumerate(zip(self.queues, self.in_service)):
+            jobs = ([current] if current is not None else []) + list(queue)
+            for job in jobs:
+                start = job.service_start_date if job.service_start_date is not None else math.nan
+                self.trace.append(job.id_number, k + 2, job.arrival_date, start, math.nan,
+                                  job.queue_size_at_arrival)
+
+    # --- WARM STATE (βλ. snapshot.py) ---
+    def state(self):
+        """ Πλήρης κατάσταση του συστήματος τη στιγμή self.now ως dict για JSON
+
+        Ουρές και εξυπηρετούμενοι πελάτες ως [id, άφιξη, φορτίο στην άφιξη(, έναρξη, λήξη)],
+        η επόμενη άφιξη και η τελευταία άφιξη (για το control variate των ενδιάμεσων χρόνων).
+        """
+        next_arrival = next(date for date, node in self.events if node == ARRIVAL)
+        return {
+            'now': self.now,
+            'jobs_arrived': self.jobs_arrived,
+            'last_arrival': self.observer.last_dispatch,
+            'next_arrival': next_arrival,
+            'queues': [[[job.id_number, job.arrival_date, job.queue_size_at_arrival] for job in queue]
+                       for queue in self.queues],
+            'in_service': [None if job is None else
+                           [job.id_number, job.arrival_date, job.queue_size_at_arrival,
+                            job.service_start_date, job.service_end_date]
+                           for job in self.in_service],
+        }
+
+    def restore(self, state, resample=True):
+        """ Συνεχίζει από μια κατάσταση του state(), με τα substreams αυτής της μηχανής
+
+        Με resample=True η επόμενη άφιξη και οι υπολειπόμενοι χρόνοι εξυπηρέτησης
+        τραβιούνται ξανά από τα substreams (ακριβές για εκθετικούς χρόνους, λόγω
+        έλλειψης μνήμης), ώστε κάθε fork να έχει δικό του μέλλον από την ίδια κατάσταση.
+        Αλλιώς χρησιμοποιούνται οι χρόνοι που αποθηκεύτηκαν.
+        """
+        now = state['now']
+        self.now = now
+        self.jobs_arrived = state['jobs_arrived']
+        self.observer.last_dispatch = state['last_arrival']
+        self.router = make_router(self.algorithm, self.d, self.service_rates, self.routing_stream,
+                                  self.jobs_arrived)
+        # Ο πρώτος ενδιάμεσος χρόνος που τραβήχτηκε στον constructor μετράει από το now
+        first_interarrival = self.events[0][0]
+        self.events = [(now + first_interarrival if resample else state['next_arrival'], ARRIVAL)]
+
+        for k, (queue, current) in enumerate(zip(state['queues'], state['in_service'])):
+            self.queues[k] = deque(Job(*fields) for fields in queue)
+            if current is None:
+                self.in_service[k] = None
+            else:
+                job = Job(*current[:3])
+                job.service_start_date = current[3]
+                job.service_end_date = (now + self.service_streams[k].exponential(self.service_rates[k])
+                                        if resample else current[4])
+                self.in_service[k] = job
+                self.events.append((job.service_end_date, k))
+            self.index.set_load(k, len(queue) + (current is not None))
+        heapq.heapify(self.events)
+
+
+def run_fast_replication(arrival_rate, service_rates, algorithm, d, seed, warmup, sim_duration,
+                         antithetic=False, detector=None, trace=None, workload=None, probe=None):
+    """ Μία replication· επιστρέφει τον ReplicationObserver με τα στατιστικά
+
+    Με trace (trace_sink.TraceWriter) γράφει και κάθε εργασία, μαζί με όσες δεν ολοκληρώθηκαν.
+    Με workload (replay.ReplayWorkload) οι αφίξεις και τα μεγέθη έρχονται από ένα
+    καταγεγραμμένο trace· το arrival_rate είναι τότε ο μέσος ρυθμός του trace.
+    Με probe (instrumentation.Probe) μετριούνται οι φάσεις, τα γεγονότα και η δρομολόγηση.
+    """
+    observer = ReplicationObserver(arrival_rate, service_rates, warmup, sim_duration, detector)
+    engine = ClusterEngine(arrival_rate, service_rates, algorithm, d, seed, observer, antithetic, trace,
+                           workload)
+    if probe is None:
+        engine.run_until(warmup + sim_duration)
+    else:
+        engine.router = probe.timed(engine.router)
+        probe.lap('build')
+        engine.run_until(warmup)
+        probe.lap('warmup')
+        engine.run_until(warmup + sim_duration)
+        probe.lap('measurement')
+        probe.events = engine.events_processed
+    if trace is not None:
+        engine.trace_unfinished()
+    return observer
@@ -0,0 +1,123 @@
+import cProfile
+import glob
+import itertools
+import os
+import pstats
+import time
+import tracemalloc
+
+# Προαιρετική μέτρηση του πού πάει ο χρόνος μιας replication (--instrument / --profile
+# στο simulation.py). Με το mode κλειστό δεν τρέχει τίποτα από εδώ: οι μηχανές
+# δέχονται probe=None και ακολουθούν ακριβώς τον ίδιο δρόμο με πριν.
+#
+# Probe ανά replication:
+#   phases:   wall time των φάσεων build (δίκτυο / μηχανή), warmup, measurement, statistics
+#   counters: γεγονότα (αφίξεις + ολοκληρώσεις), αποφάσεις δρομολόγησης και ο συνολικός χρόνος τους
+#   peak_memory_mb: peak του tracemalloc (ανεβάζει και τους χρόνους, οπότε οι φάσεις
+#             συγκρίνονται μεταξύ τους και όχι με runs χωρίς instrumentation)
+# Με profile_dir κάθε replication γράφει και ένα cProfile dump· το merge_profiles τα
+# ενώνει σε ένα pstats αρχείο ανά διαμόρφωση, δίπλα στα αποτελέσματα.
+
+PHASES = ('build', 'warmup', 'measurement', 'statistics')
+
+_dumps = itertools.count()  # Αύξων αριθμός των dumps του process (μοναδικά ονόματα αρχείων)
+
+
+class Probe:
+    """ Μετρητές και χρόνοι φάσεων μίας replication """
+
+    def __init__(self):
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.events = 0
+        self.routing_decisions = 0
+        self.routing_seconds = 0.0
+        self.peak_memory = 0
+        self._mark = time.perf_counter()
+
+    def lap(self, phase):
+        """ Ο χρόνος από το προηγούμενο lap μετράει στη φάση phase """
+        now = time.perf_counter()
+        self.phases[phase] += now - self._mark
+        self._mark = now
+
+    def timed(self, route):
+        """ Ο route με μέτρηση πλήθους και χρόνου αποφάσεων """
+        perf_counter = time.perf_counter
+
+        def timed_route(*args):
+            start = perf_counter()
+            k = route(*args)
+            self.routing_seconds += perf_counter() - start
+            self.routing_decisions += 1
+            return k
+        return timed_route
+
+    def result(self):
+        return {'phases': dict(self.phases), 'events': self.events,
+                'routing_decisions': self.routing_decisions, 'routing_seconds': self.routing_seconds,
+                'peak_memory_mb': self.peak_memory / (1 << 20)}
+
+
+def run_instrumented(run, profile_dir=None):
+    """ run(probe) με tracemalloc (και cProfile αν δοθεί profile_dir)· το αποτέλεσμα παίρνει 'instrumentation' """
+    probe = Probe()
+    profiler = cProfile.Profile() if profile_dir else None
+    tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        result = run(probe)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        probe.peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    if profiler is not None:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(profile_dir, f"{os.getpid()}-{next(_dumps)}.prof"))
+    return {**result, 'instrumentation': probe.result()}
+
+
+def merge_profiles(profile_dir, path):
+    """ Ενώνει τα dumps του profile_dir σε ένα pstats αρχείο (και τα σβήνει)· None αν δεν υπάρχουν """
+    dumps = sorted(glob.glob(os.path.join(profile_dir, '*.prof')))
+    if not dumps:
+        return None
+    stats = pstats.Stats(dumps[0])
+    for dump in dumps[1:]:
+        stats.add(dump)
+    stats.dump_stats(path)
+    for dump in dumps:
+        os.remove(dump)
+    os.rmdir(profile_dir)
+    return path
+
+
+def summarize(results):
+    """ Σύνολα πάνω στις replications: φάσεις, γεγονότα/sec, ns ανά απόφαση, μέγιστο peak μνήμης """
+    probes = [r['instrumentation'] for r in results if 'instrumentation' in r]
+    if not probes:
+        return None
+    phases = {phase: sum(p['phases'][phase] for p in probes) for phase in PHASES}
+    events = sum(p['events'] for p in probes)
+    decisions = sum(p['routing_decisions'] for p in probes)
+    loop = phases['warmup'] + phases['measurement']
+    return {
+        'replications': len(probes),
+        'phases': phases,
+        'events': events,
+        'events_per_sec': events / loop if loop > 0 else 0.0,
+        'routing_decisions': decisions,
+        'routing_seconds': sum(p['routing_seconds'] for p in probes),
+        'ns_per_decision': sum(p['routing_seconds'] for p in probes) / decisions * 1e9 if decisions else 0.0,
+        'peak_memory_mb': max(p['peak_memory_mb'] for p in probes),
+    }
+
+
+def print_summary(summary):
+    total = sum(summary['phases'].values())
+    phases = ", ".join(f"{phase} {seconds:.2f} s ({seconds / total:.0%})" for phase, seconds in summary['phases'].items())
+    print(f"Instrumentation ({summary['replications']} replications): {phases}")
+    print(f"  {summary['events']} events ({summary['events_per_sec']:,.0f} events/s in the event loop), "
+          f"{summary['routing_decisions']} routing decisions ({summary['ns_per_decision']:.0f} ns each, "
+          f"{summary['routing_seconds']:.2f} s), peak traced memory {summary['peak_memory_mb']:.1f} MB")
@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+
+import streams
+from cluster_spec import speed_classes
+from online_stats import sketch_result
+from quantile_sketch import QuantileSketch
+
+# Vectorized fast path για δρομολόγηση που ΔΕΝ κοιτάει την κατάσταση των ουρών
+# (τυχαία κατανομή ανάλογη του ρυθμού, round robin). Τότε κάθε worker είναι μια
+# ανεξάρτητη FIFO ουρά και οι αναμονές δίνονται από την αναδρομή Lindley:
+#     W_n = max(0, W_{n-1} + S_{n-1} - T_n)
+# που υπολογίζεται με cumsum / minimum.accumulate, για πολλές replications μαζί
+# (μία γραμμή ανά replication).
+
+# Αλγόριθμος 3: τυχαία επιλογή worker με πιθανότητα μ_k / Σμ
+# Αλγόριθμος 4: round robin με τη σειρά των workers
+STATE_INDEPENDENT = (3, 4)
+
+CHUNK = 1 << 16  # Στήλες ανά βήμα της αναδρομής (φράζει τη μνήμη των ενδιάμεσων)
+
+
+def lindley_waits(interarrivals, services, chunk=CHUNK):
+    """ Αναμονές FIFO ουράς ενός server κατά μήκος του τελευταίου άξονα
+
+    interarrivals[..., n] = A_n - A_{n-1} (με A_{-1} = 0), services[..., n] = S_n.
+    """
+    waits = np.empty_like(interarrivals)
+    w_last = np.zeros(interarrivals.shape[:-1])
+    s_last = np.zeros(interarrivals.shape[:-1])
+    n = interarrivals.shape[-1]
+    for lo in range(0, n, chunk):
+        hi = min(lo + chunk, n)
+        prev_services = np.concatenate([s_last[..., None], services[..., lo:hi - 1]], axis=-1)
+        # P_j = Σ (S_{i-1} - T_i) μέσα στο chunk, W_j = max(W_last + P_j, P_j - min_{k<=j} P_k)
+        p = np.cumsum(prev_services - interarrivals[..., lo:hi], axis=-1)
+        waits[..., lo:hi] = np.maximum(w_last[..., None] + p, p - np.minimum.accumulate(p, axis=-1))
+        w_last = waits[..., hi - 1]
+        s_last = services[..., hi - 1]
+    return waits
+
+
+def _draw_arrivals(arrival_rngs, routing_rngs, antithetic, arrival_rate, probs, algorithm, end_time):
+    """ Χρόνοι άφιξης (R, n) που καλύπτουν το [0, end_time) και ο worker κάθε εργασίας """
+    expected = arrival_rate * end_time
+    width = int(expected + 8 * math.sqrt(expected) + 16)
+    n_workers = len(probs)
+    cum_probs = np.cumsum(probs)
+    cum_probs[-1] = 1.0
+
+    inter = np.stack([streams.exponentials(rng, arrival_rate, width, anti)
+                      for rng, anti in zip(arrival_rngs, antithetic)])
+    arrivals = np.cumsum(inter, axis=1)
+    # Σπάνια περίπτωση: επέκταση όλων των γραμμών (τα streams είναι prefix-consistent,
+    # οπότε οι ήδη τραβηγμένες τιμές δεν αλλάζουν)
+    while arrivals[:, -1].min() < end_time:
+        extra = np.stack([streams.exponentials(rng, arrival_rate, width, anti)
+                          for rng, anti in zip(arrival_rngs, antithetic)])
+        arrivals = np.concatenate([arrivals, arrivals[:, -1:] + np.cumsum(extra, axis=1)], axis=1)
+
+    n = arrivals.shape[1]
+    if algorithm == 4:
+        workers = np.broadcast_to(np.arange(n) % n_workers, arrivals.shape)
+    else:
+        u = np.stack([streams.uniforms(rng, n, anti) for rng, anti in zip(routing_rngs, antithetic)])
+        workers = np.searchsorted(cum_probs, u, side='right')
+    return arrivals, workers
+
+
+def _group_by_worker(workers, n_workers):
+    """ Ταξινόμηση (stable) των εργασιών κάθε γραμμής ανά worker: order, offsets, counts """
+    order = np.argsort(workers, axis=1, kind='stable')
+    counts = np.stack([np.bincount(row, minlength=n_workers) for row in workers])
+    offsets = np.cumsum(counts, axis=1) - counts
+    return order, offsets, counts
+
+
+def _row_sums(values, lengths):
+    """ Άθροισμα των πρώτων lengths[r] τιμών κάθε γραμμής r
+
+    Το np.sum αθροίζει κατά ζεύγη με blocks που εξαρτώνται από το μήκος της γραμμής, και
+    το padding εξαρτάται από τις άλλες replications του πίνακα. Έτσι το αποτέλεσμα μιας
+    replication δεν αλλάζει με το πώς μοιράζονται οι replications στους workers.
+    """
+    return np.array([row[:n].sum() for row, n in zip(values, lengths)])
+
+
+def _worker_arrivals(arrivals, grouping, k, pad_start):
+    """ Αφίξεις του worker k ανά γραμμή, με padding μετά την τελευταία άφιξη (ορθογώνιος πίνακας) """
+    order, offsets, counts = grouping
+    width = max(int(counts[:, k].max()), 1)
+    cols = np.arange(width)[None, :]
+    valid = cols < counts[:, k][:, None]
+    idx = np.minimum(offsets[:, k][:, None] + cols, order.shape[1] - 1)
+    jobs = np.take_along_axis(order, idx, axis=1)
+    real = np.take_along_axis(arrivals, jobs, axis=1)
+    return np.where(valid, real, pad_start + cols)
+
+
+def run_replications(arrival_rate, service_rates, algorithm, seeds, warmup, sim_duration,
+                     antithetic=None):
+    """ Replications (μία ανά seed) ως 2-D πίνακες· λίστα από dicts όπως το ReplicationObserver.result() """
+    if algorithm not in STATE_INDEPENDENT:
+        raise ValueError(f"Algorithm {algorithm} depends on queue state; use the event engines")
+    end_time = warmup + sim_duration
+    n_reps = len(seeds)
+    antithetic = antithetic or [False] * n_reps
+    probs = np.asarray(service_rates, dtype=float) / sum(service_rates)
+
+    arrival_rngs = [np.random.default_rng(streams.arrival_stream(seed)) for seed in seeds]
+    routing_rngs = [np.random.default_rng(streams.routing_stream(seed)) for seed in seeds]
+    arrivals, workers = _draw_arrivals(arrival_rngs, routing_rngs, antithetic, arrival_rate, probs,
+                                       algorithm, end_time)
+
+    # Διελεύσεις από τον dispatcher μέσα στο παράθυρο (μετράνε στο throughput)
+    dispatched = (arrivals > warmup) & (arrivals < end_time)
+    completions = dispatched.sum(axis=1)
+    interarrivals = np.diff(arrivals, axis=1, prepend=0.0)
+    c_arrival = (_row_sums(np.where(dispatched, interarrivals, 0.0), (arrivals < end_time).sum(axis=1))
+                 * arrival_rate / np.maximum(completions, 1))
+    wait_sum = np.zeros(n_reps)
+    wait_count = np.zeros(n_reps, dtype=np.int64)
+    service_sum = np.zeros(n_reps)
+    busy = np.zeros((n_reps, len(service_rates)))
+    worker_class = speed_classes(service_rates)
+    sketches = [[QuantileSketch() for _ in range(max(worker_class) + 2)] for _ in range(n_reps)]
+
+    grouping = _group_by_worker(workers, len(service_rates))
+    counts = grouping[2]
+    pad_start = arrivals[:, -1].max() + 1.0
+    for k, rate in enumerate(service_rates):
+        arr = _worker_arrivals(arrivals, grouping, k, pad_start)
+        width = arr.shape[1]
+        services = np.stack([streams.exponentials(np.random.default_rng(streams.service_stream(seed, k)),
+                                                  rate, width, anti)
+                             for seed, anti in zip(seeds, antithetic)])
+        inter = np.diff(arr, axis=1, prepend=0.0)
+        waits = lindley_waits(inter, services)
+
+        start = arr + waits
+        finish = start + services
+        done = finish < end_time
+        counted = done & (arr > warmup)
+        wait_sum += _row_sums(np.where(counted, waits, 0.0), counts[:, k])
+        wait_count += counted.sum(axis=1)
+        for r in range(n_reps):
+            counted_waits = waits[r][counted[r]]
+            sketches[r][0].add_many(counted_waits)
+            sketches[r][1 + worker_class[k]].add_many(counted_waits)
+        service_sum += _row_sums(np.where(counted, services, 0.0), counts[:, k]) * rate
+        in_window = done & (finish > warmup)
+        busy[:, k] = _row_sums(np.where(in_window, finish - np.maximum(start, warmup), 0.0), counts[:, k])
+        completions += in_window.sum(axis=1)
+
+    results = []
+    for r in range(n_reps):
+        count = wait_count[r]
+        results.append({
+            'mean_wait': float(wait_sum[r] / count) if count else 0.0,
+            'utilizations': (busy[r] / sim_duration).tolist(),
+            'throughput': float(completions[r] / sim_duration),
+            'controls': [float(c_arrival[r]) if dispatched[r].any() else 1.0,
+                         float(service_sum[r] / count) if count else 1.0],
+            **sketch_result(sketches[r]),
+        })
+    return results
@@ -0,0 +1,111 @@
+# Index φορτίου των workers για τον dispatcher. Ενημερώνεται σε κάθε άφιξη/αναχώρηση
+# (O(log n)), ώστε η απόφαση δρομολόγησης να μη σαρώνει όλους τους workers.
+
+from cluster_spec import speed_classes
+
+INF = float('inf')
+
+
+class LoadIndex:
+    """ Tournament tree πάνω στο (φορτίο, δείκτης): argmin σε O(1), ενημέρωση σε O(log n) """
+
+    def __init__(self, n):
+        size = 1
+        while size < n:
+            size *= 2
+        self.n = n
+        self.size = size
+        # Ο δείκτης n είναι φρουρός με άπειρο φορτίο για τα κενά φύλλα
+        self.loads = [0] * n + [INF]
+        self.tree = [n] * (2 * size)
+        for i in range(n):
+            self.tree[size + i] = i
+        for pos in range(size - 1, 0, -1):
+            self.tree[pos] = self._winner(self.tree[2 * pos], self.tree[2 * pos + 1])
+
+    def _winner(self, a, b):
+        # Σε ισοβαθμία κερδίζει ο μικρότερος δείκτης (όπως το min() της λίστας)
+        if self.loads[b] < self.loads[a]:
+            return b
+        return a
+
+    def update(self, i, load):
+        loads = self.loads
+        tree = self.tree
+        loads[i] = load
+        pos = (i + self.size) >> 1
+        while pos:
+            a = tree[2 * pos]
+            b = tree[2 * pos + 1]
+            winner = b if loads[b] < loads[a] else a
+            # Αν ο νικητής δεν άλλαξε (και δεν είναι ο i), οι πρόγονοι μένουν ίδιοι
+            if winner == tree[pos] and winner != i:
+                break
+            tree[pos] = winner
+            pos >>= 1
+
+    def argmin(self):
+        return self.tree[1]
+
+
+class WorkerLoadIndex:
+    """ Φορτία όλων των workers + ένα LoadIndex ανά κλάση ταχύτητας """
+
+    def __init__(self, service_rates):
+        # Κλάση 0 = οι ταχύτεροι workers, μετά κατά φθίνοντα ρυθμό εξυπηρέτησης
+        self.speed_class = speed_classes(service_rates)
+        self.class_members = [[] for _ in range(max(self.speed_class) + 1)]
+        self.position = []
+        for i, c in enumerate(self.speed_class):
+            self.position.append(len(self.class_members[c]))
+            self.class_members[c].append(i)
+
+        self.all = LoadIndex(len(service_rates))
+        self.by_class = [LoadIndex(len(members)) for members in self.class_members]
+        self.loads = self.all.loads
+
+    def set_load(self, i, load):
+        self.all.update(i, load)
+        self.by_class[self.speed_class[i]].update(self.position[i], load)
+
+    def increment(self, i):
+        self.set_load(i, self.loads[i] + 1)
+
+    def decrement(self, i):
+        self.set_load(i, self.loads[i] - 1)
+
+    def shortest(self):
+        return self.all.argmin()
+
+    def shortest_in_class(self, c):
+        return self.class_members[c][self.by_class[c].argmin()]
+
+
+# --- ΚΑΝΟΝΕΣ ΔΡΟΜΟΛΟΓΗΣΗΣ ΠΑΝΩ ΣΤΟ INDEX ---
+def shortest_queue(index):
+    """ Αλγόριθμος 1: ο worker με τους λιγότερους πελάτες """
+    return index.shortest()
+
+
+def fast_threshold(index, d):
+    """ Αλγόριθμος 2: ο λιγότερο φορτωμένος Fast αν load <= min_load + d, αλλιώς ο λιγότερο φορτωμένος """
+    best = index.shortest()
+    fast = index.shortest_in_class(0)
+    if index.loads[fast] <= index.loads[best] + d:
+        return fast
+    return best
+
+
+def class_thresholds(index, thresholds):
+    """ Αλγόριθμος 2 με ένα κατώφλι ανά κλάση ταχύτητας (thresholds[c] για την κλάση c, από την ταχύτερη)
+
+    Ο λιγότερο φορτωμένος worker της πρώτης κλάσης c με load <= min_load + thresholds[c],
+    αλλιώς ο λιγότερο φορτωμένος. Με thresholds = (d,) είναι ακριβώς το fast_threshold(index, d).
+    """
+    best = index.shortest()
+    limit = index.loads[best]
+    for c, d in enumerate(thresholds):
+        candidate = index.shortest_in_class(c)
+        if index.loads[candidate] <= limit + d:
+            return candidate
+    return best
@@ -0,0 +1,119 @@
+import math
+
+from cluster_spec import speed_classes
+from quantile_sketch import QuantileSketch, merge_all
+
+# Online στατιστικά μιας replication: ενημερώνονται τη στιγμή που ολοκληρώνεται
+# κάθε εξυπηρέτηση, οπότε η μνήμη είναι O(κόμβοι) και όχι O(πελάτες).
+
+
+class Welford:
+    """ Online μέσος όρος / διασπορά (αλγόριθμος Welford) """
+    __slots__ = ('count', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+
+class ReplicationObserver:
+    """ Συσσωρευτής των (mean_wait, utilizations, throughput) μέσα στο παράθυρο μέτρησης
+
+    Κρατάει και δύο control variates με γνωστή μέση τιμή 1: τους ενδιάμεσους χρόνους
+    αφίξεων επί λ και τους χρόνους εξυπηρέτησης επί τον ρυθμό του worker.
+    Με detector (π.χ. warmup.Mser5) του δίνει όλες τις αναμονές, και του warm-up.
+    Οι αναμονές μπαίνουν και σε ένα QuantileSketch ανά κλάση workers για τα
+    p50/p95/p99· το συνολικό sketch είναι η συγχώνευσή τους (ίδια buckets).
+    """
+
+    def __init__(self, arrival_rate, service_rates, warmup, sim_duration, detector=None, worker_class=None):
+        self.arrival_rate = arrival_rate
+        self.service_rates = service_rates
+        self.warmup = warmup
+        self.sim_duration = sim_duration
+        self.end_time = warmup + sim_duration
+        self.waits = Welford()
+        self.busy_time = [0.0] * len(service_rates)
+        self.completions = 0
+
+        self.last_dispatch = 0.0
+        self.interarrival_sum = 0.0
+        self.interarrival_count = 0
+        self.service_sum = 0.0
+        self.detector = detector
+
+        self.worker_class = worker_class or speed_classes(service_rates)
+        self.class_sketches = [QuantileSketch() for _ in range(max(self.worker_class) + 1)]
+
+    def dispatch(self, date):
+        """ Διέλευση από τον dispatcher (μετράει στο throughput, όπως τα records του κόμβου 1) """
+        if self.warmup < date <= self.end_time:
+            self.completions += 1
+            self.interarrival_sum += date - self.last_dispatch
+            self.interarrival_count += 1
+        self.last_dispatch = date
+
+    def service(self, worker, arrival_date, service_start_date, service_end_date):
+        """ Ολοκληρωμένη εξυπηρέτηση στον worker (0-based δείκτης) """
+        if self.detector is not None:
+            self.detector.add(arrival_date, service_start_date - arrival_date)
+        if arrival_date > self.warmup:
+            wait = service_start_date - arrival_date
+            self.waits.add(wait)
+            self.class_sketches[self.worker_class[worker]].add(wait)
+            self.service_sum += (service_end_date - service_start_date) * self.service_rates[worker]
+
+        # Χρόνος απασχόλησης μόνο μέσα στο παράθυρο [warmup, warmup + sim_duration]
+        effective_start = service_start_date if service_start_date > self.warmup else self.warmup
+        effective_end = service_end_date if service_end_date < self.end_time else self.end_time
+        if effective_end > effective_start:
+            self.busy_time[worker] += effective_end - effective_start
+
+        if self.warmup < service_end_date <= self.end_time:
+            self.completions += 1
+
+    def summary(self):
+        """ (mean_wait, λίστα utilization ανά worker, throughput) """
+        mean_wait = self.waits.mean if self.waits.count else 0.0
+        utilizations = [busy / self.sim_duration for busy in self.busy_time]
+        throughput = self.completions / self.sim_duration
+        return mean_wait, utilizations, throughput
+
+    def controls(self):
+        """ Μέσες τιμές των control variates (αναμενόμενη τιμή 1.0 και για τις δύο) """
+        c_arrival = self.interarrival_sum * self.arrival_rate / self.interarrival_count if self.interarrival_count else 1.0
+        c_service = self.service_sum / self.waits.count if self.waits.count else 1.0
+        return [c_arrival, c_service]
+
+    def sketches(self):
+        """ [συνολικό sketch, sketch κλάσης 0, κλάσης 1, ...] """
+        return [merge_all(self.class_sketches)] + self.class_sketches
+
+    def result(self):
+        """ Αποτέλεσμα replication ως dict (βλ. simulation.run_replication) """
+        mean_wait, utilizations, throughput = self.summary()
+        return {'mean_wait': mean_wait, 'utilizations': utilizations,
+                'throughput': throughput, 'controls': self.controls(),
+                **sketch_result(self.sketches())}
+
+
+def sketch_result(sketches):
+    """ Πεδία αποτελέσματος για τα ποσοστημόρια: wait_quantiles[i] = [p50, p95, p99] και
+    wait_sketches[i] = το sketch σε μορφή JSON, με i = 0 συνολικά και i = 1 + κλάση """
+    return {'wait_quantiles': [list(sketch.quantiles().values()) for sketch in sketches],
+            'wait_sketches': [sketch.to_dict() for sketch in sketches]}
@@ -0,0 +1,367 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+import cluster_spec
+import confidence
+import replication_cache
+import results_store
+import simulation
+import streams
+from selection import ReplicationRunner, sequential_estimate
+
+# Simulation optimization των κατωφλιών του αλγορίθμου 2 ανά κλάση ταχύτητας: το
+# d = (d_0, ..., d_{C-2}) δίνει ένα κατώφλι σε κάθε κλάση εκτός της πιο αργής (βλ.
+# load_index.class_thresholds). Αντί για πλήρες grid με CI ανά σημείο, ένα Gaussian
+# process πάνω στο log της μέσης αναμονής προτείνει με expected improvement τα
+# επόμενα σημεία, μέσα σε σταθερό προϋπολογισμό replications:
+#
+#   1. αρχικό σχέδιο: το d = 0 και INITIAL_POINTS σημεία Latin hypercube στο πλέγμα 0..D_MAX
+#   2. γύροι: batch BATCH σημείων (προεπιλογή: όσοι οι workers) με kriging believer —
+#      μετά από κάθε επιλογή το GP "πιστεύει" τη δική του πρόβλεψη εκεί, οπότε το
+#      επόμενο σημείο του batch πάει αλλού. Κάθε σημείο τρέχει REPS_PER_POINT replications
+#      και όλο το batch μαζί στο pool.
+#   3. επιβεβαίωση: CONFIRM_SHARE του προϋπολογισμού πάει στα CONFIRM_POINTS καλύτερα
+#      κατά το GP. Η καλύτερη σύγκριση γίνεται με paired-difference CIs.
+#
+# Η replication r κάθε σημείου έχει το seed streams.replication_seed(master, r) (common
+# random numbers, όπως στο selection.py), οπότε οι συγκρίσεις του βήματος 3 είναι ζεύγη.
+# Το GP αγνοεί τη θετική συσχέτιση των σημείων, άρα ο θόρυβος που υποθέτει είναι συντηρητικός.
+# Όλα τα σημεία έχουν το ίδιο warm-up (του d = 0), αλλιώς τα ζεύγη δεν θα ήταν συγκρίσιμα.
+#
+# Αποτέλεσμα: τα βέλτιστα κατώφλια με CI της μέσης αναμονής, και το σύνολο των σημείων
+# που δεν είναι στατιστικά χειρότερα (paired CI της διαφοράς που περιέχει το 0). Τα
+# όρια ανά κλάση πάνω σε αυτό το σύνολο είναι τα όρια εμπιστοσύνης των κατωφλιών.
+#
+# Χρήση: python optimize.py <sim_time> [--budget 200] [--max-threshold 10] [--workers N]
+#                           [--engine ciw|fast] [--cluster spec.json]
+
+ALGORITHM = 2
+BUDGET = 200           # Συνολικές replications (εκτός του MSER-5)
+D_MAX = 10             # Κατώφλια 0..D_MAX ανά κλάση
+REPS_PER_POINT = 4     # Replications ανά αξιολόγηση σημείου
+INITIAL_POINTS = None  # Σημεία του αρχικού σχεδίου (προεπιλογή: 2 * διαστάσεις + 2)
+BATCH = None           # Σημεία ανά γύρο (προεπιλογή: max(workers, 1))
+CONFIRM_SHARE = 0.3    # Μερίδιο του προϋπολογισμού για την επιβεβαίωση
+CONFIRM_POINTS = 5
+MAX_CANDIDATES = 20000  # Πάνω από τόσα σημεία πλέγματος το EI αξιολογείται σε τυχαίο δείγμα
+HYPER_SAMPLES = 200     # Τυχαίες δοκιμές υπερπαραμέτρων του GP (marginal likelihood)
+
+
+def threshold_classes(cluster):
+    """ Ονόματα των κλάσεων με κατώφλι, από την ταχύτερη (η σειρά του load_index.WorkerLoadIndex) """
+    rates = cluster_spec.speed_rates(cluster.service_rates)
+    return [cluster.class_name(cluster.service_rates.index(rate)) for rate in rates[:-1]]
+
+
+# --- GAUSSIAN PROCESS ---
+def matern52(a, b, lengthscales, variance):
+    """ Πυρήνας Matérn 5/2 με ARD length-scales """
+    r = np.sqrt(np.maximum(((a[:, None, :] - b[None, :, :]) / lengthscales) ** 2, 0.0).sum(axis=2))
+    s = math.sqrt(5) * r
+    return variance * (1 + s + s * s / 3) * np.exp(-s)
+
+
+class GaussianProcess:
+    """ GP με ετεροσκεδαστικό θόρυβο (γνωστή διασπορά ανά παρατήρηση) πάνω σε τυποποιημένα y """
+
+    def __init__(self, x, y, noise, rng):
+        self.x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.offset = float(y.mean())
+        self.scale = float(y.std()) or 1.0
+        self.y = (y - self.offset) / self.scale
+        self.noise = np.asarray(noise, dtype=float) / self.scale ** 2
+        self.lengthscales, self.variance = self._fit(rng)
+        self._factor()
+
+    def _log_likelihood(self, lengthscales, variance):
+        k = matern52(self.x, self.x, lengthscales, variance) + np.diag(self.noise + 1e-8)
+        try:
+            chol = np.linalg.cholesky(k)
+        except np.linalg.LinAlgError:
+            return -math.inf
+        alpha = np.linalg.solve(chol.T, np.linalg.solve(chol, self.y))
+        return float(-0.5 * self.y @ alpha - np.log(np.diag(chol)).sum())
+
+    def _fit(self, rng):
+        """ Μέγιστη marginal likelihood με τυχαία αναζήτηση σε log-κλίμακα """
+        dims = self.x.shape[1]
+        best = (np.full(dims, 0.3), 1.0)
+        best_ll = self._log_likelihood(*best)
+        for _ in range(HYPER_SAMPLES):
+            lengthscales = np.exp(rng.uniform(math.log(0.05), math.log(3.0), dims))
+            variance = math.exp(rng.uniform(math.log(0.1), math.log(10.0)))
+            ll = self._log_likelihood(lengthscales, variance)
+            if ll > best_ll:
+                best, best_ll = (lengthscales, variance), ll
+        return best
+
+    def _factor(self):
+        k = matern52(self.x, self.x, self.lengthscales, self.variance) + np.diag(self.noise + 1e-8)
+        self.chol = np.linalg.cholesky(k)
+        self.alpha = np.linalg.solve(self.chol.T, np.linalg.solve(self.chol, self.y))
+
+    def condition(self, x, y):
+        """ Προσθήκη παρατήρησης χωρίς θόρυβο και με τις ίδιες υπερπαραμέτρους (kriging believer) """
+        self.x = np.vstack([self.x, x])
+        self.y = np.append(self.y, (y - self.offset) / self.scale)
+        self.noise = np.append(self.noise, 0.0)
+        self._factor()
+
+    def predict(self, x):
+        """ (μέσος, τυπική απόκλιση) της πρόβλεψης στην αρχική κλίμακα του y """
+        ks = matern52(np.asarray(x, dtype=float), self.x, self.lengthscales, self.variance)
+        mean = ks @ self.alpha
+        v = np.linalg.solve(self.chol, ks.T)
+        var = np.maximum(self.variance - (v * v).sum(axis=0), 1e-12)
+        return mean * self.scale + self.offset, np.sqrt(var) * self.scale
+
+
+def expected_improvement(mean, std, best):
+    """ EI για ελαχιστοποίηση """
+    normal = NormalDist()
+    z = (best - mean) / std
+    cdf = np.array([normal.cdf(v) for v in z])
+    pdf = np.exp(-0.5 * z * z) / math.sqrt(2 * math.pi)
+    return (best - mean) * cdf + std * pdf
+
+
+# --- ΑΝΑΖΗΤΗΣΗ ---
+def latin_hypercube(n, dims, d_max, rng):
+    """ n σημεία του πλέγματος 0..d_max με ένα σημείο ανά διάστημα σε κάθε διάσταση """
+    columns = [(rng.permutation(n) + rng.uniform(size=n)) / n for _ in range(dims)]
+    return [tuple(int(min(math.floor(u * (d_max + 1)), d_max)) for u in point) for point in zip(*columns)]
+
+
+def candidates(dims, d_max, rng):
+    """ Τα σημεία του πλέγματος (ή τυχαίο δείγμα MAX_CANDIDATES αν είναι περισσότερα) """
+    if (d_max + 1) ** dims <= MAX_CANDIDATES:
+        return list(itertools.product(range(d_max + 1), repeat=dims))
+    return list({tuple(int(v) for v in row) for row in rng.integers(0, d_max + 1, size=(MAX_CANDIDATES, dims))})
+
+
+def log_observation(waits):
+    """ (log της μέσης αναμονής, διασπορά της εκτίμησης με τη μέθοδο δέλτα) """
+    waits = np.asarray(waits, dtype=float)
+    mean = max(float(waits.mean()), 1e-12)
+    var = float(waits.var(ddof=1)) / len(waits) if len(waits) > 1 else mean ** 2
+    return math.log(mean), var / mean ** 2
+
+
+def fit_surrogate(observations, d_max, rng):
+    points = list(observations)
+    x = np.array(points, dtype=float) / d_max
+    y, noise = zip(*(log_observation(observations[p]) for p in points))
+    return GaussianProcess(x, y, noise, rng)
+
+
+def propose_batch(gp, observations, dims, d_max, size, rng):
+    """ size νέα σημεία με το μέγιστο EI (kriging believer ανάμεσα στις επιλογές) """
+    pool = [c for c in candidates(dims, d_max, rng) if c not in observations]
+    if not pool:
+        return []
+    x = np.array(pool, dtype=float) / d_max
+    best = float(gp.predict(np.array(list(observations), dtype=float) / d_max)[0].min())
+    batch = []
+    for _ in range(min(size, len(pool))):
+        mean, std = gp.predict(x)
+        ei = expected_improvement(mean, std, best)
+        for i in batch:
+            ei[i] = -math.inf
+        i = int(np.argmax(ei))
+        batch.append(i)
+        gp.condition(x[i], float(mean[i]))
+        best = min(best, float(mean[i]))
+    return [pool[i] for i in batch]
+
+
+def evaluate(runner, observations, points, reps):
+    """ Replications 1..reps (πέρα από όσες υπάρχουν) για κάθε σημείο, όλα μαζί στο pool """
+    tasks = [(p, rep) for p in points for rep in range(len(observations[p]) + 1, reps + 1)]
+    for (p, _), value in zip(tasks, runner.run([((ALGORITHM, p), rep) for p, rep in tasks])):
+        observations[p].append(value)
+    return len(tasks)
+
+
+def confirm(runner, observations, ranked, budget):
+    """ Ισομερής επέκταση των ranked με τα ίδια seeds (CRN) μέχρι να τελειώσει ο προϋπολογισμός """
+    used = 0
+    target = max(len(observations[p]) for p in ranked)
+    while True:
+        behind = sum(max(target - len(observations[p]), 0) for p in ranked)
+        if behind > budget - used:
+            break
+        used += evaluate(runner, observations, ranked, target)
+        target += 1
+    return used
+
+
+def optimize_thresholds(sim_duration, budget=BUDGET, d_max=D_MAX, reps_per_point=REPS_PER_POINT, workers=1,
+                        master_seed=streams.MASTER_SEED, engine=None, cluster=None, cache=None, warmup='auto',
+                        on_round=None):
+    """ Βέλτιστα κατώφλια του αλγορίθμου 2 ανά κλάση· επιστρέφει dict με το σημείο και τα όρια εμπιστοσύνης
+
+    on_round(replications μέχρι τώρα, τρέχον καλύτερο σημείο) καλείται μετά από κάθε γύρο.
+    """
+    if reps_per_point < 2:
+        raise ValueError("reps_per_point must be at least 2")
+    engine = engine or simulation.ENGINE
+    cluster = cluster or simulation.CLUSTER
+    dims = len(threshold_classes(cluster))
+    if dims < 1:
+        raise ValueError("Per-class thresholds need at least two worker speed classes")
+    rng = np.random.default_rng(master_seed)
+    started = time.time()
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=simulation.init_worker,
+                                   initargs=(engine, cluster.to_dict()))
+    else:
+        simulation.init_worker(engine, cluster.to_dict())
+    origin = (0,) * dims
+    observations = defaultdict(list)
+    used = 0
+    try:
+        info = simulation.resolve_warmup(warmup, sim_duration, ALGORITHM, origin, master_seed, cache)
+        runner = ReplicationRunner(sim_duration, pool, master_seed, engine, cache,
+                                   defaultdict(lambda: info['warmup_time']))
+        search_budget = budget - int(CONFIRM_SHARE * budget)
+        n_initial = INITIAL_POINTS or 2 * dims + 2
+        design = [origin] + [p for p in latin_hypercube(n_initial, dims, d_max, rng) if p != origin]
+        design = list(dict.fromkeys(design))[:max(search_budget // reps_per_point, 2)]
+        used += evaluate(runner, observations, design, reps_per_point)
+        batch_size = BATCH or max(workers, 1)
+        while used + reps_per_point <= search_budget:
+            gp = fit_surrogate(observations, d_max, rng)
+            size = min(batch_size, (search_budget - used) // reps_per_point)
+            batch = propose_batch(gp, observations, dims, d_max, size, rng)
+            if not batch:
+                break
+            used += evaluate(runner, observations, batch, reps_per_point)
+            if on_round is not None:
+                on_round(used, min(observations, key=lambda p: np.mean(observations[p])))
+
+        gp = fit_surrogate(observations, d_max, rng)
+        evaluated = list(observations)
+        predicted = gp.predict(np.array(evaluated, dtype=float) / d_max)[0]
+        ranked = [evaluated[i] for i in np.argsort(predicted)[:CONFIRM_POINTS]]
+        used += confirm(runner, observations, ranked, budget - used)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Το καλύτερο με τις ίδιες replications (ζεύγη), και όσα δεν διαφέρουν στατιστικά από αυτό
+    n = min(len(observations[p]) for p in ranked)
+    best = min(ranked, key=lambda p: np.mean(observations[p][:n]))
+    mean, hw = confidence.mean_ci(observations[best])
+    comparisons = []
+    for p in ranked:
+        diff, diff_hw = (0.0, 0.0) if p == best else confidence.paired_difference_ci(observations[p][:n],
+                                                                                    observations[best][:n])
+        comparisons.append({'thresholds': list(p), 'replications': n, 'mean_wait': float(np.mean(observations[p][:n])),
+                            'difference': diff, 'difference_half_width': diff_hw,
+                            'indistinguishable': diff - diff_hw <= 0})
+    plausible = [c['thresholds'] for c in comparisons if c['indistinguishable']]
+    sequential = sequential_estimate([observations[p] for p in evaluated])
+    grid_points = (d_max + 1) ** dims
+    return {
+        'algorithm': ALGORITHM,
+        'classes': threshold_classes(cluster),
+        'thresholds': list(best),
+        'mean_wait': mean,
+        'half_width': hw,
+        'threshold_bounds': [[min(t[c] for t in plausible), max(t[c] for t in plausible)] for c in range(dims)],
+        'confirmed': comparisons,
+        'evaluated': [{'thresholds': list(p), 'replications': len(observations[p]),
+                       'mean_wait': float(np.mean(observations[p]))} for p in evaluated],
+        'gp': {'lengthscales': [float(v) * d_max for v in gp.lengthscales], 'variance': float(gp.variance)},
+        'budget': budget,
+        'replications': used,
+        'simulated_replications': runner.replications,
+        'grid_points': grid_points,
+        # Το πλήρες πλέγμα με τον κανόνα 5% ανά σημείο (μέσος των εκτιμήσεων στα σημεία που αξιολογήθηκαν)
+        'grid_replications': int(round(grid_points * float(np.mean(sequential)))),
+        'd_max': d_max,
+        'reps_per_point': reps_per_point,
+        'warmup': info['warmup_time'],
+        'wall_seconds': time.time() - started,
+        'sim_time': sim_duration,
+        'engine': engine,
+        'master_seed': master_seed,
+        'cluster': cluster.to_dict(),
+    }
+
+
+def print_optimum(result):
+    names = result['classes']
+    print(f"\n{'Thresholds':<16} | {'Reps':<5} | {'Mean Wait':<10} | {'Diff vs best':<22} | Same as best")
+    print("-" * 74)
+    for row in result['confirmed']:
+        thresholds = ",".join(str(t) for t in row['thresholds'])
+        diff = f"{row['difference']:+.4f} ± {row['difference_half_width']:.4f}"
+        print(f"{thresholds:<16} | {row['replications']:<5} | {row['mean_wait']:<10.4f} | {diff:<22} | "
+              f"{'yes' if row['indistinguishable'] else 'no'}")
+    best = ", ".join(f"{name}={t}" for name, t in zip(names, result['thresholds']))
+    bounds = ", ".join(f"{name} {lo}..{hi}" for name, (lo, hi) in zip(names, result['threshold_bounds']))
+    print(f"\nOptimal thresholds: {best} (mean wait {result['mean_wait']:.4f} ± {result['half_width']:.4f} s)")
+    print(f"Thresholds not significantly worse (95% paired CIs): {bounds}")
+    print(f"Replications: {result['replications']} over {len(result['evaluated'])} points "
+          f"(full grid of {result['grid_points']} points with the {simulation.DESIRED_REL_ERROR:.0%} rule: "
+          f"~{result['grid_replications']}, {result['replications'] / result['grid_replications']:.1%}), "
+          f"wall time {result['wall_seconds']:.1f} s")
+
+
+def write_optimum(results_dir, result):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, 'optimize_thresholds.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(result, f, indent=2)
+    return path
+
+
+# --- MAIN ---
+def main(argv):
+    parser = argparse.ArgumentParser(usage="python optimize.py <sim_time> [--budget N] [--max-threshold D] [--reps-per-point N] [--workers N] [--engine ciw|fast] [--seed S] [--cluster spec.json] [--warmup auto|SECONDS] [--no-cache] [--results-dir DIR]")
+    parser.add_argument('sim_time', type=float)
+    parser.add_argument('--budget', type=int, default=BUDGET, help="συνολικές replications")
+    parser.add_argument('--max-threshold', type=int, default=D_MAX, help="κατώφλια 0..D ανά κλάση")
+    parser.add_argument('--reps-per-point', type=int, default=REPS_PER_POINT)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--engine', choices=['ciw', 'fast'], default=simulation.ENGINE)
+    parser.add_argument('--seed', type=int, default=streams.MASTER_SEED)
+    parser.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    parser.add_argument('--warmup', type=simulation.warmup_arg, default='auto')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--results-dir', default=results_store.RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    cluster = cluster_spec.load_cluster_spec(args.cluster) if args.cluster else simulation.CLUSTER
+    print(f"--- Threshold optimization for algorithm {ALGORITHM} ({len(threshold_classes(cluster))} thresholds, "
+          f"budget {args.budget} replications, Time: {args.sim_time}, Engine: {args.engine}) ---")
+    cache = None if args.no_cache else replication_cache.ReplicationCache()
+
+    def on_round(used, best):
+        print(f"   -> {used} replications, best so far: {','.join(str(t) for t in best)}", end='\r', flush=True)
+
+    try:
+        result = optimize_thresholds(args.sim_time, args.budget, args.max_threshold, args.reps_per_point,
+                                     args.workers, args.seed, args.engine, cluster, cache, args.warmup, on_round)
+    finally:
+        if cache is not None:
+            cache.close()
+    print_optimum(result)
+    print(f"Results written to {write_optimum(args.results_dir, result)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
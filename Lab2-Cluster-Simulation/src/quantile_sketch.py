@@ -0,0 +1,116 @@
+import math
+
+import numpy as np
+
+# Mergeable sketch ποσοστημορίων με φραγμένη μνήμη (στο πνεύμα του DDSketch):
+# κάθε τιμή x > 0 πηγαίνει στο λογαριθμικό bucket k = ceil(log_γ x), γ = (1+α)/(1-α),
+# οπότε κάθε ποσοστημόριο επιστρέφεται με σχετικό σφάλμα το πολύ α. Οι (πολλές)
+# μηδενικές αναμονές μετράνε σε ξεχωριστό bucket. Δύο sketches με το ίδιο α
+# συγχωνεύονται προσθέτοντας τους μετρητές, άρα ανά replication, ανά worker process
+# και συνολικά η μνήμη είναι O(buckets) ανεξάρτητα από τον ορίζοντα.
+
+RELATIVE_ACCURACY = 0.01
+MAX_BUCKETS = 2048  # Πάνω από αυτό συγχωνεύονται τα μικρότερα buckets (χάνεται ακρίβεια μόνο στο κάτω άκρο)
+MIN_VALUE = 1e-9    # Τιμές <= MIN_VALUE μετράνε ως 0
+QUANTILES = {'p50': 0.50, 'p95': 0.95, 'p99': 0.99}
+
+
+class QuantileSketch:
+    """ Λογαριθμικό ιστόγραμμα με σχετικό σφάλμα ποσοστημορίων <= relative_accuracy """
+    __slots__ = ('relative_accuracy', 'gamma', '_inv_log_gamma', 'buckets', 'zero_count', 'count')
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._inv_log_gamma = 1.0 / math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, x):
+        self.count += 1
+        if x <= MIN_VALUE:
+            self.zero_count += 1
+            return
+        k = math.ceil(math.log(x) * self._inv_log_gamma)
+        buckets = self.buckets
+        buckets[k] = buckets.get(k, 0) + 1
+        if len(buckets) > MAX_BUCKETS:
+            self._collapse()
+
+    def add_many(self, values):
+        """ Vectorized add για πίνακα τιμών (Lindley path) """
+        x = np.asarray(values, dtype=float).ravel()
+        positive = x[x > MIN_VALUE]
+        self.count += len(x)
+        self.zero_count += len(x) - len(positive)
+        if len(positive):
+            keys, counts = np.unique(np.ceil(np.log(positive) * self._inv_log_gamma).astype(np.int64),
+                                     return_counts=True)
+            buckets = self.buckets
+            for k, c in zip(keys.tolist(), counts.tolist()):
+                buckets[k] = buckets.get(k, 0) + c
+            if len(buckets) > MAX_BUCKETS:
+                self._collapse()
+
+    def merge(self, other):
+        """ Προσθέτει τους μετρητές του other (ίδιο relative_accuracy) """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        buckets = self.buckets
+        for k, c in other.buckets.items():
+            buckets[k] = buckets.get(k, 0) + c
+        self.zero_count += other.zero_count
+        self.count += other.count
+        if len(buckets) > MAX_BUCKETS:
+            self._collapse()
+        return self
+
+    def _collapse(self):
+        # Τα μικρότερα buckets ενώνονται στο πρώτο που μένει (όπως το collapsing lowest του DDSketch)
+        keys = sorted(self.buckets)
+        excess = keys[:len(keys) - MAX_BUCKETS + 1]
+        target = keys[len(excess)]
+        self.buckets[target] += sum(self.buckets.pop(k) for k in excess)
+
+    def quantile(self, q):
+        """ Το q-ποσοστημόριο (0 <= q <= 1), ή NaN για άδειο sketch """
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if rank < seen:
+                # Το μέσο (ως προς το σχετικό σφάλμα) σημείο του (γ^(k-1), γ^k]
+                return 2 * self.gamma ** k / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def quantiles(self):
+        """ {'p50', 'p95', 'p99'} """
+        return {name: self.quantile(q) for name, q in QUANTILES.items()}
+
+    def to_dict(self):
+        """ Μορφή για JSON (cache, .jsonl) """
+        keys = sorted(self.buckets)
+        return {'relative_accuracy': self.relative_accuracy, 'zero_count': self.zero_count,
+                'count': self.count, 'keys': keys, 'counts': [self.buckets[k] for k in keys]}
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data['relative_accuracy'])
+        sketch.buckets = dict(zip(data['keys'], data['counts']))
+        sketch.zero_count = data['zero_count']
+        sketch.count = data['count']
+        return sketch
+
+
+def merge_all(sketches):
+    """ Ένα νέο sketch με τη συγχώνευση όλων (π.χ. όλων των replications) """
+    sketches = list(sketches)
+    merged = QuantileSketch(sketches[0].relative_accuracy if sketches else RELATIVE_ACCURACY)
+    for sketch in sketches:
+        merged.merge(sketch)
+    return merged
@@ -0,0 +1,224 @@
+import argparse
+import math
+import os
+import sys
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+import streams
+import trace_sink
+
+# Trace-driven replay: καταγεγραμμένες αφίξεις (timestamps) και μεγέθη εργασιών
+# αντί για Exponential αφίξεις / εξυπηρετήσεις. Το trace έχει τη στηλοθετημένη
+# μορφή του trace_sink.py (arrival.bin, size.bin, meta.json) και διαβάζεται με
+# numpy.memmap σε chunks των CHUNK_SIZE εργασιών, οπότε η μνήμη μένει φραγμένη
+# ανεξάρτητα από το μήκος του (10^8+ εργασίες). Ένα CSV μετατρέπεται μία φορά
+# (python replay.py convert jobs.csv DIR).
+#
+# Το μέγεθος είναι σε μονάδες "μέσης εργασίας": ο worker με ρυθμό μ την εξυπηρετεί
+# σε size / μ, δηλαδή η κλάση ταχύτητας κλιμακώνει τον χρόνο εξυπηρέτησης. Με την
+# προεπιλεγμένη κανονικοποίηση (size_scale = 1 / μέσο μέγεθος) ο μέσος χρόνος στον
+# worker είναι 1/μ, όπως στο εκθετικό μοντέλο.
+#
+# Παραλλαγές ανά replication (η τυχαιότητα από το substream αφίξεων του seed, άρα
+# ίδια για όλες τις πολιτικές με το ίδιο seed — common random numbers):
+#   shift:     το trace ξεκινάει από τυχαία εργασία και συνεχίζει κυκλικά
+#   bootstrap: moving-block bootstrap, block των BLOCK_JOBS διαδοχικών εργασιών
+#              από τυχαίες θέσεις (κρατάει τη συσχέτιση μέσα στο block)
+#   exact:     το trace ως έχει, από την αρχή (όλες οι replications ίδιες, οπότε τρέχει
+#              μία και το CI αναφέρεται ως n/a, βλ. simulation.exact_replay)
+
+COLUMNS = {'arrival': np.float64, 'size': np.float64}
+CHUNK_SIZE = trace_sink.CHUNK_SIZE
+BLOCK_JOBS = 4096
+MODES = ('shift', 'bootstrap', 'exact')
+
+_opened = {}  # directory -> (στήλες, meta), ανά process
+
+
+# --- ΜΕΤΑΤΡΟΠΗ ---
+def convert_csv(csv_path, directory, arrival_column='arrival', size_column='size', normalize=True,
+                chunk_size=CHUNK_SIZE):
+    """ CSV (μία εργασία ανά γραμμή, με header) -> replay trace στο directory· επιστρέφει το meta
+
+    Διαβάζεται σε chunks, οπότε και η μετατροπή έχει φραγμένη μνήμη. Οι αφίξεις πρέπει
+    να είναι σε αύξουσα σειρά (όπως σε ένα log).
+    """
+    os.makedirs(directory, exist_ok=True)
+    files = {name: open(os.path.join(directory, name + '.bin'), 'wb') for name in COLUMNS}
+    count, size_sum, first, last = 0, 0.0, None, -math.inf
+    try:
+        for chunk in pd.read_csv(csv_path, usecols=[arrival_column, size_column], chunksize=chunk_size):
+            arrival = chunk[arrival_column].to_numpy(np.float64)
+            size = chunk[size_column].to_numpy(np.float64)
+            if len(arrival) == 0:
+                continue
+            if arrival[0] < last or np.any(np.diff(arrival) < 0):
+                raise ValueError(f"Arrival timestamps in {csv_path} are not sorted (near row {count + 1})")
+            if np.any(size < 0) or np.any(np.isnan(size)):
+                raise ValueError(f"Negative or missing job sizes in {csv_path} (near row {count + 1})")
+            arrival.tofile(files['arrival'])
+            size.tofile(files['size'])
+            first = arrival[0] if first is None else first
+            last = arrival[-1]
+            count += len(arrival)
+            size_sum += float(size.sum())
+    finally:
+        for f in files.values():
+            f.close()
+    if count < 2:
+        raise ValueError(f"A replay trace needs at least 2 jobs ({csv_path} has {count})")
+    mean_size = size_sum / count
+    return write_meta(directory, count, float(first), float(last), mean_size,
+                      1.0 / mean_size if normalize and mean_size > 0 else 1.0, os.path.abspath(csv_path))
+
+
+def write_arrays(directory, arrival, size, normalize=True, source=None):
+    """ Replay trace από πίνακες (π.χ. ένα συνθετικό ή ήδη φορτωμένο trace) """
+    os.makedirs(directory, exist_ok=True)
+    arrival = np.asarray(arrival, dtype=np.float64)
+    size = np.asarray(size, dtype=np.float64)
+    arrival.tofile(os.path.join(directory, 'arrival.bin'))
+    size.tofile(os.path.join(directory, 'size.bin'))
+    mean_size = float(size.mean())
+    return write_meta(directory, len(arrival), float(arrival[0]), float(arrival[-1]), mean_size,
+                      1.0 / mean_size if normalize and mean_size > 0 else 1.0, source)
+
+
+def write_meta(directory, count, start, end, mean_size, size_scale, source):
+    meta = {'version': trace_sink.TRACE_VERSION, 'kind': 'replay', 'count': count, 'byteorder': sys.byteorder,
+            'columns': {name: np.dtype(dtype).str for name, dtype in COLUMNS.items()},
+            'start': start, 'end': end, 'mean_size': mean_size, 'size_scale': size_scale, 'source': source}
+    trace_sink.write_meta(directory, meta)
+    return meta
+
+
+def open_replay(directory):
+    """ (στήλες ως memmap, meta) ενός replay trace (ένα άνοιγμα ανά process) """
+    directory = os.path.abspath(directory)
+    if directory not in _opened:
+        columns, meta = trace_sink.open_trace(directory)
+        if meta.get('kind') != 'replay':
+            raise ValueError(f"{directory} is not a replay trace (see replay.py convert)")
+        _opened[directory] = (columns, meta)
+    return _opened[directory]
+
+
+def arrival_rate(meta):
+    """ Μέσος ρυθμός αφίξεων του trace """
+    return (meta['count'] - 1) / (meta['end'] - meta['start'])
+
+
+def replay_key(directory, mode):
+    """ Ό,τι καθορίζει ένα replay για τη cache των replications (βλ. simulation.cache_key) """
+    _, meta = open_replay(directory)
+    return {'source': os.path.abspath(directory), 'mode': mode, 'count': meta['count'],
+            'start': meta['start'], 'end': meta['end'], 'size_scale': meta['size_scale'],
+            'mtime': os.path.getmtime(os.path.join(directory, 'meta.json'))}
+
+
+# --- ΡΟΗ ΕΡΓΑΣΙΩΝ ---
+class ReplayWorkload:
+    """ Ενδιάμεσοι χρόνοι και μεγέθη εργασιών από ένα replay trace, ένα chunk του memmap τη φορά """
+
+    def __init__(self, directory, mode, seed, antithetic=False, block_jobs=BLOCK_JOBS):
+        if mode not in MODES:
+            raise ValueError(f"Unknown replay mode: {mode}")
+        columns, meta = open_replay(directory)
+        self.arrivals = columns['arrival']
+        self.sizes = columns['size']
+        self.count = meta['count']
+        self.size_scale = meta['size_scale']
+        self.arrival_rate = arrival_rate(meta)
+        self.mode = mode
+        self.block_jobs = min(block_jobs, self.count)
+        self.stream = streams.VariateStream(streams.arrival_stream(seed), antithetic)
+        self.position = int(self.stream.random() * self.count) if mode == 'shift' else 0
+        self.pending_size = 0.0  # Μέγεθος της εργασίας της οποίας ο χρόνος άφιξης δόθηκε τελευταίος
+        self.worker_sizes = None
+        # Τα chunks αποθηκεύονται ανάποδα, ώστε κάθε εργασία να βγαίνει με list.pop()
+        self._gaps = []
+        self._sizes = []
+
+    def _load(self, lo, hi):
+        """ Οι εργασίες lo..hi-1 του trace ως (ενδιάμεσοι χρόνοι, μεγέθη) """
+        if lo > 0:
+            gaps = np.diff(self.arrivals[lo - 1:hi])
+        else:
+            # Η πρώτη εργασία του trace δεν έχει προηγούμενη: μέσος ενδιάμεσος χρόνος
+            gaps = np.concatenate(([1.0 / self.arrival_rate], np.diff(self.arrivals[:hi])))
+        self._gaps = gaps[::-1].tolist()
+        self._sizes = (self.sizes[lo:hi] * self.size_scale)[::-1].tolist()
+
+    def _refill(self):
+        if self.mode == 'bootstrap':
+            lo = int(self.stream.random() * (self.count - self.block_jobs + 1))
+            self._load(lo, lo + self.block_jobs)
+            return True
+        if self.position >= self.count:
+            if self.mode == 'exact':
+                return False
+            self.position = 0  # shift: κυκλικά από την αρχή
+        hi = min(self.position + CHUNK_SIZE, self.count)
+        self._load(self.position, hi)
+        self.position = hi
+        return True
+
+    def interarrival(self, rate=None):
+        """ Χρόνος μέχρι την επόμενη εργασία (inf όταν τελειώσει ένα exact replay)· το rate αγνοείται """
+        try:
+            gap = self._gaps.pop()
+        except IndexError:
+            if not self._refill():
+                return math.inf
+            gap = self._gaps.pop()
+        self.pending_size = self._sizes.pop()
+        return gap
+
+    def bind(self, router, n_workers):
+        """ (next_arrival, router, service_draws) για το run_until της native μηχανής
+
+        Ο router κρατάει το μέγεθος κάθε εργασίας στην ουρά μεγεθών του worker της και
+        κάθε service_draws[k](rate) δίνει το επόμενο: κάθε worker είναι FIFO, άρα οι
+        εξυπηρετήσεις του ξεκινάνε με τη σειρά των αφίξεών του. Χρόνος = size / rate.
+        """
+        if self.worker_sizes is None:
+            self.worker_sizes = [deque() for _ in range(n_workers)]
+        worker_sizes = self.worker_sizes
+
+        def route(index):
+            k = router(index)
+            worker_sizes[k].append(self.pending_size)
+            return k
+
+        service_draws = [lambda rate, pending=pending: pending.popleft() / rate for pending in worker_sizes]
+        return self.interarrival, route, service_draws
+
+
+# --- CLI ---
+def main(argv):
+    parser = argparse.ArgumentParser(usage="python replay.py convert <jobs.csv> <DIR> [--arrival-column C] [--size-column C] [--no-normalize] | python replay.py info <DIR>")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="CSV -> replay trace (arrival.bin, size.bin, meta.json)")
+    convert.add_argument('csv')
+    convert.add_argument('directory')
+    convert.add_argument('--arrival-column', default='arrival')
+    convert.add_argument('--size-column', default='size')
+    convert.add_argument('--no-normalize', action='store_true', help="χωρίς κλιμάκωση των μεγεθών σε μέσο 1")
+    info = commands.add_parser('info', help="σύνοψη ενός replay trace")
+    info.add_argument('directory')
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        meta = convert_csv(args.csv, args.directory, args.arrival_column, args.size_column, not args.no_normalize)
+    else:
+        _, meta = open_replay(args.directory)
+    print(f"{meta['count']} jobs over {meta['end'] - meta['start']:.1f} s "
+          f"(arrival rate {arrival_rate(meta):.4f} jobs/s, mean size {meta['mean_size']:.4f}, "
+          f"size scale {meta['size_scale']:.4f})")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
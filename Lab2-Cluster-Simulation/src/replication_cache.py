@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+# Μόνιμη cache αποτελεσμάτων replications. Κάθε replication είναι ντετερμινιστική
+# συνάρτηση των παραμέτρων της (δίκτυο, πολιτική, d, ορίζοντας, warm-up, seed), οπότε
+# το αποτέλεσμά της αποθηκεύεται με κλειδί το hash αυτών των παραμέτρων.
+# Το index είναι ένας πίνακας SQLite με primary key το hash: η αναζήτηση είναι
+# O(log n) και το άνοιγμα της cache δεν διαβάζει τις αποθηκευμένες εγγραφές.
+# Το συνολικό μέγεθος διαβάζεται μία φορά στο άνοιγμα και ενημερώνεται σε κάθε put.
+# Όταν ξεπεράσει το max_bytes, ξαναμετριέται (άλλο process μπορεί να έχει γράψει) και
+# οι LRU εγγραφές διαγράφονται μέχρι το EVICT_TO του ορίου, ώστε το O(n) πέρασμα να
+# γίνεται μία φορά ανά ~10% της χωρητικότητας και όχι σε κάθε put.
+# Τα hits δεν γράφουν αμέσως το last_used: κρατιούνται στη μνήμη και γράφονται μαζί
+# (ένα commit) στο επόμενο put, στο close ή κάθε TOUCH_BATCH hits.
+
+CACHE_VERSION = 3  # Αλλάζει όταν αλλάζει το μοντέλο ή ο ορισμός των στατιστικών
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'replications.sqlite')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+EVICT_TO = 0.9  # Κλάσμα του max_bytes που μένει μετά από eviction
+TOUCH_BATCH = 256  # Hits ανά εγγραφή των last_used
+
+
+def replication_key(params):
+    """ SHA-256 του κανονικοποιημένου JSON των παραμέτρων μιας replication """
+    payload = json.dumps({'version': CACHE_VERSION, **params}, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ReplicationCache:
+    """ Αποτελέσματα replications (dicts) ανά κλειδί, με LRU eviction όταν ξεπεραστεί το max_bytes """
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._touched = {}
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS replications (
+                               key TEXT PRIMARY KEY,
+                               result TEXT NOT NULL,
+                               size INTEGER NOT NULL,
+                               last_used REAL NOT NULL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS replications_last_used ON replications (last_used)")
+        self.db.commit()
+        self._size = self._stored_bytes()
+
+    def get(self, key):
+        row = self.db.execute("SELECT result FROM replications WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_BATCH:
+            self.flush()
+        return json.loads(row[0])
+
+    def flush(self):
+        """ Γράφει τα last_used των hits που δεν έχουν γραφτεί ακόμη """
+        if self._touched:
+            self.db.executemany("UPDATE replications SET last_used = ? WHERE key = ?",
+                                [(used, key) for key, used in self._touched.items()])
+            self._touched = {}
+        self.db.commit()
+
+    def put(self, key, result):
+        data = json.dumps(result)
+        old = self.db.execute("SELECT size FROM replications WHERE key = ?", (key,)).fetchone()
+        self.db.execute("INSERT OR REPLACE INTO replications (key, result, size, last_used) VALUES (?, ?, ?, ?)",
+                        (key, data, len(data), time.time()))
+        self._size += len(data) - (old[0] if old else 0)
+        self._touched.pop(key, None)
+        if self._size > self.max_bytes:
+            self.evict()
+        self.flush()
+
+    def _stored_bytes(self):
+        return self.db.execute("SELECT COALESCE(SUM(size), 0) FROM replications").fetchone()[0]
+
+    @property
+    def size_bytes(self):
+        return self._size
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM replications").fetchone()[0]
+
+    def evict(self):
+        """ Διαγράφει τις λιγότερο πρόσφατα χρησιμοποιημένες εγγραφές μέχρι size <= EVICT_TO * max_bytes """
+        self.flush()
+        self._size = self._stored_bytes()
+        if self._size <= self.max_bytes:
+            return
+        excess = self._size - int(EVICT_TO * self.max_bytes)
+        freed = 0
+        victims = []
+        for key, size in self.db.execute("SELECT key, size FROM replications ORDER BY last_used"):
+            victims.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        self.db.executemany("DELETE FROM replications WHERE key = ?", victims)
+        self._size -= freed
+
+    def close(self):
+        self.flush()
+        self.db.close()
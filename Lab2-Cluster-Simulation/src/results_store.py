@@ -0,0 +1,108 @@
+import glob
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Αποτελέσματα σε μορφή για μηχανές αντί για ελεύθερο κείμενο. Ανά πείραμα (algo, d):
+#   <name>.jsonl : μία γραμμή JSON ανά replication (seed, mean_wait, utilizations, ...)
+#   <name>.npz   : στηλοθετημένη σύνοψη (πίνακες ανά replication, CIs, ποσοστημόρια, metadata)
+# Το load_summaries() διαβάζει όλα τα .npz ενός καταλόγου σε ένα DataFrame.
+
+RESULTS_DIR = 'results'
+
+
+def config_name(algo, d):
+    return f"algo{algo}_d{d}"
+
+
+def write_config(results_dir, algo, d, results, summary, metadata, plan=None):
+    """ Γράφει το .jsonl και το .npz του πειράματος και επιστρέφει το path του .npz
+
+    results: τα dicts των replications (με τη σειρά τους), summary: simulation.summarize_results,
+    metadata: παράμετροι της εκτέλεσης (μηχανή, εκτιμητής, cluster, ...),
+    plan: τα (seed, antithetic) των replications (simulation.replication_plan).
+    """
+    os.makedirs(results_dir, exist_ok=True)
+    base = os.path.join(results_dir, config_name(algo, d))
+    metadata = {'algo': algo, 'd': d, 'created': time.time(), **metadata}
+    plan = plan or [(None, False)] * len(results)
+
+    with open(base + '.jsonl', 'w', encoding='utf-8') as f:
+        for rep, (result, (seed, antithetic)) in enumerate(zip(results, plan), start=1):
+            f.write(json.dumps({'replication': rep, 'seed': seed, 'antithetic': antithetic, **result}) + "\n")
+
+    # Ποσοστημόρια: ομάδες ('all' + κλάσεις) x (p50, p95, p99)
+    groups = list(summary['wait_quantiles'])
+    quantile_stat = lambda key: np.array([[q[key] for q in summary['wait_quantiles'][g].values()]
+                                          for g in groups])
+    np.savez(
+        base + '.npz',
+        mean_wait=np.array([r['mean_wait'] for r in results]),
+        throughput=np.array([r['throughput'] for r in results]),
+        utilizations=np.array([r['utilizations'] for r in results]),
+        controls=np.array([r['controls'] for r in results]),
+        wait_mean=summary['mean_wait'],
+        wait_half_width=summary['half_width'],
+        rel_error=summary['rel_error'],
+        throughput_mean=summary['throughput'],
+        throughput_half_width=summary['throughput_half_width'],
+        node_utilization=np.array(summary['utilizations']),
+        node_utilization_half_width=np.array(summary['utilization_half_widths']),
+        total_utilization=summary['total_utilization'],
+        wait_quantiles=np.array([r['wait_quantiles'] for r in results]),
+        quantile_groups=np.array(groups),
+        quantile_mean=quantile_stat('mean'),
+        quantile_half_width=quantile_stat('half_width'),
+        quantile_pooled=quantile_stat('pooled'),
+        metadata=json.dumps(metadata),
+    )
+    return base + '.npz'
+
+
+def load_config(path):
+    """ Το .npz ενός πειράματος ως dict (πίνακες + 'metadata' ως dict) """
+    with np.load(path) as data:
+        out = {key: data[key] for key in data.files}
+    out['metadata'] = json.loads(str(out['metadata']))
+    return out
+
+
+def load_replications(path):
+    """ Οι γραμμές του .jsonl ενός πειράματος """
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def load_summaries(results_dir=RESULTS_DIR):
+    """ Ένα DataFrame με μία γραμμή ανά πείραμα (ταξινομημένο κατά algo, d) """
+    rows = []
+    for path in glob.glob(os.path.join(results_dir, '*.npz')):
+        data = load_config(path)
+        meta = data['metadata']
+        rows.append({
+            'algo': meta['algo'],
+            'd': meta['d'],
+            'replications': len(data['mean_wait']),
+            'mean_wait': float(data['wait_mean']),
+            'half_width': float(data['wait_half_width']),
+            'rel_error': float(data['rel_error']),
+            'throughput': float(data['throughput_mean']),
+            'total_utilization': float(data['total_utilization']),
+            # Ποσοστημόρια αναμονής όλων των εργασιών (γραμμή 'all')
+            'p50_wait': float(data['quantile_mean'][0, 0]),
+            'p95_wait': float(data['quantile_mean'][0, 1]),
+            'p95_half_width': float(data['quantile_half_width'][0, 1]),
+            'p99_wait': float(data['quantile_mean'][0, 2]),
+            'p99_half_width': float(data['quantile_half_width'][0, 2]),
+            'node_utilization': data['node_utilization'],
+            'sim_time': meta.get('sim_time'),
+            'engine': meta.get('engine'),
+            'estimator': meta.get('estimator'),
+        })
+    frame = pd.DataFrame(rows)
+    if rows:
+        frame = frame.sort_values(['algo', 'd']).reset_index(drop=True)
+    return frame
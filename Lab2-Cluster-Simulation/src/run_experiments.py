@@ -1,9 +1,21 @@
 import os
-import re
+
+import analytic
+import experiment_grid
+import replication_cache
+import results_store
+import simulation
+import streams
+import telemetry
 
 # Ρυθμίσεις
 SIM_TIME = 86400  # 24 ώρες
-PYTHON_CMD = "python" 
+WORKERS = os.cpu_count() or 1  # Processes του κοινού pool για όλο το grid
+ENGINE = 'ciw'  # 'ciw', 'fast' ή 'lindley' (βλ. simulation.py)
+USE_CACHE = True  # Επαναχρησιμοποίηση replications που έχουν ήδη τρέξει (βλ. replication_cache.py)
+WARMUP = 'auto'  # MSER-5 ανά πείραμα (βλ. warmup.py) ή σταθερό warm-up σε sec
+TELEMETRY = None  # Live μετρικές Prometheus: port (π.χ. telemetry.DEFAULT_PORT) ή 'unix:<path>' (βλ. telemetry.py)
+SCREEN = False  # Προσομοίωση μόνο όσων μπορεί να είναι οι καλύτερες κατά το analytic.py (βλ. analytic.screen)
 
 # Λίστα πειραμάτων: (Αλγόριθμος, d)
 experiments = [
@@ -16,64 +28,64 @@ experiments = [
     (2, 5)        # Αλγόριθμος 2 με d=5
 ]
 
-def parse_results(filename):
-    """Διαβάζει το αρχείο αποτελεσμάτων και εξάγει τα βασικά νούμερα."""
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        # Αναζήτηση με Regular Expressions
-        wait_match = re.search(r"Μέσος Χρόνος Αναμονής:\s+([0-9.]+)", content)
-        util_match = re.search(r"Μέση Συνολική Χρησιμοποίηση.*:\s+([0-9.]+)", content)
-        
-        mean_wait = float(wait_match.group(1)) if wait_match else 0.0
-        total_util = float(util_match.group(1)) if util_match else 0.0
-        
-        return mean_wait, total_util
-    except Exception as e:
-        print(f"Error parsing {filename}: {e}")
-        return 0.0, 0.0
+def report(res):
+    """ Τυπώνει και γράφει τα αποτελέσματα (.jsonl/.npz) κάθε πειράματος μόλις ολοκληρωθεί """
+    if res.error is not None:
+        print(f"!!! Error running simulation for Algo {res.algo}, d={res.d}: {res.error}")
+        return
+    summary = res.summary
+    print(f"---> Algorithm {res.algo} with d={res.d}: Mean Wait = {summary['mean_wait']:.4f} s "
+          f"({summary['replications']} reps, Rel Error = {summary['rel_error']:.4f}, "
+          f"Warm-up = {res.warmup['warmup_time']:.1f} s)")
+    results_store.write_config(results_store.RESULTS_DIR, res.algo, res.d, res.results, summary,
+                               simulation.results_metadata(SIM_TIME, res.algo, 'plain', streams.MASTER_SEED, ENGINE,
+                                                           res.warmup),
+                               simulation.replication_plan(streams.MASTER_SEED, 1, summary['replications']))
 
-print("==================================================")
-print(f"   STARTING AUTOMATED EXPERIMENTS (Time: {SIM_TIME}s)")
-print("==================================================")
+def main():
+    print("==================================================")
+    print(f"   STARTING AUTOMATED EXPERIMENTS (Time: {SIM_TIME}s)")
+    print("==================================================")
+    print(f"Workers: {WORKERS}, Engine: {ENGINE}")
 
-results_summary = []
+    grid = experiments
+    if SCREEN:
+        grid = analytic.screen(experiments)
+        skipped = [f"{algo}:{d}" for algo, d in experiments if (algo, d) not in grid]
+        print(f"Analytic screen: simulating {len(grid)} of {len(experiments)} (skipped {', '.join(skipped) or '-'})")
+
+    # Όλα τα πειράματα μαζί σε ένα κοινό pool (τα αποτελέσματα επιστρέφουν στη μνήμη)
+    cache = replication_cache.ReplicationCache() if USE_CACHE else None
+    progress = telemetry.Telemetry(SIM_TIME, ENGINE, simulation.WARMUP_TIME, simulation.DESIRED_REL_ERROR,
+                                   simulation.MIN_REPLICATIONS, simulation.MAX_REPLICATIONS)
+    progress.register(grid)
+    server = telemetry.start(progress, TELEMETRY) if TELEMETRY is not None else None
+    try:
+        results = experiment_grid.run_grid(grid, SIM_TIME, workers=WORKERS, engine=ENGINE,
+                                           on_result=report, cache=cache, warmup=WARMUP,
+                                           on_progress=progress.update)
+    finally:
+        telemetry.stop(server)
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
+        cache.close()
+    results_summary = [res for res in results if res.error is None]
 
-for algo, d in experiments:
-    print(f"\n---> Running Algorithm {algo} with d={d}...")
-    
-    # Εκτέλεση του simulation.py
-    cmd = f"{PYTHON_CMD} simulation.py {SIM_TIME} {algo} {d}"
-    exit_code = os.system(cmd)
-    
-    if exit_code != 0:
-        print(f"!!! Error running simulation for Algo {algo}, d={d}")
-        continue
-        
-    # Ανάγνωση αποτελεσμάτων
-    filename = f"results_algo{algo}_d{d}.txt"
-    if os.path.exists(filename):
-        wait, util = parse_results(filename)
-        results_summary.append({
-            'algo': algo,
-            'd': d,
-            'wait': wait,
-            'util': util
-        })
-    else:
-        print(f"Warning: Output file {filename} not found.")
+    # --- ΕΚΤΥΠΩΣΗ ΤΕΛΙΚΟΥ ΠΙΝΑΚΑ ---
+    print("\n\n")
+    print("=============================================================")
+    print("               FINAL SUMMARY REPORT                          ")
+    print("=============================================================")
+    print(f"{'Algo':<6} | {'d':<3} | {'Mean Wait (sec)':<18} | {'p95 Wait':<10} | {'p99 Wait':<10} | {'Avg Utilization':<18}")
+    print("-" * 86)
 
-# --- ΕΚΤΥΠΩΣΗ ΤΕΛΙΚΟΥ ΠΙΝΑΚΑ ---
-print("\n\n")
-print("=============================================================")
-print("               FINAL SUMMARY REPORT                          ")
-print("=============================================================")
-print(f"{'Algo':<6} | {'d':<3} | {'Mean Wait (sec)':<18} | {'Avg Utilization':<18}")
-print("-" * 60)
+    for res in results_summary:
+        quantiles = res.summary['wait_quantiles']['all']
+        print(f"{res.algo:<6} | {res.d:<3} | {res.summary['mean_wait']:<18.4f} | {quantiles['p95']['mean']:<10.4f} | "
+              f"{quantiles['p99']['mean']:<10.4f} | {res.summary['total_utilization']:<18.4f}")
 
-for res in results_summary:
-    print(f"{res['algo']:<6} | {res['d']:<3} | {res['wait']:<18.4f} | {res['util']:<18.4f}")
+    print("=============================================================")
+    print("Done! Use these numbers for your report graphs.")
 
-print("=============================================================")
-print("Done! Use these numbers for your report graphs.")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+import cluster_spec
+import confidence
+import replication_cache
+import results_store
+import simulation
+import streams
+from compare_policies import parse_policy
+
+# Ranking-and-selection πάνω σε ένα grid (algo, d): αντί κάθε διαμόρφωση να τρέχει
+# μόνη της ως το 5% σχετικό σφάλμα, ο προϋπολογισμός replications μοιράζεται σε
+# όσες διεκδικούν ακόμα τη μικρότερη μέση αναμονή.
+#
+#   kn:   Kim-Nelson (fully sequential). n0 replications από όλες, μετά μία ανά στάδιο
+#         μόνο από όσες επιβιώνουν. Η i αποκλείεται όταν X̄_i - X̄_l > W_il(r) για κάποια
+#         επιζώσα l. Οι διασπορές είναι των διαφορών X_i - X_l, οπότε τα common random
+#         numbers (ίδιο seed ανά replication για όλες) στενεύουν τα όρια. Εγγύηση:
+#         P(σωστή επιλογή) >= 1 - alpha όταν η καλύτερη είναι τουλάχιστον delta
+#         καλύτερη από τις υπόλοιπες (indifference zone).
+#   ocba: Optimal Computing Budget Allocation με σταθερό προϋπολογισμό. Κάθε γύρος
+#         δίνει τις νέες replications με τους λόγους του OCBA. Αναφέρει την
+#         προσέγγιση Bonferroni του P(σωστή επιλογή) (APCS-B). Με ανεξάρτητες
+#         διασπορές είναι συντηρητική υπό CRN.
+#
+# Η replication r κάθε διαμόρφωσης έχει το seed streams.replication_seed(master, r),
+# όπως στο run_experiments.py, οπότε η cache μοιράζεται με το κανονικό grid.
+#
+# Χρήση: python selection.py <sim_time> [<algo:d> ...] [--procedure kn|ocba] [--alpha 0.05]
+#                            [--delta SEC] [--n0 5] [--budget N] [--workers N] [--engine ciw|fast]
+
+PROCEDURES = ('kn', 'ocba')
+ALPHA = 0.05
+N0 = 5             # Αρχικές replications ανά διαμόρφωση (n0 >= 2)
+OCBA_ROUND = None  # Replications ανά γύρο του OCBA (προεπιλογή: max(workers, πλήθος διαμορφώσεων))
+
+
+class ReplicationRunner:
+    """ Τρέχει λίστες (διαμόρφωση, replication) στο pool, μέσω της cache αν υπάρχει """
+
+    def __init__(self, sim_duration, pool, master_seed, engine, cache, warmups):
+        self.sim_duration = sim_duration
+        self.pool = pool
+        self.master_seed = master_seed
+        self.engine = engine
+        self.cache = cache
+        self.warmups = warmups  # (algo, d) -> warm-up σε sec
+        self.replications = 0   # Όσες έτρεξαν (όχι από την cache)
+
+    def run(self, tasks):
+        """ tasks: [((algo, d), rep)]· επιστρέφει τις μέσες αναμονές με την ίδια σειρά """
+        pending, values, keys = {}, [None] * len(tasks), [None] * len(tasks)
+        for i, ((algo, d), rep) in enumerate(tasks):
+            seed = streams.replication_seed(self.master_seed, rep)
+            warmup_time = self.warmups[(algo, d)]
+            if self.cache is not None:
+                keys[i] = simulation.cache_key(self.sim_duration, algo, seed, d, self.engine, False, warmup_time)
+                result = self.cache.get(keys[i])
+                if result is not None:
+                    values[i] = result['mean_wait']
+                    continue
+            args = (simulation.run_replication, self.sim_duration, algo, seed, d, self.engine, False, warmup_time)
+            pending[i] = self.pool.submit(*args) if self.pool is not None else args
+        for i, job in pending.items():
+            result = job.result() if self.pool is not None else job[0](*job[1:])
+            if self.cache is not None:
+                self.cache.put(keys[i], result)
+            values[i] = result['mean_wait']
+            self.replications += 1
+        return values
+
+
+# --- KIM-NELSON ---
+def kn_constants(k, alpha, n0):
+    """ (eta, h^2) της διαδικασίας KN για k διαμορφώσεις και n0 αρχικές replications """
+    eta = 0.5 * ((2 * alpha / (k - 1)) ** (-2 / (n0 - 1)) - 1)
+    return eta, 2 * eta * (n0 - 1)
+
+
+def kim_nelson(configs, runner, alpha=ALPHA, delta=None, n0=N0, on_stage=None):
+    """ Επιστρέφει (δείκτης επιλογής, observations ανά διαμόρφωση, στάδιο αποκλεισμού ανά διαμόρφωση, delta) """
+    k = len(configs)
+    observations = [[] for _ in configs]
+    for (i, rep), value in zip([(i, rep) for rep in range(1, n0 + 1) for i in range(k)],
+                               runner.run([(configs[i], rep) for rep in range(1, n0 + 1) for i in range(k)])):
+        observations[i].append(value)
+    eliminated = [None] * k
+    if k == 1:
+        return 0, observations, eliminated, delta
+    first = np.array(observations)  # k x n0
+    diffs = first[:, None, :] - first[None, :, :]
+    s2 = diffs.var(axis=2, ddof=1)  # S^2_il των διαφορών
+    if delta is None:
+        # Indifference zone: το σχετικό σφάλμα-στόχος πάνω στην καλύτερη αρχική εκτίμηση
+        delta = simulation.DESIRED_REL_ERROR * float(first.mean(axis=1).min())
+    _, h2 = kn_constants(k, alpha, n0)
+    last_stage = math.floor(h2 * float(s2.max()) / delta ** 2)  # N: μετά από αυτό επιλέγεται ο μικρότερος μέσος
+
+    survivors = list(range(k))
+    r = n0
+    while True:
+        means = {i: sum(observations[i]) / r for i in survivors}
+        keep = []
+        for i in survivors:
+            worse = any(means[i] - means[l] > max(0.0, delta / (2 * r) * (h2 * s2[i, l] / delta ** 2 - r))
+                        for l in survivors if l != i)
+            if worse:
+                eliminated[i] = r
+            else:
+                keep.append(i)
+        survivors = keep
+        if on_stage is not None:
+            on_stage(r, [configs[i] for i in survivors])
+        if len(survivors) == 1 or r > last_stage:
+            break
+        r += 1
+        for i, value in zip(survivors, runner.run([(configs[i], r) for i in survivors])):
+            observations[i].append(value)
+    best = min(survivors, key=lambda i: sum(observations[i]) / len(observations[i]))
+    return best, observations, eliminated, delta
+
+
+# --- OCBA ---
+def ocba_allocation(means, variances, counts, extra):
+    """ Πόσες από τις extra νέες replications παίρνει κάθε διαμόρφωση (λόγοι OCBA, ελαχιστοποίηση) """
+    k = len(means)
+    b = int(np.argmin(means))
+    std = np.sqrt(np.maximum(variances, 1e-12))
+    gap = np.maximum(np.abs(means - means[b]), 1e-9 * max(abs(means[b]), 1.0))
+    ratios = (std / gap) ** 2
+    ratios[b] = 0.0
+    ratios[b] = std[b] * math.sqrt(float(np.sum(ratios ** 2 / std ** 2)))
+    target = (counts.sum() + extra) * ratios / ratios.sum()
+    allocation = np.zeros(k, dtype=int)
+    for _ in range(extra):
+        # Μία-μία σε όποια απέχει περισσότερο από τον στόχο της
+        i = int(np.argmax(target - (counts + allocation)))
+        allocation[i] += 1
+    return allocation
+
+
+def apcs_b(means, variances, counts):
+    """ Bonferroni κάτω φράγμα του P(σωστή επιλογή) για την καλύτερη τρέχουσα """
+    b = int(np.argmin(means))
+    normal = NormalDist()
+    loss = 0.0
+    for i in range(len(means)):
+        if i != b:
+            se = math.sqrt(variances[b] / counts[b] + variances[i] / counts[i])
+            loss += normal.cdf(-(means[i] - means[b]) / se) if se > 0 else 0.0
+    return max(0.0, 1.0 - loss)
+
+
+def ocba(configs, runner, budget, n0=N0, round_size=None, on_stage=None):
+    """ Επιστρέφει (δείκτης επιλογής, observations ανά διαμόρφωση, APCS-B) """
+    k = len(configs)
+    observations = [[] for _ in configs]
+    tasks = [(i, rep) for rep in range(1, n0 + 1) for i in range(k)]
+    for (i, _), value in zip(tasks, runner.run([(configs[i], rep) for i, rep in tasks])):
+        observations[i].append(value)
+    round_size = round_size or k
+    while True:
+        counts = np.array([len(obs) for obs in observations])
+        means = np.array([np.mean(obs) for obs in observations])
+        variances = np.array([np.var(obs, ddof=1) for obs in observations])
+        if on_stage is not None:
+            on_stage(int(counts.sum()), [configs[int(np.argmin(means))]])
+        extra = min(round_size, budget - int(counts.sum()))
+        if extra <= 0 or k == 1:
+            return int(np.argmin(means)), observations, apcs_b(means, variances, counts)
+        allocation = ocba_allocation(means, variances, counts, extra)
+        # Η διαμόρφωση i συνεχίζει με τις replications len(obs)+1, ... (ίδια seeds με τις άλλες, CRN)
+        tasks = [(i, len(observations[i]) + j) for i in range(k) for j in range(1, allocation[i] + 1)]
+        for (i, _), value in zip(tasks, runner.run([(configs[i], rep) for i, rep in tasks])):
+            observations[i].append(value)
+
+
+# --- ΕΚΤΕΛΕΣΗ ---
+def sequential_estimate(observations):
+    """ Replications που θα χρειαζόταν ο κανόνας του simulation.py (5% ανά διαμόρφωση), από τις διασπορές """
+    estimate = []
+    for obs in observations:
+        mean, hw = confidence.mean_ci(obs)
+        n = len(obs)
+        needed = n * (confidence.relative_error(mean, hw) / simulation.DESIRED_REL_ERROR) ** 2
+        estimate.append(int(min(max(math.ceil(needed), simulation.MIN_REPLICATIONS), simulation.MAX_REPLICATIONS)))
+    return estimate
+
+
+def run_selection(grid, sim_duration, procedure='kn', alpha=ALPHA, delta=None, n0=N0, budget=None, workers=1,
+                  master_seed=streams.MASTER_SEED, engine=None, cluster=None, cache=None, warmup='auto',
+                  on_stage=None):
+    """ Επιλογή της (algo, d) με τη μικρότερη μέση αναμονή· επιστρέφει dict με την επιλογή και την εγγύησή της
+
+    budget: συνολικές replications του OCBA (προεπιλογή: 2 * n0 ανά διαμόρφωση).
+    on_stage(στάδιο, επιζώσες / τρέχουσα καλύτερη) καλείται μετά από κάθε στάδιο.
+    """
+    if n0 < 2:
+        raise ValueError("n0 must be at least 2")
+    engine = engine or simulation.ENGINE
+    cluster = cluster or simulation.CLUSTER
+    configs = [tuple(config) for config in grid]
+    started = time.time()
+    pool = None
+    if workers > 1:
+        pool = ProcessPoolExecutor(max_workers=workers, initializer=simulation.init_worker,
+                                   initargs=(engine, cluster.to_dict()))
+    else:
+        simulation.init_worker(engine, cluster.to_dict())
+    try:
+        if warmup == 'auto' and pool is not None:
+            # Τα pilots στο pool, η cache μόνο από το parent
+            keys = [simulation.warmup_key(sim_duration, algo, d, master_seed) if cache is not None else None
+                    for algo, d in configs]
+            infos = [cache.get(key) if key is not None else None for key in keys]
+            futures = {i: pool.submit(simulation.detect_warmup, sim_duration, algo, d, master_seed)
+                       for i, (algo, d) in enumerate(configs) if infos[i] is None}
+            for i, future in futures.items():
+                infos[i] = future.result()
+                if keys[i] is not None:
+                    cache.put(keys[i], infos[i])
+        else:
+            infos = [simulation.resolve_warmup(warmup, sim_duration, algo, d, master_seed, cache)
+                     for algo, d in configs]
+        runner = ReplicationRunner(sim_duration, pool, master_seed, engine, cache,
+                                   {config: info['warmup_time'] for config, info in zip(configs, infos)})
+        if procedure == 'kn':
+            best, observations, eliminated, delta = kim_nelson(configs, runner, alpha, delta, n0, on_stage)
+            guarantee = {'pcs': 1 - alpha, 'delta': delta}
+        elif procedure == 'ocba':
+            budget = budget or 2 * n0 * len(configs)
+            best, observations, pcs = ocba(configs, runner, budget, n0, OCBA_ROUND or max(workers, len(configs)),
+                                           on_stage)
+            eliminated = [None] * len(configs)
+            guarantee = {'pcs': pcs, 'delta': None, 'budget': budget}
+        else:
+            raise ValueError(f"Unknown procedure: {procedure}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    sequential = sequential_estimate(observations)
+    rows = []
+    for config, obs, stage, info, n_seq in zip(configs, observations, eliminated, infos, sequential):
+        mean, hw = confidence.mean_ci(obs)
+        rows.append({'algo': config[0], 'd': config[1], 'replications': len(obs), 'mean_wait': mean,
+                     'half_width': hw, 'eliminated_at': stage, 'warmup': info['warmup_time'],
+                     'sequential_replications': n_seq})
+    used = sum(len(obs) for obs in observations)
+    return {
+        'procedure': procedure,
+        'selected': {'algo': configs[best][0], 'd': configs[best][1]},
+        'alpha': alpha if procedure == 'kn' else None,
+        **guarantee,
+        'n0': n0,
+        'replications': used,
+        'simulated_replications': runner.replications,
+        'sequential_replications': sum(sequential),
+        'wall_seconds': time.time() - started,
+        'sim_time': sim_duration,
+        'engine': engine,
+        'master_seed': master_seed,
+        'cluster': cluster.to_dict(),
+        'configs': rows,
+    }
+
+
+def print_selection(selection):
+    print(f"\n{'Algo':<6} | {'d':<3} | {'Reps':<5} | {'Mean Wait':<10} | {'95% HW':<8} | {'Eliminated at':<13}")
+    print("-" * 60)
+    for row in selection['configs']:
+        stage = '-' if row['eliminated_at'] is None else str(row['eliminated_at'])
+        print(f"{row['algo']:<6} | {row['d']:<3} | {row['replications']:<5} | {row['mean_wait']:<10.4f} | "
+              f"{row['half_width']:<8.4f} | {stage:<13}")
+    chosen = selection['selected']
+    if selection['procedure'] == 'kn':
+        print(f"\nSelected: algo {chosen['algo']}, d={chosen['d']} "
+              f"(P(correct selection) >= {selection['pcs']:.2f} if the best is >= {selection['delta']:.4f} s better)")
+    else:
+        print(f"\nSelected: algo {chosen['algo']}, d={chosen['d']} (APCS-B = {selection['pcs']:.4f}, "
+              f"budget {selection['budget']} replications)")
+    print(f"Replications: {selection['replications']} "
+          f"(the per-configuration {simulation.DESIRED_REL_ERROR:.0%} rule would need ~{selection['sequential_replications']}, "
+          f"{selection['replications'] / selection['sequential_replications']:.0%}), "
+          f"wall time {selection['wall_seconds']:.1f} s")
+
+
+def write_selection(results_dir, selection):
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f"selection_{selection['procedure']}.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(selection, f, indent=2)
+    return path
+
+
+# --- MAIN ---
+def main(argv):
+    parser = argparse.ArgumentParser(usage="python selection.py <sim_time> [<algo:d> ...] [--procedure kn|ocba] [--alpha A] [--delta SEC] [--n0 N] [--budget N] [--workers N] [--engine ciw|fast] [--seed S] [--cluster spec.json] [--warmup auto|SECONDS] [--no-cache] [--results-dir DIR]")
+    parser.add_argument('sim_time', type=float)
+    parser.add_argument('policies', nargs='*', type=parse_policy,
+                        help="algo:d (προεπιλογή: το grid του run_experiments.py)")
+    parser.add_argument('--procedure', choices=PROCEDURES, default='kn')
+    parser.add_argument('--alpha', type=float, default=ALPHA, help="KN: P(σωστή επιλογή) >= 1 - alpha")
+    parser.add_argument('--delta', type=float, help="KN: indifference zone σε sec (προεπιλογή: 5%% της καλύτερης αρχικής)")
+    parser.add_argument('--n0', type=int, default=N0)
+    parser.add_argument('--budget', type=int, help="OCBA: συνολικές replications")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--engine', choices=['ciw', 'fast'], default=simulation.ENGINE)
+    parser.add_argument('--seed', type=int, default=streams.MASTER_SEED)
+    parser.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    parser.add_argument('--warmup', type=simulation.warmup_arg, default='auto')
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--results-dir', default=results_store.RESULTS_DIR)
+    args = parser.parse_args(argv)
+
+    if not args.policies:
+        import run_experiments
+        args.policies = run_experiments.experiments
+    cluster = cluster_spec.load_cluster_spec(args.cluster) if args.cluster else simulation.CLUSTER
+    print(f"--- Ranking and selection ({args.procedure}) over {len(args.policies)} configurations "
+          f"(Time: {args.sim_time}, Engine: {args.engine}) ---")
+    cache = None if args.no_cache else replication_cache.ReplicationCache()
+
+    def on_stage(stage, leaders):
+        print(f"   -> Stage {stage}: " + ", ".join(f"{a}:{d}" for a, d in leaders), end='\r', flush=True)
+
+    try:
+        selection = run_selection(args.policies, args.sim_time, args.procedure, args.alpha, args.delta, args.n0,
+                                  args.budget, args.workers, args.seed, args.engine, cluster, cache, args.warmup,
+                                  on_stage)
+    finally:
+        if cache is not None:
+            cache.close()
+    print_selection(selection)
+    print(f"Results written to {write_selection(args.results_dir, selection)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
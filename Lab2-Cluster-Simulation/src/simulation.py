@@ -1,241 +1,828 @@
 import ciw
+import os
 import sys
-import math
+import bisect
+import itertools
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import cluster_spec
+import confidence
+import fast_engine
+import instrumentation
+import lindley
+import load_index
+import quantile_sketch
+import replay
+import replication_cache
+import results_store
+import snapshot
+import steady_state
+import streams
+import telemetry
+import trace_sink
+import warmup
+from cluster_spec import speed_classes
+from online_stats import ReplicationObserver
 
 # --- ΠΑΡΑΜΕΤΡΟΙ ---
-D_PARAMETER = 0
-WARMUP_TIME = 3600  # 1 ώρα Warm-up
+WARMUP_TIME = 3600  # 1 ώρα Warm-up (με --warmup auto το επιλέγει το MSER-5 ανά πείραμα)
+PILOT_REPLICATIONS = 3  # Pilot runs για το MSER-5 (ο μέσος τους ανά batch)
 CONFIDENCE_LEVEL = 0.95
 DESIRED_REL_ERROR = 0.05
+MIN_REPLICATIONS = 10
+MAX_REPLICATIONS = 50
+ENGINE = 'ciw'  # 'ciw', 'fast' (native heap engine) ή 'lindley' (vectorized, αλγόριθμοι 3/4)
+CLUSTER = cluster_spec.default_cluster()  # Τοπολογία (βλ. cluster_spec.py, --cluster <json>)
+CIW_MAX_WORKERS = 200  # Η ciw σαρώνει όλους τους κόμβους σε κάθε γεγονός: πάνω από τόσους workers, --engine fast
+REPLAY = None  # {'path', 'mode'}: αφίξεις και μεγέθη από καταγεγραμμένο trace (βλ. replay.py, --replay <dir>)
+INSTRUMENT = None  # {'profile_dir'}: μετρητές / φάσεις / μνήμη ανά replication (βλ. instrumentation.py, --instrument)
+
+class StreamExponential(ciw.dists.Exponential):
+    """ Εκθετική κατανομή της ciw που τραβάει από δικό της substream (common random numbers) """
+    def __init__(self, rate, stream):
+        super().__init__(rate=rate)
+        self.stream = stream
+
+    def sample(self, t=None, ind=None):
+        return self.stream.exponential(self.rate)
 
-# Πίνακας t-distribution (από Παράρτημα 1 εκφώνησης, στήλη two-tails 0.05)
-T_TABLE = {
-    1: 12.71, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 
-    6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
-    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131,
-    16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093, 20: 2.086,
-    21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060,
-    26: 2.056, 27: 2.052, 28: 2.048, 29: 2.045, 30: 2.042,
-    40: 2.021, 60: 2.000, 80: 1.990, 100: 1.984, 1000: 1.962
-}
-
-def get_t_value(df):
-    if df in T_TABLE: return T_TABLE[df]
-    keys = sorted(T_TABLE.keys())
-    for k in reversed(keys):
-        if df >= k: return T_TABLE[k]
-    return 1.96
-
-def get_network_params():
-    """ Ορισμός παραμέτρων δικτύου """
+def get_network_params(spec=None, seed=None, antithetic=False):
+    """ Ορισμός παραμέτρων δικτύου: Nodes 1..N = Workers του spec
+
+    Δεν υπάρχει κόμβος dispatcher: οι αφίξεις ορίζονται στον Node 1, αλλά το arrival
+    node (RoutingDecision*) στέλνει κάθε εργασία κατευθείαν στον worker της.
+    Με seed, οι αφίξεις και η εξυπηρέτηση κάθε worker τραβάνε από τα substreams του
+    streams.py (ίδια με τις native μηχανές), αλλιώς από τον γεννήτορα της ciw.
+    """
+    spec = spec or CLUSTER
+    n_nodes = spec.n_workers
+    if seed is None:
+        arrivals = ciw.dists.Exponential(rate=spec.arrival_rate)
+        services = [ciw.dists.Exponential(rate=rate) for rate in spec.service_rates]
+    else:
+        arrivals = StreamExponential(spec.arrival_rate,
+                                     streams.VariateStream(streams.arrival_stream(seed), antithetic))
+        services = [StreamExponential(rate, streams.VariateStream(streams.service_stream(seed, k), antithetic))
+                    for k, rate in enumerate(spec.service_rates)]
     params = {
         'arrival_distributions': {
-            'Class 0': [
-                ciw.dists.Exponential(rate=1.0),      # Node 1: Dispatcher
-                None, None, None, None, None, None, None, None, None, None, None
-            ]
+            'Class 0': [arrivals] + [None] * (n_nodes - 1)
         },
         'service_distributions': {
-            'Class 0': [
-                ciw.dists.Deterministic(value=0.0),     # Node 1: Dispatcher (Instant)
-                ciw.dists.Exponential(rate=0.08333333), # Nodes 2-6 (Slow, 1/12)
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.08333333),
-                ciw.dists.Exponential(rate=0.125),      # Nodes 7-9 (Medium, 1/8)
-                ciw.dists.Exponential(rate=0.125),
-                ciw.dists.Exponential(rate=0.125),
-                ciw.dists.Exponential(rate=0.25),       # Nodes 10-12 (Fast, 1/4)
-                ciw.dists.Exponential(rate=0.25),
-                ciw.dists.Exponential(rate=0.25)
-            ]
+            'Class 0': services
         },
-        'routing': {'Class 0': [[0.0]*12 for _ in range(12)]},
-        'number_of_servers': [1] * 12,
-        'queue_capacities': [float('inf')] * 12
+        # Όλοι οι workers στέλνουν στην έξοδο.
+        # Leave αντί για μηδενικό πίνακα N x N, που δεν κλιμακώνεται σε χιλιάδες κόμβους.
+        'routing': {'Class 0': ciw.routing.NetworkRouting(
+            routers=[ciw.routing.Leave() for _ in range(n_nodes)])},
+        'number_of_servers': [1] * n_nodes,
+        'queue_capacities': [float('inf')] * n_nodes
     }
     return params
 
+# --- ΚΟΜΒΟΙ ΜΕ ONLINE ΣΤΑΤΙΣΤΙΚΑ ---
+# Worker i είναι ο Node i + 1 της ciw. Στα traces και στο run_single_replication οι
+# workers κρατάνε την αρίθμηση 2..N+1 της εκφώνησης (όπου Node 1 ήταν ο dispatcher).
+class ObservedNode(ciw.Node):
+    """ Αντί για DataRecord ανά εξυπηρέτηση, ενημερώνει τον observer της προσομοίωσης """
+    def write_individual_record(self, individual):
+        self.simulation.observer.service(self.id_number - 1, individual.arrival_date,
+                                         individual.service_start_date, individual.service_end_date)
+        if self.simulation.trace is not None:
+            self.simulation.trace.append(individual.id_number, self.id_number + 1, individual.arrival_date,
+                                         individual.service_start_date, individual.service_end_date,
+                                         individual.queue_size_at_arrival)
+
+    # Οι workers κρατάνε ενημερωμένο το load index του dispatcher
+    def accept(self, next_individual, completed=False):
+        super().accept(next_individual, completed)
+        self.simulation.load_index.set_load(self.id_number - 1, self.number_of_individuals)
+
+    def release(self, next_individual, next_node, reroute=False):
+        super().release(next_individual, next_node, reroute)
+        self.simulation.load_index.set_load(self.id_number - 1, self.number_of_individuals)
+
+class CountingExitNode(ciw.ExitNode):
+    """ Exit node που μετράει τους πελάτες χωρίς να τους κρατάει στη μνήμη """
+    def accept(self, next_individual, completed=True):
+        next_individual.node = -1
+        self.number_of_individuals += 1
+        if completed:
+            self.number_of_completed_individuals += 1
+
 # --- ΚΛΑΣΕΙΣ ΔΡΟΜΟΛΟΓΗΣΗΣ ---
-class RoutingDecision1(ciw.Node):
-    def next_node(self, ind):
-        # Οι Workers είναι από το index 2 έως 12 (Nodes 2-12)
-        # Το index 0 είναι ArrivalNode, το index 1 είναι Dispatcher (Self)
-        workers = [self.simulation.nodes[i] for i in range(2, 13)]
-        
+# Η δρομολόγηση γίνεται στο arrival node, τη στιγμή της άφιξης: κάθε εργασία έχει ένα
+# γεγονός άφιξης και ένα εξυπηρέτησης (χωρίς το ενδιάμεσο πέρασμα από κόμβο dispatcher).
+# Ο dispatcher δεν σαρώνει/ταξινομεί τους workers: ρωτάει το WorkerLoadIndex
+# (argmin σε O(1), ενημέρωση σε O(log n) σε κάθε άφιξη/αναχώρηση worker).
+class DispatchingArrivalNode(ciw.ArrivalNode):
+    """ Arrival node που στέλνει την εργασία στον worker του route() (worker i -> nodes[i + 1]) """
+    def release_individual(self, next_node, next_individual):
+        # Η διέλευση από τον dispatcher μετράει στο throughput, όπως τα records του παλιού κόμβου 1
+        self.simulation.observer.dispatch(self.simulation.current_time)
+        super().release_individual(self.simulation.nodes[self.route(next_individual) + 1], next_individual)
+
+class RoutingDecision1(DispatchingArrivalNode):
+    def route(self, ind):
         # Επιλογή του worker με τους λιγότερους πελάτες
-        best_worker = min(workers, key=lambda x: x.number_of_individuals)
-        return best_worker
+        return load_index.shortest_queue(self.simulation.load_index)
 
-class RoutingDecision2(ciw.Node):
-    def next_node(self, ind):
-        # Εύρος 2 έως 13 για να πιάσουμε τους Workers (Nodes 2-12)
-        workers = [self.simulation.nodes[i] for i in range(2, 13)]
-        
-        # Ταξινόμηση με βάση το πλήθος πελατών
-        sorted_workers = sorted(workers, key=lambda x: x.number_of_individuals)
-        best_node = sorted_workers[0]
-        
-        # Το Node ID στην Ciw είναι το index στη λίστα nodes.
-        # Nodes 10, 11, 12 (Fast) αντιστοιχούν στα indices 10, 11, 12.
-        best_node_idx = self.simulation.nodes.index(best_node)
-        
-        # Αν ο καλύτερος είναι ήδη Fast (Indices 10-12), τον επιλέγουμε
-        if best_node_idx >= 10: 
-            return best_node
-        else:
-            # Ψάχνουμε στη λίστα για Fast κόμβο που να ικανοποιεί τη συνθήκη
-            for node in sorted_workers:
-                idx = self.simulation.nodes.index(node)
-                if idx >= 10: # Είναι Fast (Nodes 10-12)
-                    # Συνθήκη: load <= min_load + d
-                    if node.number_of_individuals <= best_node.number_of_individuals + D_PARAMETER:
-                        return node
-                    else:
-                        break 
-            return best_node
+class RoutingDecision2(DispatchingArrivalNode):
+    def route(self, ind):
+        # Ο λιγότερο φορτωμένος κόμβος της ταχύτερης κλάσης αν load <= min_load + d, αλλιώς ο λιγότερο φορτωμένος
+        d = self.simulation.d_parameter
+        if type(d) is tuple:
+            # Ένα κατώφλι ανά κλάση ταχύτητας (βλ. load_index.class_thresholds, optimize.py)
+            return load_index.class_thresholds(self.simulation.load_index, d)
+        return load_index.fast_threshold(self.simulation.load_index, d)
+
+# Δρομολόγηση που δεν κοιτάει τις ουρές (βλ. lindley.py για το vectorized fast path)
+class RoutingDecision3(DispatchingArrivalNode):
+    def route(self, ind):
+        # Τυχαίος worker με πιθανότητα ανάλογη του ρυθμού εξυπηρέτησης
+        cum_probs = self.simulation.routing_cum_probs
+        return min(bisect.bisect_right(cum_probs, self.simulation.routing_stream.random()), len(cum_probs) - 1)
+
+class RoutingDecision4(DispatchingArrivalNode):
+    def __init__(self, simulation):
+        super().__init__(simulation)
+        self.round_robin = itertools.cycle(range(CLUSTER.n_workers))
+
+    def route(self, ind):
+        # Round robin με τη σειρά των workers
+        return next(self.round_robin)
+
+ROUTING_CLASSES = {1: RoutingDecision1, 2: RoutingDecision2, 3: RoutingDecision3, 4: RoutingDecision4}
 
 # --- ΕΚΤΕΛΕΣΗ ΜΙΑΣ ΠΡΟΣΟΜΟΙΩΣΗΣ ---
-def run_single_replication(sim_duration, algorithm, seed):
-    print(f"   -> Running replication {seed}...", end='\r', flush=True)
-    ciw.seed(seed)
+def resolve_engine(engine, algorithm):
+    """ Η fast μηχανή περνάει αυτόματα στο Lindley path όταν η δρομολόγηση δεν κοιτάει τις ουρές
+
+    Το replay τρέχει πάντα στη native μηχανή (οι εξυπηρετήσεις εξαρτώνται από την εργασία).
+    """
+    if REPLAY is not None:
+        return 'fast'
+    if engine == 'fast' and algorithm in lindley.STATE_INDEPENDENT:
+        return 'lindley'
+    return engine
+
+def engine_family(engine):
+    """ Η οικογένεια μηχανής στο κλειδί της cache: ciw και fast δίνουν ακριβώς τα ίδια αποτελέσματα
+    ('events'), ενώ το Lindley path τους ίδιους αριθμούς, αλλά με άλλη σειρά αθροίσεων """
+    return 'lindley' if engine == 'lindley' else 'events'
+
+def run_replication(sim_duration, algorithm, seed, d=0, engine=None, antithetic=False, warmup_time=None,
+                    snapshot_path=None, trace_dir=None):
+    """ Μία replication ως dict: mean_wait, utilizations (λίστα ανά worker), throughput, controls
+
+    Όλες οι μηχανές τραβάνε αφίξεις / εξυπηρετήσεις από τα ίδια substreams του seed,
+    οπότε δύο πολιτικές με το ίδιο seed βλέπουν τους ίδιους τυχαίους αριθμούς (CRN).
+    Με antithetic=True χρησιμοποιούνται οι 1-U (το antithetic ζεύγος της replication).
+    Όλη η διαμόρφωση (αλγόριθμος, d, μηχανή) περνάει ανά κλήση, οπότε ένα worker
+    process μπορεί να τρέχει replications διαφορετικών πειραμάτων. Το warmup_time
+    (προεπιλογή WARMUP_TIME) είναι ανά πείραμα όταν το επιλέγει το MSER-5.
+    Με snapshot_path η replication κάνει fork από μια warm κατάσταση (βλ. snapshot.py)
+    και δεν ξαναπροσομοιώνει το warm-up.
+    Με trace_dir κάθε εργασία γράφεται σε columnar trace (βλ. trace_sink.py)· τότε το
+    Lindley path δίνει τη θέση του στη native μηχανή, που έχει εγγραφές ανά εργασία.
+    Το ίδιο ισχύει με INSTRUMENT, που προσθέτει στο dict το 'instrumentation'.
+    """
+    warmup_time = WARMUP_TIME if warmup_time is None else warmup_time
+    engine = resolve_engine(engine or ENGINE, algorithm)
+    if trace_dir is None and INSTRUMENT is None:
+        return _run_replication(sim_duration, algorithm, seed, d, engine, antithetic, warmup_time, snapshot_path)
+    if engine == 'lindley' or snapshot_path is not None:
+        engine = 'fast'
+    trace = None
+    if trace_dir is not None:
+        trace = trace_sink.TraceWriter(trace_dir, {
+            'engine': engine, 'algorithm': algorithm, 'd': d, 'seed': str(seed), 'antithetic': antithetic,
+            'warmup': warmup_time, 'sim_duration': sim_duration, 'snapshot': snapshot_path,
+            'replay': REPLAY, 'cluster': CLUSTER.to_dict()})
+    try:
+        if INSTRUMENT is None:
+            return _run_replication(sim_duration, algorithm, seed, d, engine, antithetic, warmup_time,
+                                    snapshot_path, trace)
+        return instrumentation.run_instrumented(
+            lambda probe: _run_replication(sim_duration, algorithm, seed, d, engine, antithetic, warmup_time,
+                                           snapshot_path, trace, probe),
+            INSTRUMENT['profile_dir'])
+    finally:
+        if trace is not None:
+            trace.close()
+
+def _run_replication(sim_duration, algorithm, seed, d, engine, antithetic, warmup_time, snapshot_path, trace=None,
+                     probe=None):
+    if snapshot_path is not None:
+        return run_fork_replication(snapshot_path, sim_duration, seed, antithetic, trace, probe)
+    if engine == 'fast':
+        return run_fast_replication(sim_duration, algorithm, seed, d, antithetic, warmup_time, trace, probe)
+    if engine == 'lindley':
+        return run_lindley_replications(sim_duration, algorithm, [seed], [antithetic], warmup_time)[0]
+    Q = build_simulation(sim_duration, algorithm, seed, d, antithetic, warmup_time, trace)
+    if probe is None:
+        Q.simulate_until_max_time(warmup_time + sim_duration)
+    else:
+        # Σε δύο κομμάτια (ίδια γεγονότα με ένα simulate_until_max_time ως το τέλος)
+        arrival_node = Q.nodes[0]
+        arrival_node.route = probe.timed(arrival_node.route)
+        probe.lap('build')
+        if warmup_time > 0:  # Η ciw δεν τρέχει ως t = 0 (μηδενικός χρόνος για το utilisation)
+            Q.simulate_until_max_time(warmup_time)
+        probe.lap('warmup')
+        Q.simulate_until_max_time(warmup_time + sim_duration)
+        probe.lap('measurement')
+        probe.events = arrival_node.number_of_individuals + Q.nodes[-1].number_of_individuals
+    if trace is not None:
+        # Όσοι είναι ακόμα στους workers (NaN οι χρόνοι που λείπουν)
+        for node in Q.nodes[1:CLUSTER.n_workers + 1]:
+            for ind in node.all_individuals:
+                start = ind.service_start_date if ind.service_start_date is not False else float('nan')
+                trace.append(ind.id_number, node.id_number + 1, ind.arrival_date, start, float('nan'),
+                             ind.queue_size_at_arrival)
     
-    node_classes = [ciw.Node] * 12
-    if algorithm == 1:
-        node_classes[0] = RoutingDecision1
-    elif algorithm == 2:
-        node_classes[0] = RoutingDecision2
+    result = Q.observer.result()
+    if probe is not None:
+        probe.lap('statistics')
+    return result
+
+def build_simulation(sim_duration, algorithm, seed, d=0, antithetic=False, warmup_time=None, trace=None):
+    """ Η ciw.Simulation μιας replication, έτοιμη για simulate_until_max_time(warmup + sim_duration) """
+    warmup_time = WARMUP_TIME if warmup_time is None else warmup_time
+    ciw.seed(seed)
     
-    params = get_network_params()
+    params = get_network_params(seed=seed, antithetic=antithetic)
     N = ciw.create_network(**params)
-    Q = ciw.Simulation(N, node_class=node_classes)
-    
-    Q.simulate_until_max_time(WARMUP_TIME + sim_duration)
-    
-    records = Q.get_all_records()
-    
-    # --- ΥΠΟΛΟΓΙΣΜΟΣ ΣΤΑΤΙΣΤΙΚΩΝ ---
-    valid_records = [r for r in records if r.arrival_date > WARMUP_TIME]
-    
-    # 1. Μέσος Χρόνος Αναμονής
-    # Node 1 is Dispatcher, ignore wait time there (should be 0 anyway)
-    waiting_times = [r.waiting_time for r in valid_records if r.node > 1]
-    mean_wait = sum(waiting_times) / len(waiting_times) if waiting_times else 0.0
-    
-    # 2. Χρησιμοποίηση ανά κόμβο
-    node_busy_time = {i: 0.0 for i in range(2, 13)}
+    Q = ciw.Simulation(N, node_class=[ObservedNode] * CLUSTER.n_workers,
+                       arrival_node_class=ROUTING_CLASSES[algorithm], exit_node_class=CountingExitNode)
     
-    for r in records: 
-        if r.node == 1: continue 
-        
-        start = r.service_start_date
-        end = r.service_end_date
-        
-        effective_start = max(start, WARMUP_TIME)
-        effective_end = min(end, WARMUP_TIME + sim_duration)
-        
-        if effective_end > effective_start:
-            node_busy_time[r.node] += (effective_end - effective_start)
+    # Τα στατιστικά (αναμονή Welford, busy time στο παράθυρο, ολοκληρώσεις)
+    # ενημερώνονται κατά την εκτέλεση, χωρίς Q.get_all_records()
+    Q.observer = ReplicationObserver(CLUSTER.arrival_rate, CLUSTER.service_rates, warmup_time, sim_duration)
+    Q.load_index = load_index.WorkerLoadIndex(CLUSTER.service_rates)
+    Q.d_parameter = d
+    Q.routing_stream = streams.VariateStream(streams.routing_stream(seed), antithetic)
+    total_rate = sum(CLUSTER.service_rates)
+    Q.routing_cum_probs = list(itertools.accumulate(rate / total_rate for rate in CLUSTER.service_rates))
+    Q.trace = trace
+    return Q
+
+def run_single_replication(sim_duration, algorithm, seed, d=0, engine=None):
+    """ Τριάδα (mean_wait, utilizations ανά Node ID, throughput) με τα workers στους Nodes 2..N+1 """
+    result = run_replication(sim_duration, algorithm, seed, d, engine)
+    utilizations = {i + 2: u for i, u in enumerate(result['utilizations'])}
+    return result['mean_wait'], utilizations, result['throughput']
+
+def run_fast_replication(sim_duration, algorithm, seed, d=0, antithetic=False, warmup_time=None, trace=None,
+                         probe=None):
+    """ Ίδια replication με τη native μηχανή (ίδιοι ορισμοί στατιστικών), με replay αν έχει οριστεί """
+    warmup_time = WARMUP_TIME if warmup_time is None else warmup_time
+    workload = replay_workload(seed, antithetic)
+    observer = fast_engine.run_fast_replication(
+        workload.arrival_rate if workload else CLUSTER.arrival_rate, CLUSTER.service_rates, algorithm, d, seed,
+        warmup_time, sim_duration, antithetic, trace=trace, workload=workload, probe=probe)
+    result = observer.result()
+    if probe is not None:
+        probe.lap('statistics')
+    return result
+
+def exact_replay():
+    """ True όταν το REPLAY είναι 'exact': όλες οι replications ίδιες, άρα μία replication χωρίς CI """
+    return REPLAY is not None and REPLAY['mode'] == 'exact'
+
+def replay_workload(seed, antithetic=False):
+    """ Η ροή εργασιών του REPLAY για το seed (None χωρίς replay) """
+    if REPLAY is None:
+        return None
+    return replay.ReplayWorkload(REPLAY['path'], REPLAY['mode'], seed, antithetic)
+
+def run_fork_replication(snapshot_path, sim_duration, seed, antithetic=False, trace=None, probe=None):
+    """ Replication μέτρησης από το snapshot (η κατάσταση επιλέγεται από το seed, ώστε
+    τα antithetic ζεύγη να ξεκινάνε από την ίδια) """
+    warm = snapshot.load_snapshot(snapshot_path)
+    result = snapshot.fork(warm, seed % len(warm['states']), seed, sim_duration, antithetic, trace, probe).result()
+    if probe is not None:
+        probe.lap('statistics')
+    return result
+
+def prepare_snapshot(algorithm, d, warmup_time, master_seed, n_states):
+    """ Path του snapshot με n_states warm καταστάσεις (δημιουργείται αν δεν υπάρχει)
+
+    Το όνομα του αρχείου είναι το hash των παραμέτρων του, οπότε ξαναχρησιμοποιείται
+    από επόμενες εκτελέσεις με ίδιο cluster, πολιτική, warm-up και master seed.
+    """
+    params = {'arrival_rate': CLUSTER.arrival_rate, 'service_rates': CLUSTER.service_rates,
+              'algorithm': algorithm, 'd': d, 'warmup': warmup_time,
+              'master_seed': master_seed, 'states': n_states}
+    key = replication_cache.replication_key({'purpose': 'snapshot', **params})
+    path = os.path.join(snapshot.SNAPSHOT_DIR, key + '.json')
+    if not os.path.exists(path):
+        seeds = [streams.warm_state_seed(master_seed, i) for i in range(n_states)]
+        states = snapshot.capture(CLUSTER.arrival_rate, CLUSTER.service_rates, algorithm, d, seeds, warmup_time)
+        snapshot.write_snapshot(path, params, states)
+    return path
+
+def run_lindley_replications(sim_duration, algorithm, seeds, antithetic=None, warmup_time=None):
+    """ Πολλές replications μαζί (μία γραμμή ανά seed) με την αναδρομή Lindley """
+    warmup_time = WARMUP_TIME if warmup_time is None else warmup_time
+    return lindley.run_replications(CLUSTER.arrival_rate, CLUSTER.service_rates, algorithm,
+                                    seeds, warmup_time, sim_duration, antithetic)
 
-    utilizations = {i: node_busy_time[i] / sim_duration for i in range(2, 13)}
+def fixed_warmup(warmup_time):
+    return {'warmup_time': float(warmup_time), 'warmup_customers': None, 'warmup_method': 'fixed'}
 
-    # 3. Ρυθμός εξυπηρέτησης
-    completed_in_window = [r for r in records if r.service_end_date > WARMUP_TIME and r.service_end_date <= WARMUP_TIME + sim_duration]
-    throughput = len(completed_in_window) / sim_duration
+def detect_warmup(sim_duration, algorithm, d, master_seed):
+    """ Warm-up του πειράματος με MSER-5 πάνω σε PILOT_REPLICATIONS pilot runs από t = 0
 
-    return mean_wait, utilizations, throughput
+    Τα pilots τρέχουν με τη native μηχανή (ίδια αποτελέσματα με την ciw), αρχικά για
+    2 * WARMUP_TIME. Αν το σημείο τομής πέσει κοντά στο όριο n/2 του MSER (η μεταβατική
+    φάση ίσως είναι μεγαλύτερη), ο ορίζοντας διπλασιάζεται, έως WARMUP_TIME + sim_duration.
+    Επιστρέφει {'warmup_time', 'warmup_customers', 'warmup_method'}.
+    """
+    max_horizon = WARMUP_TIME + sim_duration
+    horizon = min(2 * WARMUP_TIME, max_horizon)
+    while True:
+        detectors = []
+        for i in range(PILOT_REPLICATIONS):
+            detector = warmup.Mser5()
+            seed = streams.pilot_seed(master_seed, i)
+            workload = replay_workload(seed)
+            fast_engine.run_fast_replication(workload.arrival_rate if workload else CLUSTER.arrival_rate,
+                                             CLUSTER.service_rates, algorithm, d, seed, 0.0, horizon,
+                                             detector=detector, workload=workload)
+            detectors.append(detector)
+        customers, cutoff, batches = warmup.ensemble_truncation(detectors)
+        if customers < 0.4 * batches * warmup.BATCH_SIZE or horizon >= max_horizon:
+            break
+        horizon = min(2 * horizon, max_horizon)
+    return {'warmup_time': cutoff, 'warmup_customers': customers, 'warmup_method': 'mser5'}
+
+# --- ΠΑΡΑΛΛΗΛΗ ΕΚΤΕΛΕΣΗ ---
+def init_worker(engine, cluster, replay_config=None, instrument=None):
+    """ Initializer των worker processes (οι globals δεν μεταφέρονται με spawn) """
+    global ENGINE, CLUSTER, REPLAY, INSTRUMENT
+    ENGINE = engine
+    CLUSTER = cluster_spec.ClusterSpec.from_dict(cluster)
+    REPLAY = replay_config
+    INSTRUMENT = instrument
+
+def replication_plan(master_seed, first, last, estimator='plain'):
+    """ (seed, antithetic) των replications first..last (1-based)
+
+    Με antithetic variates οι replications 2i-1, 2i είναι ζεύγος: ίδιο seed, η δεύτερη με 1-U.
+    """
+    if estimator == 'antithetic':
+        return [(streams.replication_seed(master_seed, (rep + 1) // 2), rep % 2 == 0)
+                for rep in range(first, last + 1)]
+    return [(streams.replication_seed(master_seed, rep), False) for rep in range(first, last + 1)]
+
+def cache_key(sim_duration, algorithm, seed, d=0, engine=None, antithetic=False, warmup_time=None,
+              snapshot_path=None):
+    """ Κλειδί της replication στη ReplicationCache (ό,τι καθορίζει το αποτέλεσμά της) """
+    if snapshot_path is not None:
+        # Τα forks καθορίζονται από το snapshot (το όνομά του είναι ήδη hash των παραμέτρων του)
+        return replication_cache.replication_key({
+            'snapshot': os.path.splitext(os.path.basename(snapshot_path))[0],
+            'sim_duration': sim_duration, 'seed': seed, 'antithetic': antithetic})
+    return replication_cache.replication_key({
+        'cluster': CLUSTER.to_dict(),
+        'algorithm': algorithm,
+        'd': d,
+        'sim_duration': sim_duration,
+        'warmup': WARMUP_TIME if warmup_time is None else warmup_time,
+        'seed': seed,
+        'antithetic': antithetic,
+        'replay': replay.replay_key(REPLAY['path'], REPLAY['mode']) if REPLAY else None,
+        'engine': engine_family(resolve_engine(engine or ENGINE, algorithm)),
+    })
+
+def run_replication_wave(pool, workers, sim_duration, algorithm, d, plan, cache=None, warmup_time=None,
+                         snapshot_path=None, trace_dirs=None):
+    """ Τρέχει τις replications του plan και επιστρέφει τα αποτελέσματα (dicts) με τη σειρά τους
+
+    Με cache, τρέχουν μόνο όσες δεν έχουν ήδη αποθηκευτεί (και αποθηκεύονται μετά).
+    Με snapshot_path όλες κάνουν fork από το κοινό αρχείο (βλ. run_fork_replication).
+    Με trace_dirs (ένας κατάλογος ανά replication του plan) γράφονται traces και η
+    cache δεν χρησιμοποιείται (ένα αποθηκευμένο αποτέλεσμα δεν έχει trace)· το ίδιο με INSTRUMENT.
+    """
+    if trace_dirs is not None:
+        n = len(plan)
+        args = ([sim_duration] * n, [algorithm] * n, [seed for seed, _ in plan], [d] * n, [None] * n,
+                [anti for _, anti in plan], [warmup_time] * n, [snapshot_path] * n, trace_dirs)
+        return list(pool.map(run_replication, *args) if pool is not None else map(run_replication, *args))
+    if cache is not None and INSTRUMENT is None:
+        keys = [cache_key(sim_duration, algorithm, seed, d, antithetic=anti, warmup_time=warmup_time,
+                          snapshot_path=snapshot_path)
+                for seed, anti in plan]
+        results = [cache.get(key) for key in keys]
+        missing = [i for i, result in enumerate(results) if result is None]
+        fresh = run_replication_wave(pool, workers, sim_duration, algorithm, d, [plan[i] for i in missing],
+                                     warmup_time=warmup_time, snapshot_path=snapshot_path)
+        for i, result in zip(missing, fresh):
+            cache.put(keys[i], result)
+            results[i] = result
+        return results
+    if not plan:
+        return []
+    seeds = [seed for seed, _ in plan]
+    antithetic = [anti for _, anti in plan]
+    if snapshot_path is None and INSTRUMENT is None and resolve_engine(ENGINE, algorithm) == 'lindley':
+        # Όλο το wave ως 2-D πίνακες (ένα κομμάτι ανά process αν υπάρχει pool)
+        if pool is None:
+            return run_lindley_replications(sim_duration, algorithm, seeds, antithetic, warmup_time)
+        chunks = [list(range(len(plan)))[i::workers] for i in range(workers) if plan[i::workers]]
+        parts = list(pool.map(run_lindley_replications, [sim_duration] * len(chunks), [algorithm] * len(chunks),
+                              [[seeds[j] for j in chunk] for chunk in chunks],
+                              [[antithetic[j] for j in chunk] for chunk in chunks],
+                              [warmup_time] * len(chunks)))
+        results = [None] * len(plan)
+        for chunk, part in zip(chunks, parts):
+            for j, result in zip(chunk, part):
+                results[j] = result
+        return results
+    if pool is None:
+        return [run_replication(sim_duration, algorithm, seed, d, antithetic=anti, warmup_time=warmup_time,
+                                snapshot_path=snapshot_path)
+                for seed, anti in plan]
+    n = len(plan)
+    return list(pool.map(run_replication, [sim_duration] * n, [algorithm] * n, seeds, [d] * n,
+                         [None] * n, antithetic, [warmup_time] * n, [snapshot_path] * n))
+
+def warmup_key(sim_duration, algorithm, d, master_seed):
+    """ Κλειδί του αποτελέσματος του detect_warmup στη ReplicationCache """
+    return replication_cache.replication_key({
+        'purpose': 'mser5', 'cluster': CLUSTER.to_dict(), 'algorithm': algorithm, 'd': d,
+        'horizon': WARMUP_TIME + sim_duration, 'pilots': PILOT_REPLICATIONS, 'master_seed': master_seed,
+        'replay': replay.replay_key(REPLAY['path'], REPLAY['mode']) if REPLAY else None})
+
+def resolve_warmup(warmup_arg, sim_duration, algorithm, d, master_seed, cache=None):
+    """ 'auto' -> MSER-5 (detect_warmup, μέσω της cache αν δοθεί), αριθμός -> σταθερό warm-up """
+    if warmup_arg != 'auto':
+        return fixed_warmup(warmup_arg)
+    key = None
+    if cache is not None:
+        key = warmup_key(sim_duration, algorithm, d, master_seed)
+        info = cache.get(key)
+        if info is not None:
+            return info
+    info = detect_warmup(sim_duration, algorithm, d, master_seed)
+    if key is not None:
+        cache.put(key, info)
+    return info
+
+# --- ΑΠΟΤΕΛΕΣΜΑΤΑ ---
+def quantile_groups():
+    """ Ονόματα των γραμμών του wait_quantiles: 'all' και μία ανά κλάση ταχύτητας workers """
+    worker_class = speed_classes(CLUSTER.service_rates)
+    return ['all'] + [CLUSTER.class_name(worker_class.index(c)) for c in range(max(worker_class) + 1)]
+
+def summarize_quantiles(results):
+    """ CI (πάνω στις replications) και συγχωνευμένη τιμή των p50/p95/p99 ανά ομάδα
+
+    Επιστρέφει {ομάδα: {'p50': {'mean', 'half_width', 'pooled'}, ...}}: το pooled είναι
+    το ποσοστημόριο του sketch όλων των replications μαζί.
+    """
+    summary = {}
+    for i, group in enumerate(quantile_groups()):
+        pooled = quantile_sketch.merge_all(quantile_sketch.QuantileSketch.from_dict(r['wait_sketches'][i])
+                                           for r in results)
+        summary[group] = {}
+        for j, (name, q) in enumerate(quantile_sketch.QUANTILES.items()):
+            mean, hw = confidence.mean_ci([r['wait_quantiles'][i][j] for r in results])
+            summary[group][name] = {'mean': mean, 'half_width': hw, 'pooled': pooled.quantile(q)}
+    return summary
+
+def check_precision(results, estimator='plain', min_reps=MIN_REPLICATIONS):
+    """ (εκτίμηση, σχετικό σφάλμα) για τον κανόνα διακοπής, ή None αν δεν ελέγχεται ακόμα """
+    # Τα antithetic ζεύγη ελέγχονται μόνο όταν είναι πλήρη
+    if len(results) < min_reps or (estimator == 'antithetic' and len(results) % 2):
+        return None
+    mean, hw = confidence.estimate(estimator, results)
+    return mean, confidence.relative_error(mean, hw)
+
+def summarize_results(results, estimator='plain'):
+    """ Εκτίμηση (με τον επιλεγμένο εκτιμητή) και μέσοι όροι πάνω στα dicts των replications """
+    replications = len(results)
+    mean_wait, hw = confidence.estimate(estimator, results)
+    rel_error = confidence.relative_error(mean_wait, hw) if replications > 1 else 0.0
+    n_workers = len(results[0]['utilizations'])
+    # CI ανά worker για τη χρησιμοποίηση (και για το throughput) πάνω στις replications
+    node_cis = [confidence.mean_ci([r['utilizations'][i] for r in results]) for i in range(n_workers)]
+    utilizations = [mean for mean, _ in node_cis]
+    throughput, throughput_hw = confidence.mean_ci([r['throughput'] for r in results])
+    return {
+        'replications': replications,
+        'mean_wait': mean_wait,
+        'half_width': hw,
+        'rel_error': rel_error,
+        'throughput': throughput,
+        'throughput_half_width': throughput_hw,
+        'utilizations': utilizations,
+        'utilization_half_widths': [hw for _, hw in node_cis],
+        'total_utilization': sum(utilizations) / n_workers,
+        'wait_quantiles': summarize_quantiles(results),
+    }
+
+def without_replication_cis(summary):
+    """ Half-widths ως NaN: με μία (ντετερμινιστική) replication δεν υπάρχει CI πάνω σε replications """
+    nan = float('nan')
+    summary.update({'half_width': nan, 'rel_error': nan, 'throughput_half_width': nan,
+                    'utilization_half_widths': [nan] * len(summary['utilizations'])})
+    for qs in summary['wait_quantiles'].values():
+        for q in qs.values():
+            q['half_width'] = nan
+    return summary
+
+def print_quantiles(summary):
+    """ Γραμμή p50/p95/p99 (μέσος ± half-width πάνω στις replications) ανά ομάδα """
+    for group, qs in summary['wait_quantiles'].items():
+        values = ", ".join(f"{name} = {q['mean']:.4f} ± {q['half_width']:.4f}" for name, q in qs.items())
+        print(f"Wait quantiles ({group}): {values}")
+
+def results_metadata(sim_time, algorithm, estimator, master_seed, engine=None, warmup_info=None):
+    """ Παράμετροι της εκτέλεσης που αποθηκεύονται μαζί με τα αποτελέσματα (βλ. results_store.py) """
+    warmup_info = warmup_info or fixed_warmup(WARMUP_TIME)
+    return {
+        'sim_time': sim_time,
+        'warmup': warmup_info['warmup_time'],
+        'warmup_customers': warmup_info['warmup_customers'],
+        'warmup_method': warmup_info['warmup_method'],
+        'engine': resolve_engine(engine or ENGINE, algorithm),
+        'estimator': estimator,
+        'master_seed': master_seed,
+        'confidence_level': CONFIDENCE_LEVEL,
+        'desired_rel_error': DESIRED_REL_ERROR,
+        'cluster': CLUSTER.to_dict(),
+        'node_classes': [CLUSTER.class_name(i) for i in range(CLUSTER.n_workers)],
+        'replay': REPLAY,
+    }
+
+# --- STEADY STATE (ΕΝΑ ΜΑΚΡΥ RUN) ---
+def run_steady_state_main(args, warmup_info):
+    """ --mode steady-state: ένα run μετά από ένα warm-up, επεκτεινόμενο μέχρι την ακρίβεια
+
+    Το παράθυρο μέτρησης ξεκινάει από sim_time και μεγαλώνει έως
+    sim_time * MAX_REPLICATIONS (ο προϋπολογισμός των replications). Τρέχει με τη
+    native μηχανή, που δίνει τα ίδια αποτελέσματα με την ciw.
+    """
+    algo, d_val, sim_time = args.algo, args.d, args.sim_time
+    warmup_time = warmup_info['warmup_time']
+
+    def report(observer):
+        est = observer.estimates()['batch_means']
+        print(f"T = {observer.sim_duration:.0f} s: Mean Wait = {est['mean']:.4f} s, Rel Error = {est['rel_error']:.4f} "
+              f"({est['batches']} batches of {est['batch_size']}, lag-1 corr {est['lag1_correlation']:.3f})")
+
+    observer = steady_state.run_steady_state(
+        CLUSTER.arrival_rate, CLUSTER.service_rates, algo, d_val, streams.replication_seed(args.seed, 1),
+        warmup_time, sim_time, DESIRED_REL_ERROR, sim_time * MAX_REPLICATIONS, on_step=report)
+    if observer.precision_met(DESIRED_REL_ERROR):
+        print("--> Precision Met!")
+
+    estimates = observer.estimates()
+    batch = estimates['batch_means']
+    regen = estimates['regenerative']
+    result = observer.result()
+    n_workers = len(result['utilizations'])
+    summary = {
+        'replications': 1,
+        'mean_wait': batch['mean'],
+        'half_width': batch['half_width'],
+        'rel_error': batch['rel_error'],
+        'throughput': result['throughput'],
+        'throughput_half_width': float('nan'),
+        'utilizations': result['utilizations'],
+        'utilization_half_widths': [float('nan')] * n_workers,
+        'total_utilization': sum(result['utilizations']) / n_workers,
+        'wait_quantiles': summarize_quantiles([result]),
+    }
+    # Τα ποσοστημόρια ενός run δεν έχουν CI πάνω σε replications
+    for qs in summary['wait_quantiles'].values():
+        for q in qs.values():
+            q['half_width'] = float('nan')
+    metadata = results_metadata(sim_time, algo, 'batch_means', args.seed, 'fast', warmup_info)
+    metadata.update({'mode': 'steady-state', 'measured_time': observer.sim_duration,
+                     'batch_means': batch, 'regenerative': regen})
+    filename = results_store.write_config(args.results_dir, algo, d_val, [result], summary, metadata,
+                                          replication_plan(args.seed, 1, 1))
+
+    print(f"\nSimulated time: {warmup_time + observer.sim_duration:.0f} s (warm-up {warmup_time:.1f} s)")
+    print(f"Batch means:  Mean Wait = {batch['mean']:.6f} s (95% CI Half-width: {batch['half_width']:.6f}, "
+          f"Rel. Error: {batch['rel_error']:.4f})")
+    if 'mean' in regen:
+        print(f"Regenerative: Mean Wait = {regen['mean']:.6f} s (95% CI Half-width: {regen['half_width']:.6f}, "
+              f"Rel. Error: {regen['rel_error']:.4f}, {regen['cycles']} cycles)")
+    else:
+        print(f"Regenerative: only {regen['cycles']} empty-system cycles, no CI")
+    print(f"Throughput = {summary['throughput']:.6f} jobs/s, Utilization = {summary['total_utilization']:.4f}")
+    print_quantiles(summary)
+    print(f"Results written to {filename}")
 
 # --- MAIN ---
+def parse_args(argv):
+    parser = argparse.ArgumentParser(usage="python simulation.py <sim_time> <algo> <d> [--engine ciw|fast|lindley] [--workers N] [--seed S] [--cluster spec.json] [--estimator plain|antithetic|control] [--no-cache] [--results-dir DIR] [--warmup auto|SECONDS] [--mode replications|steady-state] [--fork N] [--trace DIR] [--replay DIR] [--replay-mode shift|bootstrap|exact] [--instrument] [--profile] [--telemetry PORT|unix:PATH]")
+    parser.add_argument('sim_time', type=float)
+    parser.add_argument('algo', type=int)
+    parser.add_argument('d', type=int)
+    parser.add_argument('--engine', choices=['ciw', 'fast', 'lindley'], default=ENGINE)
+    parser.add_argument('--workers', type=int, default=1, help="processes (replications ανά wave)")
+    parser.add_argument('--seed', type=int, default=streams.MASTER_SEED, help="master seed")
+    parser.add_argument('--cluster', help="JSON αρχείο με το cluster spec (βλ. cluster_spec.py)")
+    parser.add_argument('--estimator', choices=confidence.ESTIMATORS, default='plain',
+                        help="μείωση διασποράς: antithetic ζεύγη ή control variates (βλ. confidence.py)")
+    parser.add_argument('--cache', default=replication_cache.DEFAULT_PATH,
+                        help="SQLite αρχείο της cache των replications")
+    parser.add_argument('--no-cache', action='store_true', help="χωρίς ανάγνωση/αποθήκευση στην cache")
+    parser.add_argument('--results-dir', default=results_store.RESULTS_DIR,
+                        help="κατάλογος για τα .jsonl/.npz αποτελέσματα (βλ. results_store.py)")
+    parser.add_argument('--warmup', type=warmup_arg, default='auto',
+                        help="'auto' (MSER-5 σε pilot run, βλ. warmup.py) ή σταθερό warm-up σε sec")
+    parser.add_argument('--mode', choices=['replications', 'steady-state'], default='replications',
+                        help="ανεξάρτητες replications ή ένα μακρύ run με batch means / regenerative CI")
+    parser.add_argument('--fork', type=int, default=0, metavar='N',
+                        help="N warm-ups σε snapshot και fork των replications από αυτά (βλ. snapshot.py)")
+    parser.add_argument('--trace', metavar='DIR',
+                        help="columnar trace ανά εργασία σε DIR/repNNNN (βλ. trace_sink.py), χωρίς cache")
+    parser.add_argument('--replay', metavar='DIR',
+                        help="αφίξεις και μεγέθη εργασιών από replay trace (βλ. replay.py), native μηχανή")
+    parser.add_argument('--replay-mode', choices=replay.MODES, default='shift',
+                        help="παραλλαγή ανά replication: κυκλική μετατόπιση, block bootstrap ή ως έχει")
+    parser.add_argument('--instrument', action='store_true',
+                        help="μετρητές γεγονότων/δρομολόγησης, χρόνοι φάσεων και tracemalloc peak ανά replication")
+    parser.add_argument('--profile', action='store_true',
+                        help="όπως το --instrument, και cProfile dump της διαμόρφωσης σε <results-dir>/algo{a}_d{d}.prof")
+    parser.add_argument('--telemetry', type=telemetry.address_arg, metavar='PORT|unix:PATH',
+                        help="live μετρικές Prometheus σε http://127.0.0.1:PORT/metrics ή Unix socket (βλ. telemetry.py)")
+    return parser.parse_args(argv)
+
+def warmup_arg(text):
+    return text if text == 'auto' else float(text)
+
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: python simulation.py <sim_time> <algo> <d>")
-        sys.exit(1)
-        
-    sim_time = float(sys.argv[1])
-    algo = int(sys.argv[2])
-    d_val = int(sys.argv[3])
+    args = parse_args(sys.argv[1:])
+    sim_time = args.sim_time
+    algo = args.algo
+    d_val = args.d
     
-    global D_PARAMETER
-    D_PARAMETER = d_val
+    global ENGINE, CLUSTER, REPLAY, INSTRUMENT
+    ENGINE = args.engine
+    if args.cluster:
+        CLUSTER = cluster_spec.load_cluster_spec(args.cluster)
+    if args.replay:
+        if args.fork > 0 or args.mode == 'steady-state':
+            print("ERROR: --replay applies to independent replications (without --fork)")
+            sys.exit(1)
+        if args.replay_mode == 'exact' and args.estimator != 'plain':
+            print("ERROR: --replay-mode exact runs a single replication (use --estimator plain)")
+            sys.exit(1)
+        REPLAY = {'path': os.path.abspath(args.replay), 'mode': args.replay_mode}
     
-    print(f"--- Starting Simulation (Algo: {algo}, d: {d_val}, Time: {sim_time}) ---")
+    print(f"--- Starting Simulation (Algo: {algo}, d: {d_val}, Time: {sim_time}, Engine: {ENGINE}, Estimator: {args.estimator}) ---")
+    print(f"Cluster: {CLUSTER}")
+    if ENGINE == 'ciw' and CLUSTER.n_workers > CIW_MAX_WORKERS:
+        print(f"Note: the ciw event loop is O(workers) per event; use --engine fast for {CLUSTER.n_workers} workers")
+    if REPLAY is not None:
+        _, meta = replay.open_replay(REPLAY['path'])
+        print(f"Replay: {meta['count']} jobs, {replay.arrival_rate(meta):.4f} jobs/s ({REPLAY['mode']}, native engine, {REPLAY['path']})")
     
     # Γρήγορο διαγνωστικό check
     print("Running diagnostic check...", end=' ', flush=True)
     try:
-        run_single_replication(100, algo, 999)
+        run_single_replication(100, algo, 999, d_val)
         print("OK!")
     except Exception as e:
         print(f"\nERROR in Diagnostic: {e}")
         sys.exit(1)
 
     replications = 0
-    mean_waits = []
-    all_utilizations = {i: [] for i in range(2, 13)}
-    all_throughputs = []
+    results = []
     
-    min_reps = 10
-    max_reps = 50 
+    min_reps = MIN_REPLICATIONS
+    max_reps = MAX_REPLICATIONS
+    if exact_replay():
+        # Το trace ως έχει δεν έχει τυχαιότητα: κάθε replication θα ήταν ίδια και το CI ψευδώς 0
+        min_reps = max_reps = 1
+        print("Exact replay: all replications would be identical, running a single one (no CI)")
     
-    while replications < max_reps:
-        replications += 1
-        mw, utils, th = run_single_replication(sim_time, algo, replications)
-        
-        mean_waits.append(mw)
-        for i in utils: all_utilizations[i].append(utils[i])
-        all_throughputs.append(th)
+    # Οι replications που έχουν ήδη τρέξει (ίδιες παράμετροι, ίδιο seed) διαβάζονται από την cache
+    cache = None if args.no_cache else replication_cache.ReplicationCache(args.cache)
+    if args.trace and args.mode == 'steady-state':
+        print("--trace applies to replications; ignored in steady-state mode")
+    if (args.instrument or args.profile) and args.mode == 'steady-state':
+        print("--instrument/--profile apply to replications; ignored in steady-state mode")
+    
+    # Warm-up του πειράματος: MSER-5 πάνω στις αναμονές ενός pilot run (ή σταθερό)
+    warmup_info = resolve_warmup(args.warmup, sim_time, algo, d_val, args.seed, cache)
+    warmup_time = warmup_info['warmup_time']
+    print(f"Warm-up: {warmup_time:.1f} s ({warmup_info['warmup_method']}"
+          + (f", {warmup_info['warmup_customers']} customers deleted)" if warmup_info['warmup_customers'] is not None else ")"))
+    
+    if args.mode == 'steady-state':
+        if cache is not None:
+            cache.close()
+        run_steady_state_main(args, warmup_info)
+        return
+    
+    # Με --fork το warm-up τρέχει μία φορά ανά κατάσταση και οι replications κάνουν fork
+    snapshot_path = None
+    if args.fork > 0:
+        snapshot_path = prepare_snapshot(algo, d_val, warmup_time, args.seed, args.fork)
+        print(f"Warm-state snapshot: {args.fork} states ({snapshot_path})")
+    
+    # Instrumentation μετά το διαγνωστικό check, ώστε να μετράει μόνο τις replications
+    profile_dir = None
+    if args.instrument or args.profile:
+        if args.profile:
+            profile_dir = os.path.abspath(os.path.join(args.results_dir,
+                                                       results_store.config_name(algo, d_val) + '.profiles'))
+            shutil.rmtree(profile_dir, ignore_errors=True)  # Dumps ενός run που διακόπηκε
+        INSTRUMENT = {'profile_dir': profile_dir}
+    
+    progress = telemetry.Telemetry(sim_time, ENGINE, warmup_time, DESIRED_REL_ERROR, MIN_REPLICATIONS, max_reps,
+                                   args.estimator)
+    progress.register([(algo, d_val)])
+    server = telemetry.start(progress, args.telemetry) if args.telemetry is not None else None
+    
+    pool = None
+    if args.workers > 1:
+        pool = ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker,
+                                   initargs=(ENGINE, CLUSTER.to_dict(), REPLAY, INSTRUMENT))
+    
+    # Το Lindley path υπολογίζει πολλές replications μαζί, οπότε παίρνει μεγαλύτερα waves
+    wave_size = args.workers
+    if snapshot_path is None and INSTRUMENT is None and resolve_engine(ENGINE, algo) == 'lindley':
+        wave_size = max(args.workers, min_reps)
+    
+    # Οι replications τρέχουν σε waves μεγέθους wave_size. Ο κανόνας διακοπής
+    # ελέγχεται ανά replication με τη σειρά, και ό,τι περισσεύει από το wave
+    # απορρίπτεται, άρα το αποτέλεσμα δεν εξαρτάται από το πλήθος των workers.
+    precision_met = False
+    while replications < max_reps and not precision_met:
+        first = replications + 1
+        last = min(replications + wave_size, max_reps)
+        print(f"   -> Running replication {first}" + (f"-{last}" if last > first else "") + "...",
+              end='\r', flush=True)
+        plan = replication_plan(args.seed, first, last, args.estimator)
+        trace_dirs = ([trace_sink.trace_path(args.trace, rep) for rep in range(first, last + 1)]
+                      if args.trace else None)
+        wave = run_replication_wave(pool, args.workers, sim_time, algo, d_val, plan, cache, warmup_time,
+                                    snapshot_path, trace_dirs)
         
-        if replications >= min_reps:
-            mean_X = sum(mean_waits) / replications
-            variance = sum([(x - mean_X)**2 for x in mean_waits]) / (replications - 1)
-            S = math.sqrt(variance)
-            t_crit = get_t_value(replications - 1)
-            hw = t_crit * (S / math.sqrt(replications))
-            
-            rel_error = (hw / mean_X) if mean_X > 0 else 1.0
-            
-            # Καθαρίζουμε την γραμμή προόδου και τυπώνουμε το αποτέλεσμα
-            print(f"\rRep {replications}: Mean Wait = {mean_X:.4f} s, Rel Error = {rel_error:.4f}   ")
+        for result in wave:
+            replications += 1
+            results.append(result)
+            progress.update(algo, d_val, results, warmup_time=warmup_time)
             
-            if rel_error <= DESIRED_REL_ERROR:
-                print("--> Precision Met!")
-                break
-    
-    final_mean_wait = sum(mean_waits) / replications
-    
-    # Υπολογισμός διασποράς και διαστήματος εμπιστοσύνης
-    if replications > 1:
-        variance = sum([(x - final_mean_wait)**2 for x in mean_waits]) / (replications - 1)
-        S = math.sqrt(variance)
-        t_crit = get_t_value(replications - 1)
-        hw = t_crit * (S / math.sqrt(replications))
-        rel_error = (hw / final_mean_wait) if final_mean_wait > 0 else 1.0
+            check = check_precision(results, args.estimator)
+            if check is not None:
+                mean_X, rel_error = check
+                
+                # Καθαρίζουμε την γραμμή προόδου και τυπώνουμε το αποτέλεσμα
+                print(f"\rRep {replications}: Mean Wait = {mean_X:.4f} s, Rel Error = {rel_error:.4f}   ")
+                
+                if rel_error <= DESIRED_REL_ERROR:
+                    print("--> Precision Met!")
+                    precision_met = True
+                    break
+    
+    if pool is not None:
+        pool.shutdown()
+    progress.update(algo, d_val, results, finished=True, warmup_time=warmup_time)
+    telemetry.stop(server)
+    if cache is not None:
+        print(f"Cache: {cache.hits} hits, {cache.misses} misses ({cache.path})")
+        cache.close()
+    
+    summary = summarize_results(results, args.estimator)
+    if exact_replay():
+        summary = without_replication_cis(summary)
+    # Forks και traces τρέχουν πάντα σε μηχανή γεγονότων (ποτέ στο Lindley path)
+    traced_engine = 'fast' if resolve_engine(ENGINE, algo) == 'lindley' else None
+    metadata = results_metadata(sim_time, algo, args.estimator, args.seed,
+                                'fast' if snapshot_path else traced_engine if args.trace or INSTRUMENT else None,
+                                warmup_info)
+    if snapshot_path is not None:
+        metadata.update({'mode': 'fork', 'warm_states': args.fork})
+    filename = results_store.write_config(
+        args.results_dir, algo, d_val, results, summary, metadata,
+        replication_plan(args.seed, 1, replications, args.estimator))
+    if exact_replay():
+        print(f"\nMean Wait = {summary['mean_wait']:.6f} s (exact replay, CI n/a), "
+              f"Throughput = {summary['throughput']:.6f} jobs/s, Utilization = {summary['total_utilization']:.4f}")
     else:
-        hw = 0.0
-        rel_error = 0.0
-
-    final_throughput = sum(all_throughputs) / replications
-    avg_node_util = {i: sum(all_utilizations[i])/replications for i in range(2, 13)}
-    final_total_util = sum(avg_node_util.values()) / 11
-    
-    # --- ΕΓΓΡΑΦΗ ΣΕ ΑΡΧΕΙΟ ---
-    filename = f"results_algo{algo}_d{d_val}.txt"
-    with open(filename, "w", encoding='utf-8') as f:
-        f.write("--- ΑΠΟΤΕΛΕΣΜΑΤΑ ΠΡΟΣΟΜΟΙΩΣΗΣ ---\n")
-        f.write(f"Αλγόριθμος: {algo}, D: {d_val}\n")
-        f.write(f"Χρόνος Προσομοίωσης: {sim_time} sec (+{WARMUP_TIME} warmup)\n")
-        f.write(f"Επαναλήψεις: {replications}\n\n")
-        f.write(f"Μέσος Χρόνος Αναμονής: {final_mean_wait:.6f} sec\n")
-        f.write(f"(95% CI Half-width: {hw:.6f}, Rel. Error: {rel_error:.4f})\n")
-        f.write(f"Μέσος Ρυθμός Εξυπηρέτησης: {final_throughput:.6f} jobs/sec\n")
-        f.write(f"Μέση Συνολική Χρησιμοποίηση: {final_total_util:.4f}\n")
-        f.write("Μέση Χρησιμοποίηση ανά Κόμβο:\n")
-        for i in range(2, 13):
-            desc = "Slow" if i <= 6 else ("Medium" if i <= 9 else "Fast")
-            f.write(f"  Node {i} ({desc}): {avg_node_util[i]:.4f}\n")
-
-    print(f"\nResults written to {filename}")
+        print(f"\nMean Wait = {summary['mean_wait']:.6f} s (95% CI Half-width: {summary['half_width']:.6f}, "
+              f"Rel. Error: {summary['rel_error']:.4f}), Throughput = {summary['throughput']:.6f} jobs/s, "
+              f"Utilization = {summary['total_utilization']:.4f}")
+    print_quantiles(summary)
+    print(f"Results written to {filename}")
+    if INSTRUMENT is not None:
+        instrumentation.print_summary(instrumentation.summarize(results))
+        if profile_dir is not None:
+            profile = instrumentation.merge_profiles(
+                profile_dir, os.path.join(args.results_dir, results_store.config_name(algo, d_val) + '.prof'))
+            print(f"Profile written to {profile} (python -m pstats {profile})")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
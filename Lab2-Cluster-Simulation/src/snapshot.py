@@ -0,0 +1,74 @@
+import json
+import os
+
+import fast_engine
+from online_stats import ReplicationObserver
+
+# Warm-state snapshots: το warm-up προσομοιώνεται μία φορά (ή λίγες, από διαφορετικά
+# seeds για ποικιλία) με τη native μηχανή και η κατάσταση του συστήματος (ουρές,
+# εξυπηρετούμενοι πελάτες με τους χρόνους λήξης, επόμενη άφιξη, ρολόι) γράφεται σε
+# αρχείο JSON. Κάθε replication μέτρησης κάνει fork από μία κατάσταση με τα δικά της
+# substreams και προσομοιώνει μόνο το παράθυρο μέτρησης.
+# Τα worker processes διαβάζουν το κοινό αρχείο μία φορά το καθένα (load_snapshot).
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'cache', 'snapshots')
+
+_loaded = {}  # path -> snapshot, ανά process
+
+
+def capture(arrival_rate, service_rates, algorithm, d, seeds, warmup):
+    """ Ένα warm-up ανά seed (βλ. streams.warm_state_seed)· επιστρέφει τις καταστάσεις τη στιγμή warmup """
+    states = []
+    for seed in seeds:
+        observer = ReplicationObserver(arrival_rate, service_rates, warmup, 0.0)
+        engine = fast_engine.ClusterEngine(arrival_rate, service_rates, algorithm, d, seed, observer)
+        engine.run_until(warmup)
+        states.append(engine.state())
+    return states
+
+
+def write_snapshot(path, params, states):
+    """ Γράφει τις καταστάσεις μαζί με τις παραμέτρους που τις παρήγαγαν (cluster, algo, d, warm-up) """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': SNAPSHOT_VERSION, 'params': params, 'states': states}, f)
+    os.replace(tmp, path)  # Τα workers δεν βλέπουν ποτέ μισογραμμένο αρχείο
+    return path
+
+
+def load_snapshot(path):
+    """ Το snapshot του αρχείου (μία ανάγνωση ανά process) """
+    if path not in _loaded:
+        with open(path, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version in {path}: {snapshot.get('version')}")
+        _loaded[path] = snapshot
+    return _loaded[path]
+
+
+def fork(snapshot, index, seed, sim_duration, antithetic=False, trace=None, probe=None):
+    """ Replication μέτρησης από την κατάσταση index % (πλήθος καταστάσεων)
+
+    Μετράει στο [now, now + sim_duration] της κατάστασης, με τους ίδιους ορισμούς
+    στατιστικών με μια replication από t = 0 με warm-up now. Επιστρέφει τον observer.
+    """
+    params = snapshot['params']
+    state = snapshot['states'][index % len(snapshot['states'])]
+    observer = ReplicationObserver(params['arrival_rate'], params['service_rates'], state['now'], sim_duration)
+    engine = fast_engine.ClusterEngine(params['arrival_rate'], params['service_rates'], params['algorithm'],
+                                       params['d'], seed, observer, antithetic, trace)
+    engine.restore(state)
+    if probe is not None:
+        # Το restore ξαναφτιάχνει τον router· δεν υπάρχει φάση warm-up
+        engine.router = probe.timed(engine.router)
+        probe.lap('build')
+    engine.run_until(state['now'] + sim_duration)
+    if probe is not None:
+        probe.lap('measurement')
+        probe.events = engine.events_processed
+    if trace is not None:
+        engine.trace_unfinished()  # Οι εργασίες του snapshot που δεν ολοκληρώθηκαν στο παράθυρο
+    return observer
@@ -0,0 +1,182 @@
+import math
+
+import confidence
+import fast_engine
+from online_stats import ReplicationObserver
+
+# Steady-state εκτίμηση από ένα μόνο μακρύ run (μετά από ένα warm-up), αντί για
+# ανεξάρτητες replications που πληρώνουν το warm-up η καθεμία:
+#   - batch means: μη επικαλυπτόμενα batches με αυτόματο μέγεθος (διπλασιάζεται
+#     όταν γεμίσουν MAX_BATCHES, οπότε μένουν πάντα MAX_BATCHES/2 .. MAX_BATCHES-1)
+#   - regenerative: κύκλοι ανάμεσα σε αφίξεις που βρίσκουν το σύστημα άδειο,
+#     εκτιμητής λόγου ΣY / Στ (Y = άθροισμα αναμονών, τ = πελάτες του κύκλου)
+# Το run επεκτείνεται μέχρι να ικανοποιηθεί το DESIRED_REL_ERROR. Το half-width πέφτει
+# περίπου ως 1/sqrt(T), οπότε κάθε επέκταση στοχεύει στο T * (rel_error / στόχος)^2
+# (με 10% περιθώριο), από 1.25x έως 2x το τρέχον παράθυρο.
+
+MAX_BATCHES = 64
+MAX_LAG1_CORRELATION = 0.2  # Πάνω από αυτό (και πάνω από τον θόρυβο 2/sqrt(k)) τα batches είναι πολύ μικρά
+MIN_CYCLES = 30  # Λιγότεροι κύκλοι: δεν δίνεται regenerative CI
+
+
+class BatchMeans:
+    """ Batch means με αυτόματο μέγεθος batch (συγχώνευση ζευγών όταν γεμίσουν) """
+    __slots__ = ('batch_size', 'batches', '_sum', '_count')
+
+    def __init__(self):
+        self.batch_size = 1
+        self.batches = []
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, x):
+        self._sum += x
+        self._count += 1
+        if self._count == self.batch_size:
+            self.batches.append(self._sum / self.batch_size)
+            self._sum = 0.0
+            self._count = 0
+            if len(self.batches) == MAX_BATCHES:
+                b = self.batches
+                self.batches = [(b[i] + b[i + 1]) / 2 for i in range(0, MAX_BATCHES, 2)]
+                self.batch_size *= 2
+
+    def lag1_correlation(self):
+        b = self.batches
+        k = len(b)
+        if k < 3:
+            return 1.0
+        mean = sum(b) / k
+        var = sum((x - mean)**2 for x in b)
+        if var == 0:
+            return 0.0
+        return sum((b[i] - mean) * (b[i + 1] - mean) for i in range(k - 1)) / var
+
+    def ci(self):
+        """ (μέσος, half-width) πάνω στα ολοκληρωμένα batches """
+        if not self.batches:
+            return 0.0, math.inf
+        return confidence.mean_ci(self.batches)
+
+
+class Regenerative:
+    """ Αθροίσματα ανά κύκλο αναγέννησης (ο τρέχων κύκλος μετράει μόνο όταν κλείσει) """
+    __slots__ = ('n', 'sum_y', 'sum_t', 'sum_yy', 'sum_tt', 'sum_yt', 'started', '_y', '_t')
+
+    def __init__(self):
+        self.n = 0
+        self.sum_y = self.sum_t = self.sum_yy = self.sum_tt = self.sum_yt = 0.0
+        self.started = False
+        self._y = 0.0
+        self._t = 0
+
+    def regenerate(self):
+        if self.started and self._t:
+            y, t = self._y, self._t
+            self.n += 1
+            self.sum_y += y
+            self.sum_t += t
+            self.sum_yy += y * y
+            self.sum_tt += t * t
+            self.sum_yt += y * t
+        self.started = True
+        self._y = 0.0
+        self._t = 0
+
+    def add(self, wait):
+        if self.started:
+            self._y += wait
+            self._t += 1
+
+    def ci(self):
+        if self.n < MIN_CYCLES:
+            return None
+        return confidence.ratio_ci(self.n, self.sum_y, self.sum_t, self.sum_yy, self.sum_tt, self.sum_yt)
+
+
+class SteadyStateObserver(ReplicationObserver):
+    """ ReplicationObserver που τροφοδοτεί και τους δύο steady-state εκτιμητές
+
+    Κρατάει το πλήθος πελατών στο σύστημα: μια άφιξη μετά το warm-up που το βρίσκει
+    άδειο ξεκινάει νέο κύκλο αναγέννησης.
+    """
+
+    def __init__(self, arrival_rate, service_rates, warmup, sim_duration):
+        super().__init__(arrival_rate, service_rates, warmup, sim_duration)
+        self.in_system = 0
+        self.batch_means = BatchMeans()
+        self.regenerative = Regenerative()
+
+    def extend(self, sim_duration):
+        """ Μεγαλώνει το παράθυρο μέτρησης (πριν συνεχίσει η μηχανή) """
+        self.sim_duration = sim_duration
+        self.end_time = self.warmup + sim_duration
+
+    def dispatch(self, date):
+        if self.in_system == 0 and date > self.warmup:
+            self.regenerative.regenerate()
+        self.in_system += 1
+        super().dispatch(date)
+
+    def service(self, worker, arrival_date, service_start_date, service_end_date):
+        self.in_system -= 1
+        super().service(worker, arrival_date, service_start_date, service_end_date)
+        if arrival_date > self.warmup:
+            wait = service_start_date - arrival_date
+            self.batch_means.add(wait)
+            self.regenerative.add(wait)
+
+    def estimates(self):
+        """ Batch means και regenerative (ή None) εκτιμήσεις με τα CIs τους """
+        mean, hw = self.batch_means.ci()
+        return {
+            'batch_means': {'mean': mean, 'half_width': hw,
+                            'rel_error': confidence.relative_error(mean, hw),
+                            'batches': len(self.batch_means.batches),
+                            'batch_size': self.batch_means.batch_size,
+                            'lag1_correlation': self.batch_means.lag1_correlation()},
+            'regenerative': self._regenerative_estimate(),
+        }
+
+    def _regenerative_estimate(self):
+        ci = self.regenerative.ci()
+        if ci is None:
+            return {'cycles': self.regenerative.n}
+        mean, hw = ci
+        return {'mean': mean, 'half_width': hw, 'rel_error': confidence.relative_error(mean, hw),
+                'cycles': self.regenerative.n}
+
+    def batches_independent(self):
+        """ Η lag-1 αυτοσυσχέτιση των batch means δεν ξεπερνά ούτε το όριο ούτε τον θόρυβο 2/sqrt(k) """
+        k = len(self.batch_means.batches)
+        if k < 3:
+            return False
+        return self.batch_means.lag1_correlation() <= max(MAX_LAG1_CORRELATION, 2 / math.sqrt(k))
+
+    def precision_met(self, desired_rel_error):
+        est = self.estimates()['batch_means']
+        return est['rel_error'] <= desired_rel_error and self.batches_independent()
+
+    def next_duration(self, desired_rel_error, max_duration):
+        """ Παράθυρο μέτρησης της επόμενης επέκτασης """
+        rel_error = self.estimates()['batch_means']['rel_error']
+        factor = 2.0
+        if self.batches_independent() and math.isfinite(rel_error):
+            factor = min(max(1.1 * (rel_error / desired_rel_error) ** 2, 1.25), 2.0)
+        return min(factor * self.sim_duration, max_duration)
+
+
+def run_steady_state(arrival_rate, service_rates, algorithm, d, seed, warmup, sim_duration,
+                     desired_rel_error, max_duration, on_step=None):
+    """ Ένα run με τη native μηχανή, που επεκτείνεται (έως max_duration) μέχρι τα
+    batch means να δώσουν την επιθυμητή ακρίβεια
+    """
+    observer = SteadyStateObserver(arrival_rate, service_rates, warmup, sim_duration)
+    engine = fast_engine.ClusterEngine(arrival_rate, service_rates, algorithm, d, seed, observer)
+    while True:
+        engine.run_until(warmup + observer.sim_duration)
+        if on_step is not None:
+            on_step(observer)
+        if observer.precision_met(desired_rel_error) or observer.sim_duration >= max_duration:
+            return observer
+        observer.extend(observer.next_duration(desired_rel_error, max_duration))
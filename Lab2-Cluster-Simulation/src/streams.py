@@ -0,0 +1,128 @@
+import numpy as np
+
+# Ανεξάρτητα random substreams ανά replication, παραγόμενα από ένα master seed
+# με το SeedSequence της NumPy (αντί για ciw.seed(1), ciw.seed(2), ...).
+
+MASTER_SEED = 20240601
+
+
+def replication_stream(master_seed, index):
+    """ SeedSequence της replication `index` (ίδιο με το index-οστό spawn του master) """
+    return np.random.SeedSequence(master_seed, spawn_key=(index,))
+
+
+def seed_to_int(seed_sequence):
+    """ Ακέραιο seed 128-bit για ciw.seed() / random.Random() από ένα SeedSequence """
+    seed = 0
+    for w in seed_sequence.generate_state(4, np.uint32):
+        seed = (seed << 32) | int(w)
+    return seed
+
+
+def replication_seed(master_seed, index):
+    """ Ακέραιο seed της replication `index` """
+    return seed_to_int(replication_stream(master_seed, index))
+
+
+def pilot_seed(master_seed, index):
+    """ Seed του pilot run `index` (ξεχωριστό δέντρο από τις replications 1, 2, ...) """
+    return seed_to_int(np.random.SeedSequence(master_seed, spawn_key=(0, index)))
+
+
+def warm_state_seed(master_seed, index):
+    """ Seed του warm-up `index` ενός snapshot (βλ. snapshot.py), ξεχωριστό από τα pilots """
+    return seed_to_int(np.random.SeedSequence(master_seed, spawn_key=(0, 0, index)))
+
+
+# Substreams μέσα σε μία replication: (0,) αφίξεις, (1,) τυχαία δρομολόγηση,
+# (2, k) χρόνοι εξυπηρέτησης του worker k. Εξαρτώνται μόνο από το seed της
+# replication, οπότε όλες οι πολιτικές βλέπουν τις ίδιες αφίξεις και τους ίδιους
+# χρόνους εξυπηρέτησης ανά worker (common random numbers).
+def arrival_stream(seed):
+    return np.random.SeedSequence(seed, spawn_key=(0,))
+
+
+def routing_stream(seed):
+    return np.random.SeedSequence(seed, spawn_key=(1,))
+
+
+def service_stream(seed, worker):
+    return np.random.SeedSequence(seed, spawn_key=(2, worker))
+
+
+# Οι τιμές παράγονται σε blocks των BLOCK_SIZE με τη NumPy (PCG64 πάνω στο SeedSequence
+# του substream) και δίνονται μία-μία από μια λίστα: μία κλήση της NumPy ανά block
+# αντί για μία κλήση Python γεννήτορα + math.log ανά τιμή. Τα blocks είναι συνεχόμενα
+# κομμάτια της ίδιας ακολουθίας με τα uniforms()/exponentials() πάνω σε
+# default_rng(seed_sequence), οπότε ciw, native μηχανή και Lindley path βλέπουν
+# ακριβώς τους ίδιους αριθμούς ανά substream (common random numbers).
+BLOCK_SIZE = 1024
+
+
+class VariateStream:
+    """ Uniform / εκθετικές τιμές από ένα substream· με antithetic=True δίνει τις 1-U """
+    __slots__ = ('_rng', 'antithetic', '_uniforms', '_exponentials')
+
+    def __init__(self, seed_sequence, antithetic=False):
+        self._rng = np.random.default_rng(seed_sequence)
+        self.antithetic = antithetic
+        # Τα blocks αποθηκεύονται ανάποδα, ώστε κάθε τιμή να βγαίνει με list.pop()
+        self._uniforms = []
+        self._exponentials = []
+
+    def random(self):
+        try:
+            return self._uniforms.pop()
+        except IndexError:
+            self._uniforms = uniforms(self._rng, BLOCK_SIZE, self.antithetic)[::-1].tolist()
+            return self._uniforms.pop()
+
+    def exponential(self, rate):
+        # Αντίστροφος μετασχηματισμός: -ln(1-U)/rate, και -ln(U)/rate για το antithetic ζεύγος
+        try:
+            return self._exponentials.pop() / rate
+        except IndexError:
+            self._exponentials = exponentials(self._rng, 1.0, BLOCK_SIZE, self.antithetic)[::-1].tolist()
+            return self._exponentials.pop() / rate
+
+
+def uniforms(rng, n, antithetic=False):
+    """ Vectorized αντίστοιχο του VariateStream.random() """
+    u = rng.random(n)
+    return 1.0 - u if antithetic else u
+
+
+def exponentials(rng, rate, n, antithetic=False):
+    """ Vectorized αντίστοιχο του VariateStream.exponential() """
+    u = rng.random(n)
+    if antithetic:
+        return -np.log(np.where(u > 0.0, u, 1.0)) / rate
+    return -np.log1p(-u) / rate
+
+
+def benchmark(draws=1_000_000):
+    """ Κόστος ανά εκθετική τιμή (ns): ciw, Python γεννήτορας, NumPy ανά κλήση, VariateStream """
+    import math
+    import random
+    import timeit
+
+    import ciw
+
+    rate = 0.25
+    ciw_dist = ciw.dists.Exponential(rate=rate)
+    py_random = random.Random(1).random
+    generator = np.random.default_rng(1)
+    stream = VariateStream(np.random.SeedSequence(1))
+    candidates = {
+        'ciw.dists.Exponential.sample': ciw_dist.sample,
+        'random.Random + math.log': lambda: -math.log(1.0 - py_random()) / rate,
+        'numpy Generator.exponential': lambda: generator.exponential(1.0 / rate),
+        f'VariateStream (blocks of {BLOCK_SIZE})': lambda: stream.exponential(rate),
+    }
+    for name, draw in candidates.items():
+        seconds = min(timeit.repeat(draw, number=draws, repeat=3))
+        print(f"{name:<36} {seconds / draws * 1e9:8.1f} ns/draw")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,228 @@
+import math
+import os
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import confidence
+
+# Live πρόοδος μιας εκτέλεσης σε μορφή Prometheus (text exposition format 0.0.4),
+# μέσω HTTP στο 127.0.0.1:<port>/metrics ή μέσω Unix socket (--telemetry unix:<path>):
+#   curl -s localhost:9464/metrics
+#   curl -s --unix-socket /tmp/cluster-sim.sock http://localhost/metrics
+# Ο scheduler / το main ενημερώνουν το Telemetry μετά από κάθε replication· ο server
+# τρέχει σε daemon thread και απλώς διαβάζει ένα στιγμιότυπο κάτω από lock.
+#
+# Οι παράμετροι του κανόνα διακοπής (στόχος, MIN/MAX_REPLICATIONS, warm-up) δίνονται στο
+# Telemetry από τον καλούντα, ώστε το module να μην εξαρτάται από το simulation.py.
+#
+# ETA: το σχετικό σφάλμα πέφτει περίπου ως 1/sqrt(n), άρα με n replications και σφάλμα e
+# χρειάζονται n * (e / target)^2 (το πολύ max_replications). Οι υπόλοιπες
+# replications επί τον παρατηρημένο wall time ανά replication (όλου του pool) δίνουν
+# το ETA. projected_replications > max_replications: η διαμόρφωση μάλλον δεν θα συγκλίνει.
+
+DEFAULT_PORT = 9464
+HOST = '127.0.0.1'  # Μόνο τοπικά
+PREFIX = 'cluster_sim'
+
+
+class Telemetry:
+    """ Κατάσταση προόδου ανά διαμόρφωση (algo, d), ασφαλής για ενημέρωση από άλλο thread """
+
+    def __init__(self, sim_duration, engine, warmup_time, target, min_replications, max_replications,
+                 estimator='plain'):
+        self.sim_duration = sim_duration
+        self.engine = engine
+        self.warmup_time = warmup_time  # Όταν το update δεν δίνει το warm-up της διαμόρφωσης
+        self.target = target
+        self.min_replications = min_replications
+        self.max_replications = max_replications
+        self.estimator = estimator
+        self.started = time.time()
+        self.configs = {}  # (algo, d) -> dict
+        self.events = 0.0
+        self._lock = threading.Lock()
+
+    def register(self, grid):
+        """ Δηλώνει τις διαμορφώσεις (algo, d) από την αρχή, ώστε να μετράνε στο ETA πριν ξεκινήσουν """
+        with self._lock:
+            for key in grid:
+                self.configs.setdefault(tuple(key), new_config())
+
+    def update(self, algo, d, results, finished=False, warmup_time=None):
+        """ Τα αποτελέσματα της (algo, d) μέχρι τώρα (με τη σειρά τους) """
+        warmup_time = self.warmup_time if warmup_time is None else warmup_time
+        check = current_estimate(results, self.estimator)
+        with self._lock:
+            config = self.configs.setdefault((algo, d), new_config())
+            # Μόνο οι καινούργιες replications μετράνε στα γεγονότα
+            self.events += sum(replication_events(r, warmup_time, self.sim_duration)
+                               for r in results[config['replications']:])
+            config.update({'replications': len(results), 'finished': finished,
+                           'mean_wait': check[0] if check else math.nan,
+                           'rel_error': check[1] if check else math.nan,
+                           'updated': time.time()})
+
+    def snapshot(self):
+        """ (διαμορφώσεις, σύνολο γεγονότων, δευτερόλεπτα από την έναρξη) """
+        with self._lock:
+            return {key: dict(c) for key, c in self.configs.items()}, self.events, time.time() - self.started
+
+    def render(self):
+        """ Οι μετρικές σε Prometheus text format """
+        configs, events, elapsed = self.snapshot()
+        done = sum(c['replications'] for c in configs.values())
+        per_replication = elapsed / done if done else math.nan
+        active = [key for key, c in configs.items() if not c['finished']]
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{PREFIX}_{name}{{{label_text}}} {format_value(value)}" if label_text
+                             else f"{PREFIX}_{name} {format_value(value)}")
+
+        labels = lambda key: {'algo': key[0], 'd': key[1]}
+        projection = {key: projected_replications(c, self.target, self.min_replications)
+                      for key, c in configs.items()}
+        remaining = {key: remaining_replications(c, projection[key], self.min_replications, self.max_replications)
+                     for key, c in configs.items()}
+
+        metric('info', 'gauge', "Run parameters (value is always 1)",
+               [({'engine': self.engine, 'estimator': self.estimator, 'sim_time': self.sim_duration,
+                  'active': " ".join(f"{a}:{d}" for a, d in active)}, 1)])
+        metric('target_relative_error', 'gauge', "DESIRED_REL_ERROR of the stopping rule",
+               [({}, self.target)])
+        metric('max_replications', 'gauge', "Replication budget per configuration",
+               [({}, self.max_replications)])
+        metric('replications', 'gauge', "Replications completed (in order) per configuration",
+               [(labels(key), c['replications']) for key, c in configs.items()])
+        metric('finished', 'gauge', "1 when the configuration has stopped",
+               [(labels(key), int(c['finished'])) for key, c in configs.items()])
+        metric('mean_wait_seconds', 'gauge', "Current estimate of the mean waiting time",
+               [(labels(key), c['mean_wait']) for key, c in configs.items()])
+        metric('relative_error', 'gauge', "Current CI half-width / mean",
+               [(labels(key), c['rel_error']) for key, c in configs.items()])
+        metric('projected_replications', 'gauge',
+               "Replications needed for the target, from the 1/sqrt(n) convergence of the relative error",
+               [(labels(key), projection[key]) for key in configs])
+        metric('eta_seconds', 'gauge', "Estimated wall time until the configuration stops (fair share of the pool)",
+               [(labels(key), remaining[key] * per_replication * max(len(active), 1)) for key in configs])
+        metric('campaign_eta_seconds', 'gauge', "Estimated wall time until every configuration stops",
+               [({}, sum(remaining.values()) * per_replication)])
+        metric('events_total', 'counter', "Simulated events (arrivals + completions, approximate over the warm-up)",
+               [({}, events)])
+        metric('events_per_second', 'gauge', "Simulated events per wall-clock second since the start",
+               [({}, events / elapsed if elapsed > 0 else 0.0)])
+        metric('elapsed_seconds', 'gauge', "Wall time since the start", [({}, elapsed)])
+        return "\n".join(lines) + "\n"
+
+
+def new_config():
+    return {'replications': 0, 'finished': False, 'mean_wait': math.nan, 'rel_error': math.nan, 'updated': None}
+
+
+def current_estimate(results, estimator):
+    """ (μέσος, σχετικό σφάλμα) με τον εκτιμητή του run, ή None πριν από 2 replications (ή πλήρη ζεύγη) """
+    if len(results) < 2 or (estimator == 'antithetic' and len(results) % 2):
+        return None
+    mean, hw = confidence.estimate(estimator, results)
+    return mean, confidence.relative_error(mean, hw)
+
+
+def remaining_replications(config, projection, min_replications, max_replications):
+    """ Replications μέχρι τη διακοπή· χωρίς εκτίμηση σφάλματος, όσες λείπουν ως το min_replications """
+    if config['finished']:
+        return 0
+    target = min_replications if math.isnan(projection) else min(projection, max_replications)
+    return max(target - config['replications'], 0)
+
+
+def replication_events(result, warmup_time, sim_duration):
+    """ Γεγονότα μιας replication: ακριβώς με instrumentation, αλλιώς throughput * (warm-up + ορίζοντας) """
+    if 'instrumentation' in result:
+        return result['instrumentation']['events']
+    return result['throughput'] * (warmup_time + sim_duration)
+
+
+def projected_replications(config, target, min_replications):
+    """ n * (e / target)^2, ή NaN όσο δεν υπάρχει εκτίμηση σφάλματος """
+    n, rel_error = config['replications'], config['rel_error']
+    if n < 2 or math.isnan(rel_error):
+        return math.nan
+    return max(math.ceil(n * (rel_error / target) ** 2), min_replications)
+
+
+def format_value(value):
+    if isinstance(value, float) and math.isnan(value):
+        return 'NaN'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# --- SERVER ---
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/metrics', '/'):
+            self.send_error(404)
+            return
+        body = self.server.telemetry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self):
+        # Στο Unix socket το client_address είναι κενό
+        return self.client_address[0] if self.client_address else 'unix'
+
+    def log_message(self, format, *args):
+        pass  # Τα scrapes δεν γράφουν στην έξοδο της προσομοίωσης
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def serve(telemetry, address=DEFAULT_PORT):
+    """ Ξεκινάει τον server σε daemon thread· address: port ή 'unix:<path>'. Επιστρέφει τον server """
+    if isinstance(address, str) and address.startswith('unix:'):
+        path = address[len('unix:'):]
+        if os.path.exists(path):
+            os.remove(path)  # Socket από προηγούμενο run
+        server = _UnixHTTPServer(path, _MetricsHandler)
+        where = f"unix:{path}"
+    else:
+        server = ThreadingHTTPServer((HOST, int(address)), _MetricsHandler)
+        where = f"http://{HOST}:{server.server_address[1]}/metrics"
+    server.telemetry = telemetry
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Telemetry: {where}")
+    return server
+
+
+def start(telemetry, address):
+    """ Όπως το serve, αλλά ένα port σε χρήση δεν σταματάει την εκτέλεση (επιστρέφει None) """
+    try:
+        return serve(telemetry, address)
+    except OSError as e:
+        print(f"Telemetry disabled ({address}: {e})", file=sys.stderr)
+        return None
+
+
+def stop(server):
+    if server is None:
+        return
+    server.shutdown()
+    server.server_close()
+    if isinstance(server.server_address, str) and os.path.exists(server.server_address):
+        os.remove(server.server_address)
+
+
+def address_arg(text):
+    """ --telemetry: port ή unix:<path> """
+    return text if text.startswith('unix:') else int(text)
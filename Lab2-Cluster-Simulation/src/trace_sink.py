@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+from array import array
+
+import numpy as np
+
+# Προαιρετικό trace ανά εργασία σε στηλοθετημένη δυαδική μορφή: ένα αρχείο ανά στήλη
+# (<στήλη>.bin, σταθερός dtype, native byte order) και ένα meta.json με τους dtypes,
+# το πλήθος των εγγραφών και τις παραμέτρους του run. Οι εγγραφές μαζεύονται σε
+# buffers και γράφονται στο τέλος κάθε chunk, οπότε η μνήμη του run μένει φραγμένη.
+# Η ανάλυση ανοίγει τις στήλες με numpy.memmap (open_trace), χωρίς αντιγραφή.
+#
+# node: ο worker με την αρίθμηση 2..N+1 της εκφώνησης (Node 1 ήταν ο dispatcher). Εργασίες που δεν ολοκληρώθηκαν
+# μέχρι το τέλος του run γράφονται με NaN στους χρόνους που λείπουν.
+
+COLUMNS = {
+    'id': ('q', np.int64),
+    'node': ('i', np.int32),
+    'arrival': ('d', np.float64),
+    'service_start': ('d', np.float64),
+    'service_end': ('d', np.float64),
+    'wait': ('d', np.float64),
+    'queue_length': ('i', np.int32),  # Εργασίες στον worker τη στιγμή της άφιξης
+}
+CHUNK_SIZE = 1 << 16
+TRACE_VERSION = 1
+
+
+class TraceWriter:
+    """ Γράφει εγγραφές εργασιών σε <directory>/<στήλη>.bin ανά CHUNK_SIZE εγγραφές """
+
+    def __init__(self, directory, metadata=None, chunk_size=CHUNK_SIZE):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.metadata = metadata or {}
+        self.chunk_size = chunk_size
+        self.count = 0
+        self._buffers = {name: array(code) for name, (code, _) in COLUMNS.items()}
+        self._files = {name: open(os.path.join(directory, name + '.bin'), 'wb') for name in COLUMNS}
+
+    def append(self, id_number, node, arrival, service_start, service_end, queue_length):
+        b = self._buffers
+        b['id'].append(id_number)
+        b['node'].append(node)
+        b['arrival'].append(arrival)
+        b['service_start'].append(service_start)
+        b['service_end'].append(service_end)
+        b['wait'].append(service_start - arrival)
+        b['queue_length'].append(queue_length)
+        if len(b['id']) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        for name, buf in self._buffers.items():
+            buf.tofile(self._files[name])
+        self.count += len(self._buffers['id'])
+        self._buffers = {name: array(code) for name, (code, _) in COLUMNS.items()}
+
+    def close(self):
+        """ Γράφει ό,τι έμεινε και το meta.json (ένα trace χωρίς meta.json είναι ημιτελές) """
+        self.flush()
+        for f in self._files.values():
+            f.close()
+        meta = {'version': TRACE_VERSION, 'count': self.count, 'byteorder': sys.byteorder,
+                'columns': {name: np.dtype(dtype).str for name, (_, dtype) in COLUMNS.items()},
+                **self.metadata}
+        write_meta(self.directory, meta)
+
+
+def write_meta(directory, meta):
+    """ Γράφει το meta.json (τελευταίο, αφού γραφτούν οι στήλες) """
+    with open(os.path.join(directory, 'meta.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=2)
+
+
+def open_trace(directory):
+    """ (στήλες ως read-only numpy.memmap, meta) ενός trace """
+    with open(os.path.join(directory, 'meta.json'), 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    if meta.get('version') != TRACE_VERSION:
+        raise ValueError(f"Unsupported trace version in {directory}: {meta.get('version')}")
+    columns = {}
+    for name, dtype in meta['columns'].items():
+        path = os.path.join(directory, name + '.bin')
+        # Το memmap δεν δέχεται αρχείο 0 bytes
+        columns[name] = (np.memmap(path, dtype=dtype, mode='r', shape=(meta['count'],))
+                         if meta['count'] else np.empty(0, dtype=dtype))
+    return columns, meta
+
+
+def busy_time(trace, n_workers, start, end):
+    """ Χρόνος απασχόλησης κάθε worker μέσα στο [start, end] (ολοκληρωμένες εξυπηρετήσεις) """
+    finish = trace['service_end']
+    done = ~np.isnan(finish)
+    overlap = np.minimum(finish[done], end) - np.maximum(trace['service_start'][done], start)
+    return np.bincount(trace['node'][done] - 2, weights=np.maximum(overlap, 0.0), minlength=n_workers)
+
+
+def summary(trace, n_workers, warmup, sim_duration):
+    """ (mean_wait, utilizations, throughput) με τους ορισμούς του ReplicationObserver """
+    end = warmup + sim_duration
+    arrival, finish = trace['arrival'], trace['service_end']
+    measured = (arrival > warmup) & (finish <= end)
+    waits = trace['wait'][measured]
+    mean_wait = float(waits.mean()) if len(waits) else 0.0
+    utilizations = (busy_time(trace, n_workers, warmup, end) / sim_duration).tolist()
+    # Διελεύσεις από τον dispatcher + ολοκληρωμένες εξυπηρετήσεις μέσα στο παράθυρο
+    dispatched = np.count_nonzero((arrival > warmup) & (arrival <= end))
+    completed = np.count_nonzero((finish > warmup) & (finish <= end))
+    return mean_wait, utilizations, (dispatched + completed) / sim_duration
+
+
+def trace_path(root, replication):
+    """ Κατάλογος του trace της replication `replication` (1-based) κάτω από το root """
+    return os.path.join(root, f"rep{replication:04d}")
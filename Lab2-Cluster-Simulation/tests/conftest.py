@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Τα modules του src εισάγονται με flat imports, όπως όταν τρέχουν ως scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
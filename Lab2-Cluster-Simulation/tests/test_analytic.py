@@ -0,0 +1,55 @@
+import math
+
+import numpy as np
+import pytest
+
+import analytic
+import cluster_spec
+import experiment_grid
+import simulation
+
+
+def test_random_split_is_mm1_per_worker():
+    """ Αλγόριθμος 3: W_k = ρ_k / (μ_k - λ_k) με λ_k = λ μ_k / Σμ """
+    lam, mu = 0.6, np.array([0.5, 0.25, 0.25])
+    waits, utilizations = analytic.random_split([lam], mu)
+    lam_k = lam * mu / mu.sum()
+    rho = lam_k / mu
+    assert waits[0] == pytest.approx(float((lam_k / lam * rho / (mu - lam_k)).sum()))
+    assert utilizations[0] == pytest.approx(rho)
+
+
+def test_round_robin_with_one_worker_is_mm1():
+    """ Με N = 1 το E_N/M/1 είναι M/M/1: W = ρ / (μ - λ) """
+    lam, mu = 0.3, 0.5
+    waits, utilizations = analytic.round_robin([lam], [mu])
+    assert waits[0] == pytest.approx((lam / mu) / (mu - lam), rel=1e-9)
+    assert utilizations[0, 0] == pytest.approx(lam / mu)
+
+
+def test_unstable_configurations_have_infinite_wait():
+    waits, _ = analytic.random_split([2.0], [0.5, 0.5])
+    assert math.isinf(waits[0])
+
+
+def test_throughput_counts_dispatches_and_completions():
+    """ Ίδιος ορισμός με τον προσομοιωτή: ~2λ σε ευσταθές σύστημα """
+    cluster = cluster_spec.default_cluster()
+    predicted = analytic.predict([(3, 0), (2, 1)], cluster=cluster)
+    assert predicted['throughput'] == pytest.approx([2 * cluster.arrival_rate] * 2)
+
+
+def test_screen_keeps_the_simulated_best(monkeypatch):
+    monkeypatch.setattr(simulation, 'MAX_REPLICATIONS', 5)
+    grid = analytic.VALIDATION_GRID
+    simulated = experiment_grid.run_grid(grid, 5000, engine='fast', warmup=1000,
+                                         cluster=cluster_spec.default_cluster())
+    best = min(simulated, key=lambda res: res.summary['mean_wait'])
+    assert (best.algo, best.d) in analytic.screen(grid, cluster=cluster_spec.default_cluster())
+
+
+def test_screen_keeps_an_exact_best_against_an_approximation():
+    """ Μια ακριβής διαμόρφωση δεν απορρίπτεται από προσέγγιση μέσα στο εύρος των σφαλμάτων """
+    cluster = cluster_spec.ClusterSpec(0.2, [{'name': 'Fast', 'count': 2, 'service_rate': 1.0}])
+    kept = analytic.screen([(1, 0), (3, 0), (4, 0)], cluster=cluster)
+    assert (1, 0) in kept and (4, 0) in kept
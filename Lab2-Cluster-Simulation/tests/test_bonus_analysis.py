@@ -0,0 +1,36 @@
+import numpy as np
+
+import bonus_analysis
+import fast_engine
+import streams
+
+CUSTOMERS = 2000
+
+
+class ServiceLog:
+    """ Trace με όλες τις εξυπηρετήσεις, για τον υπολογισμό αναφοράς (bonus_analysis.checkpoints) """
+
+    def __init__(self):
+        self.rows = []
+
+    def append(self, id_number, node, arrival, service_start, service_end, queue_length):
+        self.rows.append((id_number, arrival, service_start, service_end))
+
+
+def test_transient_observer_matches_the_full_service_log():
+    observer, log = bonus_analysis.TransientObserver(CUSTOMERS), ServiceLog()
+    cluster = bonus_analysis.CLUSTER
+    engine = fast_engine.ClusterEngine(cluster.arrival_rate, cluster.service_rates, bonus_analysis.ALGORITHM,
+                                       bonus_analysis.D_PARAMETER, streams.replication_seed(streams.MASTER_SEED, 1),
+                                       observer, trace=log)
+    while observer.done < CUSTOMERS:
+        engine.run_until(engine.now + 500)
+
+    ids, arrivals, starts, ends = map(np.array, zip(*log.rows))
+    first = ids <= CUSTOMERS
+    order = np.argsort(ids[first])
+    assert np.array_equal(observer.waits, (starts - arrivals)[first][order])
+
+    expected = bonus_analysis.checkpoints(arrivals[first][order], starts, ends)
+    for column, reference in zip(observer.checkpoints(), expected):
+        assert np.allclose(column, reference, rtol=1e-12, atol=1e-9)
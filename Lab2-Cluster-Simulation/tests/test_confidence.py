@@ -0,0 +1,80 @@
+import math
+
+import numpy as np
+import pytest
+
+import confidence
+
+
+def test_mean_ci_uses_the_t_table():
+    mean, hw = confidence.mean_ci([1.0, 2.0, 3.0, 4.0, 5.0])
+    assert mean == 3.0
+    assert hw == pytest.approx(2.776 * math.sqrt(2.5 / 5))
+
+
+def test_antithetic_pairs_cancel_a_monotone_response():
+    """ Y = exp(U): τα ζεύγη (U, 1-U) είναι αρνητικά συσχετισμένα, άρα στενότερο CI με ίδιο πλήθος """
+    u = np.random.default_rng(1).random(20)
+    independent = np.exp(np.random.default_rng(2).random(40))
+    antithetic = np.exp(np.column_stack([u, 1 - u]).ravel())
+    mean, hw = confidence.antithetic_ci(antithetic.tolist())
+    _, plain_hw = confidence.mean_ci(independent.tolist())
+    assert abs(mean - (math.e - 1)) <= hw
+    assert hw < plain_hw / 3
+
+
+def test_antithetic_ci_averages_each_pair():
+    mean, hw = confidence.antithetic_ci([1.0, 3.0, 2.0, 2.0, 0.0, 4.0])
+    assert (mean, hw) == (2.0, 0.0)
+
+
+def test_control_variate_removes_the_correlated_noise():
+    """ Y = 2 + 3 (C - 1) + μικρός θόρυβος, E[C] = 1: η εκτίμηση είναι ~2 με πολύ μικρότερο CI """
+    rng = np.random.default_rng(3)
+    controls = rng.exponential(1.0, 30)
+    values = 2 + 3 * (controls - 1) + rng.normal(0, 0.05, 30)
+    mean, hw = confidence.control_variate_ci(values.tolist(), controls.tolist())
+    _, plain_hw = confidence.mean_ci(values.tolist())
+    assert abs(mean - 2) <= hw
+    assert hw < plain_hw / 10
+
+
+def test_control_variate_falls_back_without_information():
+    """ Σταθερό control (μηδενική διασπορά) ή λίγες replications: το απλό CI """
+    values = [1.0, 2.0, 4.0, 3.0]
+    assert confidence.control_variate_ci(values, [[1.0]] * 4) == confidence.mean_ci(values)
+    assert confidence.control_variate_ci(values[:2], [[0.5], [1.5]]) == confidence.mean_ci(values[:2])
+
+
+def test_paired_difference_uses_common_random_numbers():
+    """ a και b με κοινό θόρυβο: το CI της διαφοράς είναι στενό, ενώ τα χωριστά CIs επικαλύπτονται """
+    rng = np.random.default_rng(4)
+    common = rng.normal(10, 3, 20)
+    a = common + 0.5 + rng.normal(0, 0.05, 20)
+    b = common
+    diff, hw = confidence.paired_difference_ci(a.tolist(), b.tolist())
+    assert abs(diff - 0.5) <= hw < 0.1
+    (ma, ha), (mb, hb) = confidence.mean_ci(a.tolist()), confidence.mean_ci(b.tolist())
+    assert ma - ha < mb + hb
+
+
+def test_estimate_dispatches_on_the_estimator():
+    results = [{'mean_wait': w, 'controls': [c, 1.0 + 0.1 * i]}
+               for i, (w, c) in enumerate([(1.0, 0.9), (1.4, 1.2), (0.8, 0.7), (1.2, 1.1), (1.1, 1.0), (0.9, 0.8)])]
+    waits = [r['mean_wait'] for r in results]
+    assert confidence.estimate('plain', results) == confidence.mean_ci(waits)
+    assert confidence.estimate('antithetic', results) == confidence.antithetic_ci(waits)
+    assert confidence.estimate('control', results) == confidence.control_variate_ci(
+        waits, [r['controls'] for r in results])
+
+
+def test_ratio_ci_matches_the_delta_method():
+    rng = np.random.default_rng(5)
+    tau = rng.exponential(2.0, 200)
+    y = 3 * tau + rng.normal(0, 0.5, 200)
+    r, hw = confidence.ratio_ci(len(y), y.sum(), tau.sum(), (y * y).sum(), (tau * tau).sum(), (y * tau).sum())
+    assert r == pytest.approx(y.sum() / tau.sum())
+    residual = y - r * tau
+    expected = confidence.get_t_value(199) * residual.std(ddof=1) / math.sqrt(200) / tau.mean()
+    assert hw == pytest.approx(expected)
+    assert abs(r - 3) <= hw
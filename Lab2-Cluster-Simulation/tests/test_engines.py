@@ -0,0 +1,53 @@
+import pytest
+
+import simulation
+import streams
+
+# Η ciw και η native μηχανή τραβάνε από τα ίδια substreams του seed και έχουν τους ίδιους
+# ορισμούς στατιστικών, οπότε μια replication πρέπει να δίνει ακριβώς το ίδιο dict.
+
+SIM_TIME = 500
+WARMUP = 100
+SEED = streams.replication_seed(streams.MASTER_SEED, 1)
+
+
+@pytest.mark.parametrize('algo, d', [(1, 0), (2, 0), (2, 3)])
+def test_ciw_and_fast_engines_match(algo, d):
+    ciw_result = simulation.run_replication(SIM_TIME, algo, SEED, d, engine='ciw', warmup_time=WARMUP)
+    fast_result = simulation.run_replication(SIM_TIME, algo, SEED, d, engine='fast', warmup_time=WARMUP)
+    assert ciw_result == fast_result
+
+
+@pytest.mark.parametrize('algo', [3, 4])
+def test_ciw_and_native_engine_match_for_state_independent_routing(algo):
+    """ Με --engine fast οι 3/4 πάνε στο Lindley path, οπότε η native μηχανή καλείται απευθείας """
+    ciw_result = simulation.run_replication(SIM_TIME, algo, SEED, engine='ciw', warmup_time=WARMUP)
+    fast_result = simulation.run_fast_replication(SIM_TIME, algo, SEED, warmup_time=WARMUP)
+    assert ciw_result == fast_result
+
+
+@pytest.mark.parametrize('d', [(0, 0), (1, 0), (2, 3)])
+def test_engines_match_with_per_class_thresholds(d):
+    ciw_result = simulation.run_replication(SIM_TIME, 2, SEED, d, engine='ciw', warmup_time=WARMUP)
+    fast_result = simulation.run_replication(SIM_TIME, 2, SEED, d, engine='fast', warmup_time=WARMUP)
+    assert ciw_result == fast_result
+
+
+def test_single_threshold_tuple_matches_scalar_threshold():
+    assert (simulation.run_replication(SIM_TIME, 2, SEED, (2,), engine='fast', warmup_time=WARMUP)
+            == simulation.run_replication(SIM_TIME, 2, SEED, 2, engine='fast', warmup_time=WARMUP))
+
+
+@pytest.mark.parametrize('warmup_time', [0, WARMUP])
+def test_instrumentation_does_not_change_results(warmup_time):
+    """ Με --instrument (και χωρίς warm-up) η ciw και η native μηχανή δίνουν τα ίδια αποτελέσματα """
+    saved = simulation.INSTRUMENT
+    try:
+        plain = simulation.run_replication(SIM_TIME, 2, SEED, 1, 'ciw', warmup_time=warmup_time)
+        simulation.INSTRUMENT = {'profile_dir': None}
+        for engine in ('ciw', 'fast'):
+            result = simulation.run_replication(SIM_TIME, 2, SEED, 1, engine, warmup_time=warmup_time)
+            assert result.pop('instrumentation')['events'] > 0
+            assert result == plain
+    finally:
+        simulation.INSTRUMENT = saved
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+import cluster_spec
+import load_index
+
+RATES = cluster_spec.default_cluster().service_rates
+
+
+def random_indexes(count, seed=1):
+    """ WorkerLoadIndex με τυχαία φορτία (0..5 ανά worker) """
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        index = load_index.WorkerLoadIndex(RATES)
+        for i, load in enumerate(rng.integers(0, 6, len(RATES))):
+            index.set_load(i, int(load))
+        yield index
+
+
+@pytest.mark.parametrize('d', [0, 1, 2, 5])
+def test_single_class_threshold_is_fast_threshold(d):
+    for index in random_indexes(500):
+        assert load_index.class_thresholds(index, (d,)) == load_index.fast_threshold(index, d)
+
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+import cluster_spec
+from online_stats import ReplicationObserver
+from quantile_sketch import RELATIVE_ACCURACY, QuantileSketch, merge_all
+
+
+def exponential_waits(seed, n):
+    """ Αναμονές με ατομική μάζα στο 0, όπως στις ουρές """
+    rng = np.random.default_rng(seed)
+    return np.where(rng.random(n) < 0.3, 0.0, rng.exponential(10.0, n))
+
+
+@pytest.mark.parametrize('q', [0.01, 0.5, 0.9, 0.95, 0.99, 0.999])
+def test_quantiles_within_relative_bound(q):
+    values = exponential_waits(1, 20000)
+    sketch = QuantileSketch()
+    sketch.add_many(values)
+    exact = np.quantile(values, q, method='lower')
+    assert abs(sketch.quantile(q) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_merge_equals_sketch_of_union():
+    parts = [exponential_waits(seed, 5000) for seed in range(4)]
+    sketches = []
+    for part in parts:
+        sketch = QuantileSketch()
+        for x in part.tolist():
+            sketch.add(x)
+        sketches.append(sketch)
+    merged = merge_all(sketches)
+    whole = QuantileSketch()
+    whole.add_many(np.concatenate(parts))
+    assert merged.to_dict() == whole.to_dict()
+    union = np.concatenate(parts)
+    for q in (0.5, 0.95, 0.99):
+        exact = np.quantile(union, q, method='lower')
+        assert abs(merged.quantile(q) - exact) <= RELATIVE_ACCURACY * exact
+
+
+def test_merge_rejects_different_accuracy():
+    with pytest.raises(ValueError):
+        QuantileSketch(0.01).merge(QuantileSketch(0.02))
+
+
+def test_speed_classes_number_fastest_first():
+    cluster = cluster_spec.default_cluster()
+    classes = cluster_spec.speed_classes(cluster.service_rates)
+    assert [cluster.class_name(classes.index(c)) for c in range(3)] == ['Fast', 'Medium', 'Slow']
+    observer = ReplicationObserver(cluster.arrival_rate, cluster.service_rates, 0, 100)
+    assert observer.worker_class == classes
@@ -0,0 +1,96 @@
+import numpy as np
+import pytest
+
+import cluster_spec
+import fast_engine
+import replay
+import streams
+import trace_sink
+
+CLUSTER = cluster_spec.default_cluster()
+SEED = streams.replication_seed(streams.MASTER_SEED, 1)
+
+
+def synthetic_trace(directory, jobs=3000, block_jobs=None):
+    rng = np.random.default_rng(1)
+    arrival = np.cumsum(rng.exponential(1.0, jobs))
+    size = rng.exponential(1.0, jobs)
+    replay.write_arrays(str(directory), arrival, size, normalize=False)
+    return arrival, size
+
+
+def drain(workload, jobs):
+    gaps, sizes = [], []
+    for _ in range(jobs):
+        gaps.append(workload.interarrival())
+        sizes.append(workload.pending_size)
+    return np.array(gaps), np.array(sizes)
+
+
+def test_shift_replays_a_rotation_of_the_trace(tmp_path):
+    arrival, size = synthetic_trace(tmp_path)
+    workload = replay.ReplayWorkload(str(tmp_path), 'shift', SEED)
+    start = workload.position
+    gaps, sizes = drain(workload, len(arrival))
+    assert np.array_equal(sizes, np.roll(size, -start))
+    trace_gaps = np.concatenate(([1.0 / replay.arrival_rate(replay.open_replay(str(tmp_path))[1])], np.diff(arrival)))
+    assert np.allclose(gaps, np.roll(trace_gaps, -start))
+    # Ίδιο seed, ίδια μετατόπιση σε κάθε πολιτική (CRN)· άλλο seed, άλλη
+    assert replay.ReplayWorkload(str(tmp_path), 'shift', SEED).position == start
+    assert replay.ReplayWorkload(str(tmp_path), 'shift', SEED + 1).position != start
+
+
+def test_bootstrap_draws_blocks_of_consecutive_jobs(tmp_path):
+    _, size = synthetic_trace(tmp_path)
+    block = 100
+    workload = replay.ReplayWorkload(str(tmp_path), 'bootstrap', SEED, block_jobs=block)
+    _, sizes = drain(workload, 5 * block)
+    starts = []
+    for chunk in sizes.reshape(5, block):
+        lo = int(np.flatnonzero(size == chunk[0])[0])
+        assert np.array_equal(chunk, size[lo:lo + block])
+        starts.append(lo)
+    assert len(set(starts)) > 1
+
+
+def test_exact_replay_ends_with_the_trace(tmp_path):
+    arrival, _ = synthetic_trace(tmp_path, jobs=10)
+    workload = replay.ReplayWorkload(str(tmp_path), 'exact', SEED)
+    gaps, _ = drain(workload, 10)
+    assert np.allclose(gaps[1:], np.diff(arrival))
+    assert workload.interarrival() == np.inf
+
+
+def test_exact_replay_reproduces_recorded_waits(tmp_path):
+    """ Trace μιας προσομοίωσης -> replay (αφίξεις, size = χρόνος εξυπηρέτησης * μ) -> ίδιες αναμονές
+
+    Με τον αλγόριθμο 1 η δρομολόγηση εξαρτάται μόνο από τα φορτία, και οι πρώτοι k πελάτες
+    δεν επηρεάζονται από τους επόμενους, οπότε το replay των k πρώτων δίνει ξανά τις αναμονές τους.
+    """
+    rates = np.array(CLUSTER.service_rates)
+    recorded = trace_sink.TraceWriter(str(tmp_path / 'recorded'))
+    fast_engine.run_fast_replication(CLUSTER.arrival_rate, CLUSTER.service_rates, 1, 0, SEED, 0.0, 2000,
+                                     trace=recorded)
+    recorded.close()
+    trace, _ = trace_sink.open_trace(str(tmp_path / 'recorded'))
+    done = ~np.isnan(trace['service_end'])
+    order = np.argsort(trace['id'][done])
+    ids = trace['id'][done][order]
+    k = int(np.flatnonzero(ids != np.arange(1, len(ids) + 1))[0]) if np.any(ids != np.arange(1, len(ids) + 1)) \
+        else len(ids)
+    assert k > 1000
+    arrival = trace['arrival'][done][order][:k]
+    service = (trace['service_end'] - trace['service_start'])[done][order][:k]
+    size = service * rates[trace['node'][done][order][:k] - 2]
+    replay.write_arrays(str(tmp_path / 'jobs'), arrival, size, normalize=False)
+
+    workload = replay.ReplayWorkload(str(tmp_path / 'jobs'), 'exact', SEED)
+    replayed = trace_sink.TraceWriter(str(tmp_path / 'replayed'))
+    fast_engine.run_fast_replication(workload.arrival_rate, CLUSTER.service_rates, 1, 0, SEED, 0.0, 1e6,
+                                     trace=replayed, workload=workload)
+    replayed.close()
+    again, meta = trace_sink.open_trace(str(tmp_path / 'replayed'))
+    assert meta['count'] == k
+    order_again = np.argsort(again['id'])
+    assert np.array_equal(again['node'][order_again], trace['node'][done][order][:k])
+    assert np.allclose(again['wait'][order_again], trace['wait'][done][order][:k], atol=1e-9)
@@ -0,0 +1,100 @@
+import itertools
+import json
+import sqlite3
+from types import SimpleNamespace
+
+import replication_cache
+import simulation
+import streams
+from replication_cache import ReplicationCache, replication_key
+
+RESULT = {'mean_wait': 1.5, 'utilizations': [0.5, 0.25], 'throughput': 2.0}
+
+
+def entry_size(result):
+    return len(json.dumps(result))
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ReplicationCache(str(tmp_path / 'cache.sqlite'))
+    key = replication_key({'seed': 1})
+    assert cache.get(key) is None
+    cache.put(key, RESULT)
+    assert cache.get(key) == RESULT
+    assert cache.get(replication_key({'seed': 2})) is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    cache.close()
+
+
+def test_entries_survive_reopening(tmp_path):
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ReplicationCache(path)
+    cache.put(replication_key({'seed': 1}), RESULT)
+    cache.close()
+    cache = ReplicationCache(path)
+    assert cache.get(replication_key({'seed': 1})) == RESULT
+    assert cache.size_bytes == entry_size(RESULT)
+    cache.close()
+
+
+def test_size_is_tracked_across_replacements(tmp_path):
+    cache = ReplicationCache(str(tmp_path / 'cache.sqlite'))
+    key = replication_key({'seed': 1})
+    cache.put(key, RESULT)
+    cache.put(key, {'mean_wait': 0.0})
+    cache.put(replication_key({'seed': 2}), RESULT)
+    assert cache.size_bytes == cache._stored_bytes() == entry_size({'mean_wait': 0.0}) + entry_size(RESULT)
+    cache.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    size = entry_size(RESULT)
+    cache = ReplicationCache(str(tmp_path / 'cache.sqlite'), max_bytes=10 * size)
+    keys = [replication_key({'seed': seed}) for seed in range(10)]
+    for key in keys:
+        cache.put(key, RESULT)
+    assert len(cache) == 10
+    cache.get(keys[0])  # Η 0 γίνεται η πιο πρόσφατα χρησιμοποιημένη
+    cache.put(replication_key({'seed': 10}), RESULT)
+    # Πάνω από το όριο: διαγραφή των LRU μέχρι το EVICT_TO του ορίου
+    assert cache.size_bytes == cache._stored_bytes() <= replication_cache.EVICT_TO * cache.max_bytes
+    assert cache.get(keys[0]) == RESULT
+    assert cache.get(keys[1]) is None
+    assert cache.get(replication_key({'seed': 10})) == RESULT
+    cache.close()
+
+
+def test_ciw_and_fast_share_entries_but_lindley_does_not():
+    seed = streams.replication_seed(streams.MASTER_SEED, 1)
+    ciw = simulation.cache_key(500, 2, seed, 1, engine='ciw', warmup_time=100)
+    assert ciw == simulation.cache_key(500, 2, seed, 1, engine='fast', warmup_time=100)
+    # Με --engine fast ο αλγόριθμος 3 τρέχει στο Lindley path
+    assert (simulation.cache_key(500, 3, seed, engine='ciw', warmup_time=100)
+            != simulation.cache_key(500, 3, seed, engine='fast', warmup_time=100))
+
+
+def stored_last_used(path, key):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT last_used FROM replications WHERE key = ?", (key,)).fetchone()[0]
+    finally:
+        db.close()
+
+
+def test_hits_are_written_in_batches(tmp_path, monkeypatch):
+    monkeypatch.setattr(replication_cache, 'TOUCH_BATCH', 2)
+    monkeypatch.setattr(replication_cache, 'time', SimpleNamespace(time=itertools.count().__next__))
+    path = str(tmp_path / 'cache.sqlite')
+    cache = ReplicationCache(path)
+    keys = [replication_key({'seed': seed}) for seed in range(3)]
+    for key in keys:
+        cache.put(key, RESULT)
+    stored = stored_last_used(path, keys[0])
+    cache.get(keys[0])  # Μόνο στη μνήμη ως το TOUCH_BATCH-οστό hit
+    assert stored_last_used(path, keys[0]) == stored
+    cache.get(keys[1])
+    assert stored_last_used(path, keys[0]) > stored
+    cache.get(keys[2])
+    stored = stored_last_used(path, keys[2])
+    cache.close()
+    assert stored_last_used(path, keys[2]) > stored
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+import cluster_spec
+import fast_engine
+import snapshot
+import streams
+from online_stats import ReplicationObserver
+
+CLUSTER = cluster_spec.default_cluster()
+WARMUP = 500
+SIM_TIME = 500
+
+
+def params(algorithm=2, d=1):
+    return {'arrival_rate': CLUSTER.arrival_rate, 'service_rates': CLUSTER.service_rates,
+            'algorithm': algorithm, 'd': d, 'warmup': WARMUP}
+
+
+def capture(seeds, algorithm=2, d=1):
+    return snapshot.capture(CLUSTER.arrival_rate, CLUSTER.service_rates, algorithm, d, seeds, WARMUP)
+
+
+def test_state_survives_json_and_restore():
+    """ state() -> JSON -> restore(resample=False) -> state(): η ίδια κατάσταση """
+    state, = capture([streams.warm_state_seed(streams.MASTER_SEED, 0)])
+    state = json.loads(json.dumps(state))
+    assert state['now'] == WARMUP and any(state['queues']) and any(state['in_service'])
+    observer = ReplicationObserver(CLUSTER.arrival_rate, CLUSTER.service_rates, WARMUP, SIM_TIME)
+    engine = fast_engine.ClusterEngine(CLUSTER.arrival_rate, CLUSTER.service_rates, 2, 1, 1, observer)
+    engine.restore(state, resample=False)
+    assert engine.state() == state
+    assert engine.index.loads[:-1] == [len(q) + (s is not None) for q, s in zip(state['queues'], state['in_service'])]
+
+
+def test_fork_measures_after_the_snapshot(tmp_path):
+    seeds = [streams.warm_state_seed(streams.MASTER_SEED, i) for i in range(2)]
+    path = snapshot.write_snapshot(str(tmp_path / 'warm.json'), params(), capture(seeds))
+    warm = snapshot.load_snapshot(path)
+    seed = streams.replication_seed(streams.MASTER_SEED, 1)
+    first = snapshot.fork(warm, 0, seed, SIM_TIME).result()
+    assert first == snapshot.fork(warm, 0, seed, SIM_TIME).result()  # Ντετερμινιστικό ανά (κατάσταση, seed)
+    assert first != snapshot.fork(warm, 1, seed, SIM_TIME).result()
+    assert first != snapshot.fork(warm, 0, seed + 1, SIM_TIME).result()
+    # Το παράθυρο είναι [now, now + SIM_TIME]: ~λ διελεύσεις + ~λ ολοκληρώσεις ανά sec
+    assert first['throughput'] == pytest.approx(2 * CLUSTER.arrival_rate, rel=0.15)
+    assert 0 < min(first['utilizations']) and max(first['utilizations']) <= 1
+
+
+def test_snapshot_version_is_checked(tmp_path):
+    path = str(tmp_path / 'old.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': snapshot.SNAPSHOT_VERSION + 1, 'params': params(), 'states': []}, f)
+    with pytest.raises(ValueError):
+        snapshot.load_snapshot(path)
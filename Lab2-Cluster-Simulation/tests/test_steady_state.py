@@ -0,0 +1,44 @@
+import numpy as np
+
+import steady_state
+import streams
+
+# M/M/1 με λ = 0.5, μ = 1: W = ρ / (μ - λ) = 1
+ARRIVAL_RATE = 0.5
+SERVICE_RATE = 1.0
+EXACT_WAIT = 1.0
+
+
+def test_batch_means_doubles_the_batch_size():
+    values = np.random.default_rng(1).random(1000)
+    batch_means = steady_state.BatchMeans()
+    for x in values.tolist():
+        batch_means.add(x)
+    size, batches = batch_means.batch_size, batch_means.batches
+    assert steady_state.MAX_BATCHES // 2 <= len(batches) < steady_state.MAX_BATCHES
+    assert size == 16
+    expected = values[:len(batches) * size].reshape(len(batches), size).mean(axis=1)
+    assert np.allclose(batches, expected)
+
+
+def test_regenerative_counts_only_closed_cycles():
+    regenerative = steady_state.Regenerative()
+    regenerative.add(5.0)  # Πριν από την πρώτη αναγέννηση: δεν μετράει
+    for cycle in ([1.0, 2.0], [0.0], [3.0, 0.0, 1.0]):
+        regenerative.regenerate()
+        for wait in cycle:
+            regenerative.add(wait)
+    assert regenerative.n == 2  # Ο τελευταίος κύκλος είναι ακόμη ανοιχτός
+    assert (regenerative.sum_y, regenerative.sum_t, regenerative.sum_yt) == (3.0, 3.0, 6.0)
+
+
+def test_single_run_cis_cover_the_mm1_wait():
+    seed = streams.replication_seed(streams.MASTER_SEED, 1)
+    observer = steady_state.run_steady_state(ARRIVAL_RATE, [SERVICE_RATE], 1, 0, seed, 1000, 20000,
+                                             desired_rel_error=0.05, max_duration=400000)
+    estimates = observer.estimates()
+    batch_means, regenerative = estimates['batch_means'], estimates['regenerative']
+    assert batch_means['rel_error'] <= 0.05 and observer.batches_independent()
+    assert abs(batch_means['mean'] - EXACT_WAIT) <= batch_means['half_width']
+    assert regenerative['cycles'] >= steady_state.MIN_CYCLES
+    assert abs(regenerative['mean'] - EXACT_WAIT) <= regenerative['half_width']
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import simulation
+import streams
+import trace_sink
+
+SIM_TIME = 500
+WARMUP = 100
+SEED = streams.replication_seed(streams.MASTER_SEED, 1)
+
+
+def test_columns_round_trip_across_chunks(tmp_path):
+    rows = [(i, 2 + i % 3, 0.5 * i, 0.5 * i + 0.25, 0.5 * i + 1.0 if i % 4 else np.nan, i % 5) for i in range(1, 11)]
+    writer = trace_sink.TraceWriter(str(tmp_path), {'note': 'test'}, chunk_size=3)
+    for row in rows:
+        writer.append(*row)
+    writer.close()
+    trace, meta = trace_sink.open_trace(str(tmp_path))
+    assert meta['count'] == len(rows) and meta['note'] == 'test'
+    for name, column in zip(('id', 'node', 'arrival', 'service_start', 'service_end', 'queue_length'), zip(*rows)):
+        assert np.array_equal(trace[name], np.array(column), equal_nan=True)
+        assert trace[name].dtype == trace_sink.COLUMNS[name][1]
+    assert np.allclose(trace['wait'], 0.25)
+
+
+def test_empty_trace_opens(tmp_path):
+    trace_sink.TraceWriter(str(tmp_path)).close()
+    trace, meta = trace_sink.open_trace(str(tmp_path))
+    assert meta['count'] == 0 and len(trace['id']) == 0
+
+
+@pytest.mark.parametrize('engine', ['ciw', 'fast'])
+def test_summary_of_a_trace_matches_the_replication(tmp_path, engine):
+    """ Ο trace_sink.summary ξαναϋπολογίζει από το trace τα στατιστικά του ReplicationObserver """
+    result = simulation.run_replication(SIM_TIME, 2, SEED, 1, engine, warmup_time=WARMUP, trace_dir=str(tmp_path))
+    trace, meta = trace_sink.open_trace(str(tmp_path))
+    assert meta['engine'] == engine and meta['count'] == len(np.unique(trace['id']))
+    mean_wait, utilizations, throughput = trace_sink.summary(trace, simulation.CLUSTER.n_workers, WARMUP, SIM_TIME)
+    assert mean_wait == pytest.approx(result['mean_wait'])
+    assert utilizations == pytest.approx(result['utilizations'])
+    assert throughput == pytest.approx(result['throughput'])
+
+
+def test_trace_does_not_change_the_result(tmp_path):
+    plain = simulation.run_replication(SIM_TIME, 2, SEED, 1, 'fast', warmup_time=WARMUP)
+    traced = simulation.run_replication(SIM_TIME, 2, SEED, 1, 'fast', warmup_time=WARMUP, trace_dir=str(tmp_path))
+    assert traced == plain
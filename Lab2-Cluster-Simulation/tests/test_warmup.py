@@ -0,0 +1,45 @@
+import numpy as np
+
+import warmup
+
+
+def transient_series(n, transient, seed):
+    """ Εκθετική αποκλιμάκωση από 20 προς 1 στις πρώτες `transient` τιμές, μετά στάσιμος θόρυβος """
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    drift = np.where(t < transient, 1 + 19 * (1 - t / transient) ** 2, 1.0)
+    return drift + rng.normal(0, 0.5, n)
+
+
+def test_mser_finds_the_transient():
+    values = transient_series(2000, 200, seed=3)
+    d = warmup.mser(values)
+    assert 150 <= d <= 300
+
+
+def test_mser_keeps_a_stationary_series():
+    values = np.random.default_rng(4).normal(5, 1, 2000)
+    assert warmup.mser(values) < 100
+
+
+def test_mser5_truncation_in_customers_and_time():
+    """ Batches των 5: το σημείο τομής σε πελάτες και σε ώρα άφιξης """
+    waits = transient_series(5000, 1000, seed=5)
+    detector = warmup.Mser5()
+    for i, wait in enumerate(waits):
+        detector.add(float(i), wait)
+    customers, cutoff = detector.truncation()
+    assert customers % warmup.BATCH_SIZE == 0
+    assert 750 <= customers <= 1500
+    assert cutoff == customers - 1  # Η τελευταία άφιξη του τελευταίου batch που διαγράφεται
+
+
+def test_ensemble_of_pilots_uses_the_shortest():
+    short, long = warmup.Mser5(), warmup.Mser5()
+    for i, wait in enumerate(transient_series(1000, 200, seed=6)):
+        short.add(float(i), wait)
+    for i, wait in enumerate(transient_series(3000, 200, seed=7)):
+        long.add(float(i), wait)
+    customers, cutoff, batches = warmup.ensemble_truncation([short, long])
+    assert batches == 1000 // warmup.BATCH_SIZE
+    assert 150 <= customers <= 300
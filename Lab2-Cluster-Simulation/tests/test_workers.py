@@ -0,0 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+import experiment_grid
+import simulation
+from replication_cache import ReplicationCache
+
+# Οι replications έχουν δικά τους substreams και ο κανόνας διακοπής ελέγχεται με τη
+# σειρά τους, οπότε τα αποτελέσματα δεν εξαρτώνται από το πλήθος των workers.
+
+SIM_TIME = 500
+WARMUP = 100
+WORKERS = 3
+MASTER_SEED = 7
+
+
+@pytest.mark.parametrize('algo, d', [(2, 1), (3, 0)])
+def test_replication_wave_is_independent_of_workers(algo, d):
+    """ simulation.py --workers 1 και --workers N (το 3 περνάει από το Lindley path σε κομμάτια) """
+    simulation.init_worker('fast', simulation.CLUSTER.to_dict())
+    plan = simulation.replication_plan(MASTER_SEED, 1, 2 * WORKERS)
+    inline = simulation.run_replication_wave(None, 1, SIM_TIME, algo, d, plan, warmup_time=WARMUP)
+    with ProcessPoolExecutor(max_workers=WORKERS, initializer=simulation.init_worker,
+                             initargs=('fast', simulation.CLUSTER.to_dict())) as pool:
+        pooled = simulation.run_replication_wave(pool, WORKERS, SIM_TIME, algo, d, plan, warmup_time=WARMUP)
+    simulation.init_worker('ciw', simulation.CLUSTER.to_dict())
+    assert inline == pooled
+
+
+def test_grid_is_independent_of_workers():
+    """ experiment_grid.run_grid με workers=1 (inline) και workers=N (κοινό pool) """
+    grid = [(1, 0), (2, 1), (3, 0)]
+    inline = experiment_grid.run_grid(grid, SIM_TIME, workers=1, master_seed=MASTER_SEED, engine='fast',
+                                      warmup=WARMUP)
+    pooled = experiment_grid.run_grid(grid, SIM_TIME, workers=WORKERS, master_seed=MASTER_SEED, engine='fast',
+                                      warmup=WARMUP)
+    assert [res.results for res in inline] == [res.results for res in pooled]
+
+
+def test_grid_restores_simulation_globals():
+    replay_config = {'path': '/nonexistent', 'mode': 'shift'}
+    instrument = {'profile_dir': None}
+    saved = (simulation.ENGINE, simulation.CLUSTER, simulation.REPLAY, simulation.INSTRUMENT)
+    simulation.REPLAY, simulation.INSTRUMENT = replay_config, instrument
+    try:
+        experiment_grid.run_grid([], SIM_TIME, workers=1, engine='fast', warmup=WARMUP)
+        assert simulation.REPLAY is replay_config and simulation.INSTRUMENT is instrument
+        assert simulation.ENGINE == saved[0] and simulation.CLUSTER is saved[1]
+    finally:
+        simulation.ENGINE, simulation.CLUSTER, simulation.REPLAY, simulation.INSTRUMENT = saved
+
+
+def test_grid_runs_warmup_pilots_on_the_pool_and_caches_them(tmp_path, monkeypatch):
+    """ Με cache τα MSER-5 pilots τρέχουν στο pool και το parent αποθηκεύει το αποτέλεσμα """
+    grid = [(2, 1), (3, 0)]
+    cache = ReplicationCache(str(tmp_path / 'cache.sqlite'))
+    try:
+        pooled = experiment_grid.run_grid(grid, SIM_TIME, workers=WORKERS, master_seed=MASTER_SEED, engine='fast',
+                                          cache=cache)
+        warmup_keys = set()
+        for res in pooled:
+            key = simulation.warmup_key(SIM_TIME, res.algo, res.d, MASTER_SEED)
+            warmup_keys.add(key)
+            assert cache.get(key) == res.warmup
+
+        # Οι speculative replications που ακυρώθηκαν δεν αποθηκεύτηκαν, άρα μόνο τα pilots ελέγχονται
+        missed = []
+        get = cache.get
+
+        def recording_get(key):
+            result = get(key)
+            if result is None:
+                missed.append(key)
+            return result
+        monkeypatch.setattr(cache, 'get', recording_get)
+        cached = experiment_grid.run_grid(grid, SIM_TIME, workers=WORKERS, master_seed=MASTER_SEED, engine='fast',
+                                          cache=cache)
+        assert not warmup_keys.intersection(missed)  # Δεύτερη εκτέλεση: τα pilots από την cache
+    finally:
+        cache.close()
+    inline = experiment_grid.run_grid(grid, SIM_TIME, workers=1, master_seed=MASTER_SEED, engine='fast')
+    assert [res.warmup for res in inline] == [res.warmup for res in pooled] == [res.warmup for res in cached]
+    assert [res.results for res in inline] == [res.results for res in pooled] == [res.results for res in cached]